@@ -1,10 +1,338 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from experts_crew_system import create_aws_architecture_recommendation
+
+from job_queue import JobQueue, QueueFullError
+from pricing_engine import what_if
+from result_cache import canonical_requirements, create_result_cache, requirements_key
+from run_logging import create_logger
+from run_store import create_run_store
+from section_parser import StructuredOutputs, parse_task_outputs
+from semantic_cache import create_semantic_cache
+from single_flight import SharedResults, SingleFlight
+from telemetry import metrics, tracer
+
+load_dotenv()
 
 app = FastAPI(title="AWS Architecture Recommendation API")
 
+# experts_crew_system imports crewai and builds the agents, tasks, LLM pool and
+# search tool, which takes seconds. It is not imported with this module: the
+# startup warm-up imports it on a background thread (a request arriving earlier
+# waits for it on its worker), and /api/ready reports when that is done.
+warm_up_state = {
+    "status": "pending",
+    "import_seconds": None,
+    "models": None,
+    "error": None,
+}
+
+def crew_system():
+    """The experts_crew_system module, imported on first use."""
+    import experts_crew_system
+    return experts_crew_system
+
+def loaded_crew_system():
+    """The experts_crew_system module once warm-up has imported it, else None."""
+    return (
+        sys.modules.get("experts_crew_system")
+        if warm_up_state["import_seconds"] is not None
+        else None
+    )
+
+def warm_up() -> None:
+    """
+    Import the crew system and clone its pipeline once, then load the models on
+    the Ollama hosts unless OLLAMA_WARM_UP=false. Progress is kept in warm_up_state.
+    """
+    started = time.perf_counter()
+    try:
+        warm_up_state["status"] = "importing"
+        crew = crew_system()
+        crew.build_pipeline()
+        warm_up_state["import_seconds"] = round(time.perf_counter() - started, 3)
+        if os.getenv("OLLAMA_WARM_UP", "true").lower() == "true":
+            warm_up_state["status"] = "loading_models"
+            warm_up_state["models"] = crew.warm_up_llm()
+        warm_up_state["status"] = "ready"
+    except Exception as e:
+        warm_up_state.update(status="failed", error=str(e))
+
+# Crew runs are blocking and take minutes, so they run on a worker pool behind a
+# bounded queue instead of on the event loop
+jobs = JobQueue(
+    max_workers=int(os.getenv("CREW_MAX_WORKERS", "2")),
+    max_queued=int(os.getenv("CREW_MAX_QUEUED_JOBS", "8")),
+    worker_type=os.getenv("CREW_WORKER_TYPE", "thread"),
+)
+
+# Identical requirements (after normalization) are answered from this cache.
+# Use the sqlite backend to share it between process workers and restarts.
+result_cache = create_result_cache(
+    backend=os.getenv("RESULT_CACHE_BACKEND", "memory"),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", str(24 * 3600))),
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+    path=os.getenv("RESULT_CACHE_PATH", "result_cache.sqlite3"),
+)
+
+metrics.gauge(
+    "crew_jobs",
+    "Crew runs by state",
+    lambda: {
+        (("state", state),): value
+        for state, value in jobs.stats().items()
+        if state in ("running", "queued")
+    },
+)
+def circuit_breakers():
+    crew = loaded_crew_system()
+    if crew is None:
+        return []
+    breakers = [crew.search_tool.layer.breaker] + [
+        endpoint.breaker for endpoint in crew.ollama_pool.endpoints
+    ]
+    return [breaker for breaker in breakers if breaker is not None]
+
+metrics.gauge(
+    "crew_circuit_open",
+    "Whether a dependency's circuit breaker is open (1) or not (0)",
+    lambda: {
+        (("dependency", breaker.name),): int(breaker.state == "open")
+        for breaker in circuit_breakers()
+    },
+)
+
+# Every run, with its status, task outputs as they complete and result, so clients
+# can fetch a result again (or after disconnecting) instead of re-running it
+run_store = create_run_store(
+    backend=os.getenv("RUN_STORE_BACKEND", "sqlite"),
+    path=os.getenv("RUN_STORE_PATH", "runs.sqlite3"),
+)
+# Unfinished runs whose process has not renewed their lease for RUN_STORE_LEASE
+# seconds are marked interrupted (see RunStore.heartbeat)
+RUN_STORE_LEASE = float(os.getenv("RUN_STORE_LEASE", "120"))
+
+# Same JSON-lines logger settings as the crew runs (see experts_crew_system)
+log = create_logger(
+    "app",
+    level=os.getenv("CREW_LOG_LEVEL", "INFO"),
+    rate=float(os.getenv("CREW_LOG_RATE", "50")),
+    burst=int(os.getenv("CREW_LOG_BURST", "200")),
+)
+
+# Runs in progress keyed by the content address of their requirements: identical
+# requests (double submits, client retries) arriving while a run is in progress
+# attach to it and get its result instead of starting another run
+flights = SingleFlight()
+
+# Most requirement variants accepted by one /api/kickoff/batch request
+MAX_BATCH_VARIANTS = int(os.getenv("CREW_MAX_BATCH_VARIANTS", "12"))
+
+# Most scenarios priced by one /api/cost/what-if request
+MAX_WHAT_IF_SCENARIOS = int(os.getenv("COST_MAX_WHAT_IF_SCENARIOS", "100"))
+
+# Requirements that match a cached run on every field but use_case and on the
+# numbers stated in use_case, and whose use_case is close enough in meaning (cosine
+# similarity of the embeddings), are answered from the semantic cache.
+# SEMANTIC_CACHE_EMBEDDER is "auto" (a local sentence-transformers model if
+# installed, else off), "model", "tfidf" (opt-in, word overlap only) or "none".
+semantic_cache = create_semantic_cache(
+    embedder=os.getenv("SEMANTIC_CACHE_EMBEDDER", "auto"),
+    threshold=float(os.environ["SEMANTIC_CACHE_THRESHOLD"])
+    if os.getenv("SEMANTIC_CACHE_THRESHOLD")
+    else None,
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", str(7 * 24 * 3600))),
+    audit_rate=float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05")),
+    model_name=os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2"),
+)
+
+def cached_result(user_requirements: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Look the requirements up in the result cache, then in the semantic cache. A
+    semantic hit is returned with a "semantic_match" entry; a sample of the hits
+    is audited. Hits are not copied into the result cache, so a false hit the
+    audit evicts is not served on.
+    """
+    result = result_cache.get(user_requirements) if result_cache is not None else None
+    if result is not None or semantic_cache is None:
+        return result
+    found = semantic_cache.lookup(user_requirements)
+    if found is None:
+        return None
+    result, match = found
+    if match["audit"]:
+        audit_semantic_hit(user_requirements, result, match)
+    return dict(
+        result,
+        semantic_match={
+            "use_case": match["use_case"],
+            "similarity": match["similarity"],
+        },
+    )
+
+def audit_semantic_hit(
+    user_requirements: Dict[str, Any], served: Dict[str, Any], match: Dict[str, Any]
+) -> None:
+    """
+    Re-run requirements answered by a semantic hit in the background, when no job
+    is waiting for a worker, and record whether the served result was a false hit.
+    The fresh result replaces the served one in the caches.
+    """
+    if jobs.stats()["queued"]:
+        return
+    try:
+        job_id = jobs.submit(recommend, user_requirements)
+    except QueueFullError:
+        return
+
+    def record(future):
+        if not future.cancelled() and future.exception() is None:
+            semantic_cache.record_audit(
+                user_requirements, match, served, future.result()
+            )
+
+    jobs.future(job_id).add_done_callback(record)
+
+def create_run(user_requirements: Dict[str, Any], user_id: Optional[str],
+               cached: Optional[Dict[str, Any]] = None,
+               batch_requirements: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Record a new run in the run store; a cached result completes it right away.
+    A batch variant's batch_requirements are kept with it for resume_run.
+    """
+    if run_store is None:
+        return None
+    run_id = run_store.create(
+        user_requirements, user_id=user_id, batch_requirements=batch_requirements
+    )
+    if cached is not None:
+        run_store.complete(run_id, cached, cached=True)
+    return run_id
+
+def discard_run(run_id: Optional[str]) -> None:
+    """Forget a run that was rejected before it was queued."""
+    if run_store is not None and run_id is not None:
+        run_store.delete(run_id)
+
+def recommend(
+    user_requirements: Dict[str, Any], run_id: Optional[str] = None, **kwargs
+) -> Dict[str, Any]:
+    """
+    Run create_aws_architecture_recommendation and store its result in the result and
+    semantic caches (unless the run was degraded, so the next request gets a full run,
+    or ran with batch_requirements, whose upstream tasks saw the whole batch rather than
+    these requirements). With a run_id, the run's progress and result are also kept in
+    the run store, each task output being checkpointed as soon as the task completes.
+    """
+    if run_store is None or run_id is None:
+        result = crew_system().create_aws_architecture_recommendation(
+            user_requirements, **kwargs
+        )
+    else:
+        on_task_complete = kwargs.pop("on_task_complete", None)
+        resumed = set(kwargs.get("resume_outputs") or {})
+
+        def record_task(section, output):
+            if section not in resumed:
+                run_store.record_task(run_id, section, output)
+            if on_task_complete is not None:
+                on_task_complete(section, output)
+
+        run_store.start(run_id)
+        try:
+            result = crew_system().create_aws_architecture_recommendation(
+                user_requirements, on_task_complete=record_task, **kwargs)
+        except Exception as e:
+            run_store.fail(run_id, str(e))
+            raise
+        run_store.complete(run_id, result)
+
+    if not result.get("degraded") and kwargs.get("batch_requirements") is None:
+        if result_cache is not None:
+            result_cache.set(user_requirements, result)
+        if semantic_cache is not None:
+            semantic_cache.add(user_requirements, result)
+    return result
+
+def join_run(
+    user_requirements: Dict[str, Any],
+    user_id: Optional[str],
+    stream: bool = False,
+    **run_kwargs,
+):
+    """
+    Attach to the run in progress for these requirements, or queue a new one
+    (run_kwargs are passed on to create_aws_architecture_recommendation). With
+    thread workers the run publishes its task outputs on the flight (and, for a
+    stream, the final synthesis tokens), so streams can attach to it too. A batch
+    run (run_kwargs["batch_requirements"]) is only joined by the same variant of
+    the same batch, since its upstream tasks see the whole batch.
+
+    Returns:
+        (flight, joined); flight.run_id and flight.job_id identify the shared run
+
+    Raises:
+        QueueFullError: If a new run was needed and the queue is full
+    """
+    def start(flight):
+        flight.run_id = create_run(user_requirements, user_id,
+                                   batch_requirements=run_kwargs.get("batch_requirements"))
+        kwargs = {}
+        if jobs.worker_type == "thread":
+            kwargs["on_task_complete"] = lambda section, output: flight.publish(
+                "task", {"section": section, "output": output})
+            if stream:
+                kwargs["on_token"] = lambda token: flight.publish(
+                    "token", {"section": "final_synthesis", "token": token})
+        try:
+            flight.job_id = jobs.submit(
+                recommend,
+                user_requirements,
+                run_id=flight.run_id,
+                **kwargs,
+                **run_kwargs,
+            )
+        except QueueFullError:
+            discard_run(flight.run_id)
+            raise
+        return jobs.future(flight.job_id)
+
+    key = requirements_key(user_requirements)
+    if run_kwargs.get("batch_requirements") is not None:
+        key = f"batch:{requirements_key(run_kwargs['batch_requirements'])}:{key}"
+    return flights.join(key, start)
+
+def batch_requirements(
+    variants: List[Dict[str, Any]], varying_fields: List[str]
+) -> Dict[str, Any]:
+    """
+    Requirements of a whole batch: the values the variants agree on, and for each
+    varying field the alternatives being compared, e.g. "Budget or High-Budget
+    (alternatives compared across variants)".
+    """
+    combined = dict(variants[0])
+    for field in varying_fields:
+        alternatives = []
+        for variant in variants:
+            value = variant.get(field)
+            value = ", ".join(value) if isinstance(value, list) else str(value)
+            if value not in alternatives:
+                alternatives.append(value)
+        combined[field] = (
+            " or ".join(alternatives) + " (alternatives compared across variants)"
+        )
+    return combined
+
 class Requirements(BaseModel):
     use_case: str = Field(..., description="Description of the use case, e.g. 'e-commerce platform with 1M monthly users'")
     performance: str = Field(..., description="Performance requirements (low/medium/high)")
@@ -21,32 +349,678 @@ class Requirements(BaseModel):
 class ArchitectureResponse(BaseModel):
     success: bool = Field(True, description="Indicates if the request was successful")
     result: Dict[str, Any] = Field(..., description="Task outputs from the architecture recommendation process")
+    structured: Optional[StructuredOutputs] = Field(
+        None, description="Tagged sections of the task outputs parsed into typed fields"
+    )
+    run_id: Optional[str] = Field(
+        None,
+        description="Identifier to fetch the run again with GET /api/runs/{run_id}",
+    )
+    coalesced: bool = Field(
+        False,
+        description=(
+            "Whether the request was attached to an identical run already in progress"
+        ),
+    )
+
+class BatchRequest(BaseModel):
+    variants: List[Requirements] = Field(
+        ...,
+        description=(
+            "Requirement variants to evaluate, e.g. one use case across several cost "
+            "profiles and availability targets"
+        ),
+    )
+
+class BatchVariantResult(BaseModel):
+    variant: Dict[str, Any] = Field(
+        ..., description="Values of the fields that differ between the variants"
+    )
+    success: bool = Field(..., description="Whether the run of this variant succeeded")
+    result: Optional[Dict[str, Any]] = Field(
+        None, description="Task outputs of the variant's run"
+    )
+    structured: Optional[StructuredOutputs] = Field(
+        None, description="Tagged sections of the task outputs parsed into typed fields"
+    )
+    error: Optional[str] = Field(None, description="Error message if the run failed")
+    run_id: Optional[str] = Field(
+        None, description="Identifier of the run in the run store"
+    )
+    cached: bool = Field(
+        False, description="Whether the result was served from the result cache"
+    )
+    coalesced: bool = Field(
+        False,
+        description=(
+            "Whether the variant was attached to an identical run already in progress"
+        ),
+    )
+
+class BatchResponse(BaseModel):
+    varying_fields: List[str] = Field(
+        ..., description="Requirement fields whose values differ between the variants"
+    )
+    results: List[BatchVariantResult] = Field(
+        ..., description="One entry per variant, in request order"
+    )
+    comparison: List[Dict[str, Any]] = Field(
+        ...,
+        description=(
+            "One row per variant: its varying fields next to the run's scores, skipped "
+            "sections, timings and degraded flag"
+        ),
+    )
+    shared_tasks: int = Field(
+        0,
+        description=(
+            "Task runs saved by reusing the output of another variant with the same "
+            "task inputs"
+        ),
+    )
+    batch_requirements: Optional[Dict[str, Any]] = Field(
+        None, description="Requirements the shared upstream tasks were run with"
+    )
+
+class CostScenario(BaseModel):
+    name: Optional[str] = Field(None, description="Label of the scenario")
+    pricing_model: str = Field(
+        "on_demand",
+        description=(
+            "Pricing model of instance-based services "
+            "(on_demand/savings_plan_1yr/reserved_1yr/reserved_3yr/spot)"
+        ),
+    )
+    usage_multipliers: Dict[str, float] = Field(
+        default_factory=dict,
+        description=(
+            "Factor per pricing dimension, e.g. {'requests_millions': 3, 'hours': 2}"
+        ),
+    )
+
+class WhatIfRequest(BaseModel):
+    run_id: Optional[str] = Field(
+        None, description="Completed run whose cost estimate is recomputed"
+    )
+    cost_estimate: Optional[Dict[str, Any]] = Field(
+        None, description="The cost_estimate of a result, instead of run_id"
+    )
+    scenarios: List[CostScenario] = Field(
+        ..., description="Scenarios to price the run's services under"
+    )
+
+class WhatIfResponse(BaseModel):
+    baseline_monthly_usd: float = Field(
+        ..., description="Total of the run's on-demand estimate"
+    )
+    scenarios: List[Dict[str, Any]] = Field(
+        ...,
+        description=(
+            "Per scenario the total, the cost per service and the change from the "
+            "baseline"
+        ),
+    )
+
+class JobAccepted(BaseModel):
+    job_id: str = Field(..., description="Identifier to poll the job status with")
+    status: str = Field("queued", description="Initial status of the job")
+    run_id: Optional[str] = Field(
+        None, description="Identifier of the run in the run store"
+    )
+    coalesced: bool = Field(
+        False, description="Whether the job is an identical run already in progress"
+    )
+
+class JobStatus(BaseModel):
+    job_id: str = Field(..., description="Identifier of the job")
+    status: str = Field(
+        ..., description="Job status (queued/running/completed/failed/cancelled)"
+    )
+    result: Optional[Dict[str, Any]] = Field(
+        None, description="Task outputs once the job has completed"
+    )
+    structured: Optional[StructuredOutputs] = Field(
+        None, description="Tagged sections of the result parsed into typed fields"
+    )
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+
+class RunSummary(BaseModel):
+    run_id: str = Field(..., description="Identifier of the run")
+    user_id: Optional[str] = Field(
+        None, description="User who started the run (X-User-Id header)"
+    )
+    status: str = Field(
+        ..., description="Run status (queued/running/completed/failed/interrupted)"
+    )
+    cached: bool = Field(
+        False, description="Whether the result was served from the result cache"
+    )
+    use_case: Optional[str] = Field(None, description="Use case of the requirements")
+    error: Optional[str] = Field(None, description="Error message if the run failed")
+    trace_id: Optional[str] = Field(
+        None, description="Trace of the run, see /api/traces/{trace_id}/timeline"
+    )
+    created_at: float = Field(..., description="Submission time (Unix seconds)")
+    started_at: Optional[float] = Field(None, description="Start time (Unix seconds)")
+    finished_at: Optional[float] = Field(
+        None, description="Completion time (Unix seconds)"
+    )
+    seconds: Optional[float] = Field(None, description="Run duration in seconds")
+
+class RunRecord(RunSummary):
+    requirements: Dict[str, Any] = Field(
+        ..., description="Requirements the run was started with"
+    )
+    task_outputs: Dict[str, Optional[str]] = Field(
+        default_factory=dict, description="Outputs of the tasks finished so far"
+    )
+    task_metrics: Dict[str, Any] = Field(
+        default_factory=dict, description="Per-task timings and token counts"
+    )
+    result: Optional[Dict[str, Any]] = Field(
+        None, description="Full result once the run has completed"
+    )
+    structured: Optional[StructuredOutputs] = Field(
+        None, description="Tagged sections of the task outputs parsed into typed fields"
+    )
+
+class RunPage(BaseModel):
+    runs: List[RunSummary] = Field(..., description="Runs of the user, newest first")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor of the next page, if any"
+    )
+
+def queue_full_error(e: QueueFullError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
 
 @app.post("/api/kickoff", response_model=ArchitectureResponse)
-async def kickoff_requirements(req: Requirements):
+async def kickoff_requirements(
+    req: Requirements, x_user_id: Optional[str] = Header(None)
+):
     """
     Create an AWS architecture recommendation based on provided requirements.
+    A request identical to a run already in progress waits for that run's result.
     
     Args:
         req: The requirements for the architecture
+        x_user_id: Id of the frontend user the run is recorded under
     
     Returns:
         Complete results from the CrewAI process including architecture recommendation and all task outputs
     """
+    run_id = None
     try:
         user_requirements = req.dict()
-        result = create_aws_architecture_recommendation(user_requirements)
+        joined = False
+        result = cached_result(user_requirements)
+        if result is not None:
+            run_id = create_run(user_requirements, x_user_id, cached=result)
+        else:
+            flight, joined = join_run(user_requirements, x_user_id)
+            run_id = flight.run_id
+            result = await asyncio.wrap_future(flight.future)
         
         # Return the complete result as is - keeping all task outputs
         return {
             "success": True,
-            "result": result
+            "result": result,
+            "structured": parse_task_outputs(result["task_outputs"]),
+            "run_id": run_id,
+            "coalesced": joined
         }
+    except QueueFullError as e:
+        discard_run(run_id)
+        raise queue_full_error(e) from e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        # The completed tasks are checkpointed; POST /api/runs/{run_id}/resume continues
+        # the run
+        raise HTTPException(
+            status_code=500,
+            detail=str(e),
+            headers={"X-Run-Id": run_id} if run_id else None,
+        ) from e
+
+@app.post("/api/kickoff/batch", response_model=BatchResponse)
+async def kickoff_batch(req: BatchRequest, x_user_id: Optional[str] = Header(None)):
+    """
+    Evaluate several requirement variants at once and return their results side by side.
+
+    Every variant is its own run, and the runs are spread over the worker pool.
+    The upstream tasks in CREW_BATCH_SHARED_TASKS (requirements analysis and
+    software architecture by default) are given the requirements of the whole
+    batch (see batch_requirements), so their inputs match in every variant and
+    they run once, their output being reused by the other runs. With process
+    workers the runs do not share tasks beyond what the task memo provides.
+    
+    Args:
+        req: The requirement variants, at most CREW_MAX_BATCH_VARIANTS
+        x_user_id: Id of the frontend user the runs are recorded under
+    
+    Returns:
+        Per-variant results in request order and a comparison table of them
+    """
+    variants = [variant.dict() for variant in req.variants]
+    if not variants or len(variants) > MAX_BATCH_VARIANTS:
+        raise HTTPException(
+            status_code=422, detail=f"A batch takes 1 to {MAX_BATCH_VARIANTS} variants"
+        )
+
+    canonical = [canonical_requirements(variant) for variant in variants]
+    varying_fields = sorted(
+        field
+        for field in set().union(*canonical)
+        if len({json.dumps(c.get(field)) for c in canonical}) > 1
+    )
+
+    cached = [cached_result(variant) for variant in variants]
+    new_runs = len({
+        requirements_key(variant)
+        for variant, result in zip(variants, cached, strict=True) if result is None
+    })
+    queue = jobs.stats()
+    free = (
+        queue["max_workers"] + queue["max_queued"] - queue["running"] - queue["queued"]
+    )
+    if new_runs > free:
+        raise HTTPException(
+            status_code=429,
+            detail=f"The batch needs {new_runs} runs and the queue has room for {free}",
+            headers={"Retry-After": "30"},
+        )
+
+    shared = SharedResults() if jobs.worker_type == "thread" else None
+    combined = batch_requirements(variants, varying_fields) if varying_fields else None
+    entries, pending = [], {}
+    for index, (variant, result) in enumerate(zip(variants, cached, strict=True)):
+        entry = {
+            "variant": {field: variant.get(field) for field in varying_fields},
+            "cached": result is not None,
+        }
+        if result is not None:
+            entry.update(
+                result=result, run_id=create_run(variant, x_user_id, cached=result)
+            )
+        else:
+            try:
+                flight, entry["coalesced"] = join_run(
+                    variant, x_user_id, shared_tasks=shared, batch_requirements=combined
+                )
+                entry["run_id"] = flight.run_id
+                pending[index] = asyncio.wrap_future(flight.future)
+            except QueueFullError as e:
+                entry["error"] = str(e)
+        entries.append(entry)
+
+    outcomes = await asyncio.gather(*pending.values(), return_exceptions=True)
+    for index, outcome in zip(pending, outcomes, strict=True):
+        if isinstance(outcome, Exception):
+            entries[index]["error"] = str(outcome)
+        else:
+            entries[index]["result"] = outcome
+
+    comparison = []
+    for entry in entries:
+        entry["success"] = "result" in entry
+        result = entry.get("result") or {}
+        if entry["success"]:
+            entry["structured"] = parse_task_outputs(result["task_outputs"])
+        comparison.append({
+            **entry["variant"],
+            "success": entry["success"],
+            "seconds": result.get("run_metrics", {}).get("seconds"),
+            "degraded": result.get("degraded"),
+            "assessment_scores": result.get("assessment_scores"),
+            "skipped_sections": sorted(result.get("skipped_sections", {})),
+            "shared_tasks": result.get("run_metrics", {}).get("shared_tasks"),
+            "run_id": entry.get("run_id"),
+        })
+
+    return {
+        "varying_fields": varying_fields,
+        "results": entries,
+        "comparison": comparison,
+        "shared_tasks": shared.reused if shared is not None else 0,
+        "batch_requirements": combined,
+    }
+
+@app.post("/api/kickoff/stream")
+async def stream_kickoff(req: Requirements, x_user_id: Optional[str] = Header(None)):
+    """
+    Create an AWS architecture recommendation and stream it as server-sent events.
+
+    Emits a `run` event ({run_id}) first, so the result can be fetched again from GET
+    /api/runs/{run_id} if the connection drops, then a `task` event ({section, output})
+    as soon as each expert finishes, `token` events ({section, token}) while the final
+    synthesis is generated, then a `result` event with all task outputs or an `error`
+    event. A stream for requirements identical to a run in progress attaches to that
+    run: its `run` event has "coalesced": true and the task events so far are replayed.
+    """
+    if jobs.worker_type != "thread":
+        raise HTTPException(
+            status_code=501, detail="Streaming requires CREW_WORKER_TYPE=thread"
+        )
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    user_requirements = req.dict()
+
+    def publish(event, data):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    result = cached_result(user_requirements)
+    if result is not None:
+        publish(
+            "run",
+            {
+                "run_id": create_run(user_requirements, x_user_id, cached=result),
+                "coalesced": False,
+            },
+        )
+        for section, output in result["task_outputs"].items():
+            publish("task", {"section": section, "output": output})
+        publish("result", result)
+    else:
+        try:
+            flight, joined = join_run(user_requirements, x_user_id, stream=True)
+        except QueueFullError as e:
+            raise queue_full_error(e) from e
+        publish("run", {"run_id": flight.run_id, "coalesced": joined})
+        flight.subscribe(publish)
+
+    async def event_stream():
+        while True:
+            event, data = await events.get()
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            if event in ("result", "error"):
+                break
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/jobs", response_model=JobAccepted, status_code=202)
+async def submit_job(req: Requirements, x_user_id: Optional[str] = Header(None)):
+    """
+    Queue an AWS architecture recommendation and return immediately. Requirements
+    identical to a run in progress get that run's job instead of a new one.
+    
+    Args:
+        req: The requirements for the architecture
+        x_user_id: Id of the frontend user the run is recorded under
+    
+    Returns:
+        The job id to poll with GET /api/jobs/{job_id}, and the run id of the run store
+    """
+    user_requirements = req.dict()
+    result = cached_result(user_requirements)
+    if result is not None:
+        run_id = create_run(user_requirements, x_user_id, cached=result)
+        return {
+            "job_id": jobs.complete(result),
+            "status": "completed",
+            "run_id": run_id,
+        }
+    try:
+        flight, joined = join_run(user_requirements, x_user_id)
+    except QueueFullError as e:
+        raise queue_full_error(e) from e
+    job = jobs.status(flight.job_id)
+    return {
+        "job_id": flight.job_id,
+        "status": job["status"] if job else "queued",
+        "run_id": flight.run_id,
+        "coalesced": joined,
+    }
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Report the status of a queued recommendation and its result once completed.
+    """
+    job = jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["result"] is not None:
+        job["structured"] = parse_task_outputs(job["result"]["task_outputs"])
+    return job
+
+@app.get("/api/runs", response_model=RunPage)
+async def list_runs(
+    user_id: str, limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None
+):
+    """
+    Runs of a user, newest first, a page at a time.
+    
+    Args:
+        user_id: Id of the frontend user
+        limit: Page size
+        cursor: next_cursor of the previous page
+    """
+    if run_store is None:
+        raise HTTPException(status_code=404, detail="The run store is disabled")
+    return run_store.list(user_id, limit=limit, cursor=cursor)
+
+@app.get("/api/runs/{run_id}", response_model=RunRecord)
+async def get_run(run_id: str):
+    """
+    A stored run: its status, requirements, the task outputs finished so far and
+    the full result once completed.
+    """
+    run = run_store.get(run_id) if run_store is not None else None
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    run["structured"] = parse_task_outputs(run["task_outputs"])
+    return run
+
+@app.post("/api/runs/{run_id}/resume", response_model=JobAccepted, status_code=202)
+async def resume_run(run_id: str):
+    """
+    Resume a failed or interrupted run from its first incomplete task. The task
+    outputs checkpointed by the earlier attempt are reused, not recomputed. A
+    batch variant resumes with its batch requirements, so its result stays out
+    of the caches like that of the original run; outputs it shared with other
+    variants are in its checkpoint.
+    
+    Returns:
+        The job id to poll with GET /api/jobs/{job_id}; the run keeps its run id
+    """
+    run = run_store.get(run_id) if run_store is not None else None
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    if not run_store.requeue(run_id):
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"Run {run_id} is {run['status']}, "
+                "only failed or interrupted runs can be resumed"
+            ),
+        )
+    try:
+        job_id = jobs.submit(recommend, run["requirements"], run_id=run_id,
+                             resume_outputs=run_store.checkpoint(run_id),
+                             batch_requirements=run["batch_requirements"])
+    except QueueFullError as e:
+        run_store.fail(run_id, run["error"] or "Resume rejected, the queue is full")
+        raise queue_full_error(e) from e
+    return {"job_id": job_id, "status": "queued", "run_id": run_id}
+
+@app.post("/api/cost/what-if", response_model=WhatIfResponse)
+async def cost_what_if(req: WhatIfRequest):
+    """
+    Recompute the cost estimate of a run under other usage or pricing models,
+    from the per-service unit prices and usage in its cost_estimate. Nothing is
+    re-run, so this takes milliseconds.
+
+    Args:
+        req: The run (or its cost_estimate) and up to MAX_WHAT_IF_SCENARIOS scenarios
+
+    Returns:
+        The baseline total and the scenarios priced
+    """
+    if not req.scenarios or len(req.scenarios) > MAX_WHAT_IF_SCENARIOS:
+        raise HTTPException(
+            status_code=422, detail=f"Give 1 to {MAX_WHAT_IF_SCENARIOS} scenarios"
+        )
+    estimate = req.cost_estimate
+    if estimate is None and not req.run_id:
+        raise HTTPException(status_code=422, detail="Give a run_id or a cost_estimate")
+    if estimate is None:
+        run = (
+            run_store.get(req.run_id) if run_store is not None and req.run_id else None
+        )
+        if run is None:
+            raise HTTPException(status_code=404, detail=f"Run {req.run_id} not found")
+        estimate = (run["result"] or {}).get("cost_estimate")
+        if estimate is None:
+            raise HTTPException(
+                status_code=409, detail=f"Run {req.run_id} has no cost estimate"
+            )
+    try:
+        scenarios = what_if(estimate, [scenario.dict() for scenario in req.scenarios])
+    except (KeyError, ValueError) as e:
+        raise HTTPException(
+            status_code=422, detail=f"Invalid cost estimate or scenario: {e}"
+        ) from e
+    return {
+        "baseline_monthly_usd": estimate["total_monthly_usd"],
+        "scenarios": scenarios,
+    }
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss metrics of the result cache, the semantic cache, the per-task memo and the
+    search layer, and how many requests were attached to an identical run in progress.
+    The task memo and search layer are reported as not loaded until warm-up has imported
+    them.
+    """
+    crew = loaded_crew_system()
+    if crew is None:
+        tasks = search = {"loaded": False}
+    else:
+        tasks = (
+            {"enabled": False}
+            if crew.task_memo is None
+            else {"enabled": True, **crew.task_memo.stats()}
+        )
+        search = crew.search_tool.stats()
+    return {
+        "in_flight": flights.stats(),
+        "results": (
+            {"enabled": False}
+            if result_cache is None
+            else {"enabled": True, **result_cache.stats()}
+        ),
+        "semantic": (
+            {"enabled": False}
+            if semantic_cache is None
+            else {"enabled": True, **semantic_cache.stats()}
+        ),
+        "tasks": tasks,
+        "search": search,
+    }
+
+@app.get("/api/cache/semantic/audits")
+async def semantic_cache_audits():
+    """
+    The latest audits of semantic cache hits: the requested and matched use cases,
+    their similarity and whether the fresh run showed the hit to be false.
+    """
+    if semantic_cache is None:
+        raise HTTPException(status_code=404, detail="The semantic cache is disabled")
+    return {"audits": list(semantic_cache.audits), **semantic_cache.stats()}
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """
+    Per-host load of the Ollama pool: warm-up state, in-flight and completed calls
+    and circuit breaker state.
+    """
+    crew = loaded_crew_system()
+    if crew is None:
+        raise HTTPException(
+            status_code=503, detail=f"Warm-up is {warm_up_state['status']}"
+        )
+    return crew.ollama_pool.stats()
+
+@app.get("/api/ready")
+async def readiness():
+    """
+    Readiness probe: 200 once warm-up has imported the crew system and loaded the
+    models, 503 until then (or if warm-up failed). The body is the warm-up state.
+    """
+    return JSONResponse(
+        warm_up_state, status_code=200 if warm_up_state["status"] == "ready" else 503
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Prometheus metrics: span durations per run/task/LLM call/tool call, token counts,
+    tool cache outcomes, task retries and memo hits, LLM pool waits, LLM and search
+    retries, circuit breaker states and job queue depth.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/traces/{trace_id}/timeline")
+async def run_timeline(trace_id: str):
+    """
+    The spans of a run (the trace_id of its result) in start order, with offsets
+    from the start of the run. Only runs executed by this process are available.
+    """
+    timeline = tracer.timeline(trace_id)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return {"trace_id": trace_id, "spans": timeline}
+
+@app.get("/api/traces/{trace_id}")
+async def run_trace(trace_id: str):
+    """
+    The spans of a run in the OTLP/JSON trace format, for OpenTelemetry tooling.
+    """
+    trace = tracer.otlp(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace
+
+def renew_run_leases():
+    """
+    Keep this process's unfinished runs leased, and interrupt those of processes that
+    are gone.
+    """
+    while True:
+        try:
+            run_store.heartbeat()
+            run_store.interrupt_unfinished(RUN_STORE_LEASE)
+        except Exception as e:
+            log.warning(
+                "run store lease renewal failed", extra={"fields": {"error": str(e)}}
+            )
+        time.sleep(RUN_STORE_LEASE / 4)
+
+@app.on_event("startup")
+def interrupt_unfinished_runs():
+    # Runs whose process is gone; they can be resumed from their checkpoint. Runs
+    # of other live processes sharing the run store keep their lease.
+    if run_store is not None:
+        threading.Thread(
+            target=renew_run_leases, name="run-store-lease", daemon=True
+        ).start()
+
+@app.on_event("startup")
+def start_warm_up():
+    # Runs in the background so the API accepts connections while the crew system loads
+    threading.Thread(target=warm_up, name="crew-warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    jobs.shutdown()
 
 # Add CORS middleware for frontend access
 from fastapi.middleware.cors import CORSMiddleware
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # Update as needed
@@ -0,0 +1,138 @@
+"""
+Benchmarks cold-start time of the backend: how long `import app` takes before
+uvicorn can accept connections, and how long the background warm-up then takes
+to import and build the crew pipeline.
+
+Every run is a fresh interpreter, as in a newly started container. The slowest
+modules by cumulative import time (python -X importtime) are listed for the
+last run. Results can be saved as a baseline and later runs compared against it.
+
+Usage (from backend/):
+    python benchmarks/import_bench.py [--runs 5] [--top 15]
+        [--save-baseline benchmarks/import_baseline.json] [--baseline
+        benchmarks/import_baseline.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Runs in the child interpreter; prints the timings as JSON on stdout
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.warm_up()
+warmed = time.perf_counter()
+print(json.dumps({
+    "import_app_seconds": imported - started,
+    "warm_up_seconds": warmed - imported,
+    "ready_seconds": warmed - started,
+    "warm_up_status": app.warm_up_state["status"],
+}))
+"""
+
+BASELINE_METRICS = ["import_app_seconds", "warm_up_seconds", "ready_seconds"]
+
+
+def probe_environment():
+    """
+    No model loading and no cache or run store files, so only import and construction
+    are timed.
+    """
+    env = dict(os.environ)
+    env.update({
+        "OLLAMA_WARM_UP": "false",
+        "RUN_STORE_BACKEND": "none",
+        "RESULT_CACHE_BACKEND": "none",
+        "TASK_MEMO_BACKEND": "none",
+        "SEARCH_CACHE_BACKEND": "none",
+        "CREW_PRODUCTION_MODE": "true",
+    })
+    env.setdefault("SERPER_API_KEY", "offline-benchmark")
+    return env
+
+
+def run_probe(importtime=False):
+    command = (
+        [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    )
+    completed = subprocess.run(command, cwd=BACKEND_DIR, env=probe_environment(),
+                               capture_output=True, text=True, check=True)
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return timings, completed.stderr
+
+
+def slowest_imports(importtime_output, top):
+    """
+    (cumulative seconds, module) of the slowest imports in -X importtime output,
+    counting only imports made by the probe or by the modules it imports directly
+    (-X importtime indents the module name two spaces per nesting level).
+    """
+    modules = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            modules.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def compare(results, baseline):
+    print("\nvs baseline:")
+    for name in BASELINE_METRICS:
+        before, after = baseline.get(name), results.get(name)
+        if before:
+            print(
+                f"  {name:<22}{before:>10.3f} -> {after:>10.3f} "
+                f"({(after - before) / abs(before):+.1%})"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Fresh interpreters to time"
+    )
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    args = parser.parse_args()
+
+    runs = [run_probe()[0] for _ in range(args.runs)]
+    _, importtime_output = run_probe(importtime=True)
+
+    print(f"cold start over {args.runs} fresh interpreter(s)")
+    print(f"{'':<22}{'median s':>10}{'min s':>10}{'max s':>10}")
+    results = {}
+    for name in BASELINE_METRICS:
+        values = [run[name] for run in runs]
+        results[name] = statistics.median(values)
+        print(f"{name:<22}{results[name]:>10.3f}{min(values):>10.3f}{max(values):>10.3f}")
+    results["warm_up_status"] = runs[-1]["warm_up_status"]
+    if results["warm_up_status"] != "ready":
+        print(f"warning: warm-up ended {results['warm_up_status']}")
+
+    print("\nslowest imports (cumulative):")
+    for seconds, module in slowest_imports(importtime_output, args.top):
+        print(f"  {seconds:>8.3f}s  {module}")
+
+    results["config"] = {"runs": args.runs, "python": sys.version.split()[0]}
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Benchmarks the crew pipeline offline against a stub Ollama server and a stub search
+tool.
+
+Reports per-task wall time and orchestration overhead (measured time minus the
+time the stubbed LLM and search calls account for), memory per run, and
+throughput/latency of /api/kickoff under N concurrent clients. Results can be
+saved as a baseline and later runs compared against it.
+
+Usage (from backend/):
+    python benchmarks/pipeline_bench.py [--runs 3] [--llm-latency 0.05]
+    [--search-latency 0.2]
+        [--concurrency 1,4,8] [--identical] [--save-baseline benchmarks/baseline.json]
+        [--baseline benchmarks/baseline.json]
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import resource
+import socket
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stubs import StubOllamaServer, StubSearchTool  # noqa: E402
+
+BENCH_REQUIREMENTS = {
+    "use_case": "multi-agent chatbot system for software architecting",
+    "performance": "Standard",
+    "availability": "Fault tolerant",
+    "security_tier": "Basic",
+    "compliance": ["Standard"],
+    "cost_profile": "High-Budget",
+    "implementation_time": "Long (months)",
+    "required_expertise": "Intermediate",
+    "scalability": "High",
+    "ease_of_implementation": "Moderate",
+    "integration_complexity": "Moderate",
+}
+
+# Compared against a baseline, lower is better for all of them except throughput
+BASELINE_METRICS = ["run_seconds", "overhead_seconds", "peak_memory_mb"]
+
+
+def configure_environment(args, llm_url):
+    """
+    Point the pipeline at the stubs. Must run before experts_crew_system is imported.
+    """
+    os.environ["OLLAMA_HOSTS"] = llm_url
+    os.environ["OLLAMA_WARM_UP"] = "false"
+    os.environ.setdefault("SERPER_API_KEY", "offline-benchmark")
+    os.environ["CREW_EXECUTION_MODE"] = args.mode
+    # The semantic cache would answer the similar benchmark requirements without
+    # running the pipeline, and the run store adds its writes to every task
+    os.environ["RUN_STORE_BACKEND"] = "none"
+    os.environ["SEMANTIC_CACHE_EMBEDDER"] = "none"
+    if not args.with_caches:
+        for name in (
+            "RESULT_CACHE_BACKEND",
+            "TASK_MEMO_BACKEND",
+            "SEARCH_CACHE_BACKEND",
+        ):
+            os.environ[name] = "none"
+
+
+def ideal_seconds(tasks, args):
+    """
+    Time each task would take if the only cost were the stubbed LLM and search
+    calls, and the critical path through the task graph under the same assumption.
+    """
+    per_task = {}
+    for name, task in tasks.items():
+        searches = args.search_calls if (task.tools or task.agent.tools) else 0
+        per_task[name] = (
+            searches + 1
+        ) * args.llm_latency + searches * args.search_latency
+
+    if args.mode == "sequential":
+        return per_task, sum(per_task.values())
+
+    section_names = {id(task): name for name, task in tasks.items()}
+    finished = {}
+    for name, task in tasks.items():
+        start = max(
+            (
+                finished[section_names[id(context_task)]]
+                for context_task in (task.context or [])
+            ),
+            default=0.0,
+        )
+        finished[name] = start + per_task[name]
+    return per_task, max(finished.values())
+
+
+def bench_runs(experts_crew_system, args):
+    per_task_ideal, critical_path = ideal_seconds(
+        experts_crew_system.build_pipeline(), args
+    )
+    runs = []
+    for _ in range(args.runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = experts_crew_system.create_aws_architecture_recommendation(
+                dict(BENCH_REQUIREMENTS)
+            )
+            runs.append((time.perf_counter() - started, result))
+
+    run_seconds = statistics.median(seconds for seconds, _ in runs)
+    print(
+        f"\n{args.runs} run(s), {args.mode} mode: median {run_seconds:.3f}s, "
+        f"stub critical path {critical_path:.3f}s, "
+        f"overhead {run_seconds - critical_path:.3f}s"
+    )
+    print(f"{'task':<26}{'seconds':>9}{'stubbed':>9}{'overhead':>10}{'model':>28}")
+    per_task = {}
+    for name, ideal in per_task_ideal.items():
+        timings = [
+            result["task_metrics"][name]["seconds"]
+            for _, result in runs
+            if name in result["task_metrics"]
+        ]
+        if not timings:
+            print(f"{name:<26}{'skipped':>9}")
+            continue
+        seconds = statistics.median(timings)
+        model = runs[-1][1]["task_metrics"][name].get("model", "")
+        per_task[name] = {"seconds": seconds, "overhead_seconds": seconds - ideal}
+        print(
+            f"{name:<26}{seconds:>9.3f}{ideal:>9.3f}{seconds - ideal:>10.3f}{model:>28}"
+        )
+
+    return {
+        "run_seconds": run_seconds,
+        "overhead_seconds": run_seconds - critical_path,
+        "critical_path_seconds": critical_path,
+        "tasks": per_task,
+    }
+
+
+def bench_memory(experts_crew_system):
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        experts_crew_system.create_aws_architecture_recommendation(dict(BENCH_REQUIREMENTS))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"\nmemory: {peak / 2**20:.1f} MB peak allocated during one run, {max_rss:.0f} "
+        "MB max RSS"
+    )
+    return {"peak_memory_mb": peak / 2**20, "max_rss_mb": max_rss}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _kickoff(port, requirements):
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=3600)
+    try:
+        connection.request("POST", "/api/kickoff", body=json.dumps(requirements),
+                           headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def bench_throughput(args):
+    import uvicorn
+
+    from app import app
+
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, name="bench-api", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(f"\n/api/kickoff, {args.requests_per_client} request(s) per client"
+          f"{', identical requirements' if args.identical else ''}")
+    print(f"{'clients':>8}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}{'errors':>8}{'429s':>7}")
+    levels = {}
+    try:
+        for clients in args.concurrency:
+            requests = [
+                dict(BENCH_REQUIREMENTS)
+                if args.identical
+                else dict(
+                    BENCH_REQUIREMENTS,
+                    use_case=f"{BENCH_REQUIREMENTS['use_case']} #{clients}-{i}",
+                )
+                for i in range(clients * args.requests_per_client)
+            ]
+            started = time.perf_counter()
+            with (
+                contextlib.redirect_stdout(io.StringIO()),
+                ThreadPoolExecutor(max_workers=clients) as pool,
+            ):
+                responses = list(
+                    pool.map(
+                        lambda requirements: _kickoff(port, requirements), requests
+                    )
+                )
+            elapsed = time.perf_counter() - started
+
+            latencies = sorted(
+                seconds for status, seconds in responses if status == 200
+            )
+            rejected = sum(1 for status, _ in responses if status == 429)
+            errors = len(responses) - len(latencies) - rejected
+            p50 = statistics.median(latencies) if latencies else float("nan")
+            p95 = (
+                latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+                if latencies
+                else float("nan")
+            )
+            throughput = len(latencies) / elapsed
+            levels[str(clients)] = {
+                "throughput_rps": throughput,
+                "p50_seconds": p50,
+                "p95_seconds": p95,
+                "errors": errors,
+                "rejected": rejected,
+            }
+            print(
+                f"{clients:>8}{throughput:>9.3f}{p50:>9.3f}{p95:>9.3f}"
+                f"{errors:>8}{rejected:>7}"
+            )
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    return levels
+
+
+def compare(results, baseline):
+    print("\nvs baseline:")
+    for name in BASELINE_METRICS:
+        before, after = baseline.get(name), results.get(name)
+        if before:
+            print(
+                f"  {name:<22}{before:>10.3f} -> {after:>10.3f} "
+                f"({(after - before) / abs(before):+.1%})"
+            )
+    for clients, level in results.get("throughput", {}).items():
+        before = baseline.get("throughput", {}).get(clients, {}).get("throughput_rps")
+        if before:
+            after = level["throughput_rps"]
+            print(
+                f"  throughput @{clients:<11}{before:>10.3f} -> {after:>10.3f} "
+                f"({(after - before) / abs(before):+.1%})"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--runs", type=int, default=3, help="Direct pipeline runs for per-task timings"
+    )
+    parser.add_argument("--mode", choices=["dag", "sequential"], default="dag")
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.05, help="Seconds per stub LLM call"
+    )
+    parser.add_argument(
+        "--search-latency", type=float, default=0.2, help="Seconds per stub search"
+    )
+    parser.add_argument(
+        "--search-calls", type=int, default=1, help="Searches per agent with tools"
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,8",
+        help="Comma-separated client counts, empty to skip",
+    )
+    parser.add_argument("--requests-per-client", type=int, default=1)
+    parser.add_argument(
+        "--identical",
+        action="store_true",
+        help="Send the same requirements from every client",
+    )
+    parser.add_argument(
+        "--with-caches",
+        action="store_true",
+        help="Keep the result, task and search caches on",
+    )
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    args = parser.parse_args()
+    args.concurrency = [
+        int(level) for level in args.concurrency.split(",") if level.strip()
+    ]
+
+    llm_server = StubOllamaServer(
+        latency=args.llm_latency, search_calls=args.search_calls
+    ).start()
+    configure_environment(args, llm_server.url)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import experts_crew_system
+    experts_crew_system.search_tool.layer.search_tool = StubSearchTool(
+        latency=args.search_latency
+    )
+
+    try:
+        results = bench_runs(experts_crew_system, args)
+        results.update(bench_memory(experts_crew_system))
+        if args.concurrency:
+            results["throughput"] = bench_throughput(args)
+    finally:
+        llm_server.stop()
+    print(
+        f"\nstub LLM: {llm_server.requests} calls, {llm_server.busy_seconds:.1f}s busy"
+    )
+
+    results["config"] = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("save_baseline", "baseline")
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmarks pricing_engine: pricing a service selection from the price table and
+recomputing the estimate for many what-if scenarios.
+
+Usage (from backend/):
+    python benchmarks/pricing_bench.py [--scenarios 1000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pricing_engine import estimate_from_output, load_price_table, what_if  # noqa: E402
+
+PRICE_TABLE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "aws_prices.json"
+)
+
+AWS_SERVICES = """<aws_services>
+# Compute Services
+- Service: Amazon ECS on AWS Fargate
+- Configuration: 1 vCPU tasks, minimum 4 tasks
+- Service: AWS Lambda
+- Configuration: 512 MB
+# Database Services
+- Service: Amazon Aurora PostgreSQL
+- Configuration: db.r6g.large, Multi-AZ
+- Service: Amazon ElastiCache for Redis
+- Configuration: cache.m6g.large, 2 nodes
+# Storage Services
+- Service: Amazon S3
+- Configuration: Standard with lifecycle to Glacier
+# Networking Services
+- Service: Amazon CloudFront + Application Load Balancer + AWS WAF
+- Configuration: Managed rule groups
+# Integration Services
+- Service: Amazon SQS, Amazon EventBridge
+- Configuration: Standard queues with DLQ
+</aws_services>"""
+
+REQUIREMENTS = {
+    "use_case": "E-commerce platform with 1M monthly users",
+    "scalability": "high",
+    "availability": "99.99%",
+}
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        type=int,
+        default=1000,
+        help="What-if scenarios per recomputation",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    table = load_price_table(PRICE_TABLE)
+    estimate = estimate_from_output(table, AWS_SERVICES, REQUIREMENTS)
+    print(
+        f"{len(estimate['lines'])} services priced, "
+        f"${estimate['total_monthly_usd']:,.2f}/month on demand"
+    )
+
+    elapsed = best_of(
+        args.repeat, lambda: estimate_from_output(table, AWS_SERVICES, REQUIREMENTS)
+    )
+    print(f"estimate_from_output: {elapsed * 1e3:.2f} ms")
+
+    models = list(table.pricing_models)
+    scenarios = [
+        {
+            "pricing_model": models[i % len(models)],
+            "usage_multipliers": {"requests_millions": 1 + i / 100},
+        }
+        for i in range(args.scenarios)
+    ]
+    elapsed = best_of(args.repeat, lambda: what_if(estimate, scenarios))
+    print(
+        f"what_if x{args.scenarios}: {elapsed * 1e3:.2f} ms "
+        f"({elapsed / args.scenarios * 1e6:.1f} us per scenario)"
+    )
+
+
+if __name__ == "__main__":
+    main()
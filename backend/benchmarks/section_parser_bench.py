@@ -0,0 +1,113 @@
+"""
+Benchmarks section_parser on large synthetic task outputs.
+
+Usage (from backend/):
+    python benchmarks/section_parser_bench.py [--services 2000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from section_parser import SectionParser, parse_task_outputs  # noqa: E402
+
+CATEGORIES = ["Compute", "Database", "Storage", "Networking", "Integration"]
+PILLARS = [
+    "Operational Excellence",
+    "Security",
+    "Reliability",
+    "Performance Efficiency",
+    "Cost Optimization",
+]
+
+
+def synthetic_outputs(services):
+    aws_services = ["Thought: I now know the final answer\n<aws_services>"]
+    costs = [
+        "<cost_optimization>\n# Pricing Models\n"
+        "- Compute: Savings Plans for steady load\n\n# Monthly Cost Estimate"
+    ]
+    for i in range(services):
+        aws_services.append(
+            f"# {CATEGORIES[i % len(CATEGORIES)]} Services\n"
+            f"- Service: Amazon Service {i}\n"
+            f"- Configuration: m7g.large x {i % 8 + 1}, gp3 100GB\n"
+            f"- Purpose: Handles workload {i}\n"
+            f"- Alternatives Rejected: Service {i + 1}, higher cost\n"
+        )
+        costs.append(
+            f"- Service {i}: ${(i % 90) * 10 + 25:,} - "
+            f"${(i % 90) * 12 + 40:,} per month"
+        )
+    aws_services.append("</aws_services>")
+    costs.append("</cost_optimization>")
+
+    validation = ["<architecture_validation>"]
+    for pillar in PILLARS * max(1, services // 50):
+        validation.append(
+            f"# {pillar}\n- Score: 4\n- Strengths: Multi-AZ; managed services\n"
+            f"- Gaps: No DLQ\n- Recommendations: Add SQS DLQ; enable KMS\n"
+        )
+    validation.append("</architecture_validation>")
+
+    return {
+        "requirements_analysis": (
+            '<assessment_scores>{"data_complexity": 3, "security_requirements": 4}'
+            "</assessment_scores>"
+        ),
+        "aws_service_selection": "\n".join(aws_services),
+        "cost_optimization": "\n".join(costs),
+        "architecture_validation": "\n".join(validation),
+    }
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--services", type=int, default=2000, help="Services per synthetic output"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    outputs = synthetic_outputs(args.services)
+    size = sum(len(text) for text in outputs.values())
+    structured = parse_task_outputs(outputs)
+    print(
+        f"input: {size / 1e6:.2f} MB, "
+        f"{len(structured.aws_services.services)} services, "
+        f"{len(structured.cost_optimization.estimates)} cost lines, "
+        f"{len(structured.architecture_validation.pillars)} pillars"
+    )
+
+    elapsed = best_of(args.repeat, lambda: parse_task_outputs(outputs))
+    print(
+        f"parse_task_outputs: {elapsed * 1e3:.1f} ms ({size / elapsed / 1e6:.1f} MB/s)"
+    )
+
+    text = outputs["aws_service_selection"]
+    chunks = [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def stream():
+        section_parser = SectionParser(["aws_services"])
+        for chunk in chunks:
+            section_parser.feed(chunk)
+        section_parser.close()
+
+    elapsed = best_of(args.repeat, stream)
+    print(f"SectionParser.feed, {len(chunks)} 4-char chunks: {elapsed * 1e3:.1f} ms "
+          f"({elapsed / len(chunks) * 1e6:.2f} us/chunk)")
+
+
+if __name__ == "__main__":
+    main()
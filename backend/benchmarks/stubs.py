@@ -0,0 +1,257 @@
+"""
+Offline stand-ins for Ollama and Serper used by pipeline_bench.py.
+
+StubOllamaServer answers the Ollama HTTP API (/api/generate, /api/chat, /api/show)
+with a canned, correctly tagged output for whichever task the prompt is for,
+after a fixed latency. Agents that have tools first get search_calls tool calls
+before their final answer, so the search path is exercised too.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_OUTPUTS = {
+    "assessment_scores": (
+        "# Technical Needs\n- Compute: Containerized API tier with autoscaling\n"
+        "- Data: Relational store plus object storage for documents\n"
+        "<assessment_scores>\n" + json.dumps({
+            "software_architecture_complexity": 4, "security_requirements": 4,
+            "cost_optimization_needs": 3, "data_complexity": 3, "devops_complexity": 3,
+            "performance_requirements": 3, "availability_requirements": 4,
+            "integration_complexity": 3,
+        }) + "\n</assessment_scores>"
+    ),
+    "software_architecture": (
+        "<software_architecture>\n# Architecture Pattern\n"
+        "- Pattern: Modular microservices\n"
+        "- Rationale: Independent scaling of the agent workers\n# Components\n"
+        "- API Gateway: Request routing and throttling\n"
+        "- Orchestrator: Runs the agent pipeline\n"
+        "</software_architecture>"
+    ),
+    "aws_services": (
+        "<aws_services>\n# Compute Services\n- Service: Amazon ECS on Fargate\n"
+        "- Configuration: 2 vCPU / 4 GB tasks, 2-10 tasks\n"
+        "- Purpose: Runs the API and orchestrator\n"
+        "- Alternatives Rejected: EC2, more operational overhead\n# Database Services\n"
+        "- Service: Amazon Aurora PostgreSQL\n- Configuration: db.r6g.large, Multi-AZ\n"
+        "- Purpose: Conversation and run storage\n</aws_services>"
+    ),
+    "security_architecture": (
+        "<security_architecture>\n# Identity\n- IAM: Task roles with least privilege\n"
+        "# Data Protection\n- Encryption: KMS keys for Aurora and S3\n"
+        "</security_architecture>"
+    ),
+    "cost_optimization": (
+        "<cost_optimization>\n# Pricing Models\n"
+        "- Compute: Savings Plans for the baseline tasks\n"
+        "# Monthly Cost Estimate\n- Amazon ECS on Fargate: $300 - $450 per month\n"
+        "- Amazon Aurora PostgreSQL: $420/month\n- Total: $720 - $870 per month\n"
+        "</cost_optimization>"
+    ),
+    "data_architecture": (
+        "<data_architecture>\n# Data Flow\n- Ingestion: API Gateway to SQS to workers\n"
+        "# Storage\n- Hot: Aurora\n- Archive: S3 Glacier after 90 days\n"
+        "</data_architecture>"
+    ),
+    "devops_implementation": (
+        "<devops_implementation>\n# CI/CD\n"
+        "- Pipeline: CodePipeline with blue/green ECS deploys\n"
+        "# Observability\n- Metrics: CloudWatch dashboards and alarms\n"
+        "</devops_implementation>"
+    ),
+    "integration_architecture": (
+        "<integration_architecture>\n# Patterns\n- Async: SQS queues between services\n"
+        "- Events: EventBridge for run lifecycle events\n</integration_architecture>"
+    ),
+    "architecture_validation": (
+        "<architecture_validation>\n# Reliability\n- Score: 4\n"
+        "- Strengths: Multi-AZ; managed services\n"
+        "- Gaps: No DLQ\n- Recommendations: Add SQS DLQ\n# Security\n- Score: 4\n"
+        "- Strengths: KMS everywhere\n- Gaps: No WAF\n- Recommendations: Add AWS WAF\n"
+        "</architecture_validation>"
+    ),
+    None: (
+        "# Final Architecture\n"
+        "Amazon ECS on Fargate behind API Gateway, Aurora PostgreSQL for state, "
+        "SQS between services and S3 for documents. "
+        "Estimated cost $720 - $870 per month."
+    ),
+}
+
+SEARCH_TOOL_NAME = "Search the internet with Serper"
+
+_OUTPUT_TAG = re.compile(r"enclosed in <([a-z_]+)> tags")
+_CONTEXT_MARKER = "This is the context you're working with"
+# Marks the stub's own tool calls; their count in the transcript is the number of
+# searches made
+_SEARCH_THOUGHT = "I should look up current guidance first."
+
+
+def canned_response(prompt, search_calls=1):
+    """
+    The next agent turn for prompt: a search tool call while the agent has tools
+    and has made fewer than search_calls searches, otherwise the final answer for the
+    task whose output tag the prompt asks for.
+    """
+    task_part = prompt.split(_CONTEXT_MARKER, 1)[0]
+    match = _OUTPUT_TAG.search(task_part)
+    tag = match.group(1) if match and match.group(1) in CANNED_OUTPUTS else None
+
+    if "Action Input:" in prompt and prompt.count(_SEARCH_THOUGHT) < search_calls:
+        query = f"aws best practices {tag or 'architecture'}"
+        return (
+            f"Thought: {_SEARCH_THOUGHT}\n"
+            f"Action: {SEARCH_TOOL_NAME}\n"
+            f"Action Input: {json.dumps({'search_query': query})}"
+        )
+    return f"Thought: I now know the final answer\nFinal Answer: {CANNED_OUTPUTS[tag]}"
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, chunks):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            line = (json.dumps(chunk) + "\n").encode()
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": []})
+        else:
+            self._send_json({"status": "ok"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/show":
+            self._send_json({"template": "", "details": {}, "model_info": {}})
+            return
+        if self.path not in ("/api/generate", "/api/chat"):
+            self._send_json({"error": f"unknown path {self.path}"}, status=404)
+            return
+
+        server = self.server
+        chat = self.path == "/api/chat"
+        if chat:
+            prompt = "\n".join(
+                str(message.get("content", ""))
+                for message in request.get("messages", [])
+            )
+        else:
+            prompt = request.get("prompt", "")
+
+        started = time.perf_counter()
+        text = canned_response(prompt, server.search_calls) if prompt else ""
+        time.sleep(server.latency)
+        server.record(time.perf_counter() - started)
+
+        base = {"model": request.get("model"), "created_at": "1970-01-01T00:00:00Z"}
+        usage = {"prompt_eval_count": len(prompt) // 4, "eval_count": len(text) // 4}
+
+        def message(content):
+            return (
+                {"message": {"role": "assistant", "content": content}}
+                if chat
+                else {"response": content}
+            )
+
+        if request.get("stream"):
+            pieces = [text[i:i + 16] for i in range(0, len(text), 16)]
+            self._send_stream(
+                [{**base, **message(piece), "done": False} for piece in pieces]
+                + [
+                    {
+                        **base,
+                        **message(""),
+                        "done": True,
+                        "done_reason": "stop",
+                        **usage,
+                    }
+                ]
+            )
+        else:
+            self._send_json(
+                {**base, **message(text), "done": True, "done_reason": "stop", **usage}
+            )
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.05, search_calls=1, host="127.0.0.1", port=0):
+        super().__init__((host, port), _OllamaHandler)
+        self.latency = latency
+        self.search_calls = search_calls
+        self.requests = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self.busy_seconds += seconds
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="stub-ollama", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubSearchTool:
+    """
+    Drop-in for SerperDevTool behind the SearchLayer: fixed latency, canned results.
+    """
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = 0
+
+    def run(self, search_query, **_kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {
+            "searchParameters": {"q": search_query, "type": "search"},
+            "organic": [
+                {
+                    "title": f"Result {i} for {search_query}",
+                    "link": f"https://example.com/{i}",
+                    "snippet": (
+                        "AWS Well-Architected guidance for managed, multi-AZ services."
+                    ),
+                    "position": i,
+                }
+                for i in range(1, 4)
+            ],
+        }
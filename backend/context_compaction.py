@@ -0,0 +1,156 @@
+import re
+
+from section_parser import (
+    SECTION_TAGS,
+    extract_assessment_scores,
+    extract_sections,
+    parse_bullets,
+    parse_task_outputs,
+)
+
+COMPACTION_MODES = ("full", "section", "summary", "digest")
+
+# Rough size of a token for llama-style tokenizers on English/markdown text
+CHARS_PER_TOKEN = 4
+
+_REASONING_LINE = re.compile(
+    r"^\s*(Thought|Action|Action Input|Observation)\s*:", re.IGNORECASE
+)
+
+
+def count_tokens(text):
+    """Approximate token count of text, used for per-task prompt accounting."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def _section_body(section, raw):
+    """
+    Body of the section's tagged block, or the raw output without agent reasoning lines.
+    """
+    tag = SECTION_TAGS.get(section)
+    if tag and tag != "assessment_scores":
+        body = extract_sections(raw, [tag]).get(tag)
+        if body is not None:
+            return f"<{tag}>\n{body.strip()}\n</{tag}>"
+    return "\n".join(
+        line for line in raw.splitlines() if not _REASONING_LINE.match(line)
+    ).strip()
+
+
+def summarize(section, raw, items_per_heading=4, max_value_chars=160):
+    """
+    Extractive summary: every heading of the section with its first few bullets,
+    each bullet cut to max_value_chars. Plain paragraphs keep their first sentence.
+    """
+    body = _section_body(section, raw)
+    headings = parse_bullets(body)
+    if not headings:
+        sentences = [
+            paragraph.split(". ")[0].strip()
+            for paragraph in body.split("\n\n")
+            if paragraph.strip()
+        ]
+        return "\n".join(sentence[:max_value_chars] for sentence in sentences)
+
+    lines = []
+    for heading, items in headings.items():
+        if heading:
+            lines.append(f"# {heading}")
+        for item in items[:items_per_heading]:
+            value = item.value.replace("\n", " ")
+            if len(value) > max_value_chars:
+                value = value[:max_value_chars].rsplit(" ", 1)[0] + " ..."
+            lines.append(f"- {item.key}: {value}" if item.key else f"- {value}")
+    return "\n".join(lines)
+
+
+def digest(section, raw):
+    """
+    Structured digest built from the typed models of section_parser, one fact per line.
+    """
+    if section == "requirements_analysis":
+        scores = extract_assessment_scores(raw)
+        score_lines = [f"- {name}: {score:g}/5" for name, score in scores.items()]
+        return "\n".join(
+            ["# Requirements analysis", summarize(section, raw, items_per_heading=2)]
+            + (["# Assessment scores"] + score_lines if score_lines else [])
+        )
+
+    structured = parse_task_outputs({section: raw})
+    if (
+        section == "aws_service_selection"
+        and structured.aws_services
+        and structured.aws_services.services
+    ):
+        return "\n".join(
+            f"- {service.service} ({service.category}): "
+            f"{service.configuration or 'n/a'}"
+            for service in structured.aws_services.services
+        )
+    if (
+        section == "cost_optimization"
+        and structured.cost_optimization
+        and structured.cost_optimization.estimates
+    ):
+        cost = structured.cost_optimization
+        lines = [
+            f"- {line.item}: "
+            + (
+                f"${line.monthly_usd:,.0f}/month"
+                if line.monthly_usd is not None
+                else line.text
+            )
+            for line in cost.estimates
+        ]
+        if cost.total_monthly_usd is not None:
+            lines.append(f"- Total: ${cost.total_monthly_usd:,.0f}/month")
+        return "\n".join(["# Monthly cost estimate"] + lines)
+    if (
+        section == "architecture_validation"
+        and structured.architecture_validation
+        and structured.architecture_validation.pillars
+    ):
+        return "\n".join(
+            (
+                f"- {pillar.pillar}: score {pillar.score:g}/5"
+                if pillar.score is not None
+                else f"- {pillar.pillar}"
+            )
+            for pillar in structured.architecture_validation.pillars
+        )
+    return summarize(section, raw, items_per_heading=3, max_value_chars=100)
+
+
+def compact_output(section, raw, mode):
+    """
+    Compact one upstream output before it is passed as context to another task.
+
+    Modes: "full" passes it unchanged, "section" keeps only the tagged section,
+    "summary" an extractive summary of it and "digest" a structured digest.
+    """
+    if not raw or mode == "full":
+        return raw
+    if mode == "section":
+        return _section_body(section, raw)
+    if mode == "summary":
+        return summarize(section, raw)
+    if mode == "digest":
+        return digest(section, raw)
+    raise ValueError(
+        f"Unknown context compaction mode '{mode}', expected one of {COMPACTION_MODES}"
+    )
+
+
+def parse_mode_overrides(value):
+    """
+    Parse "task=mode,task=mode" into a dict, e.g.
+    "final_synthesis=section,architecture_validation=digest".
+    """
+    overrides = {}
+    for entry in (value or "").split(","):
+        if "=" in entry:
+            task, mode = (part.strip() for part in entry.split("=", 1))
+            if mode not in COMPACTION_MODES:
+                raise ValueError(f"Unknown context compaction mode '{mode}' for {task}")
+            overrides[task] = mode
+    return overrides
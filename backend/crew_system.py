@@ -1,12 +1,19 @@
 # backend/crew_system.py
 import os
-from crewai import Process, Crew, Agent, Task
+
+from crewai import Agent, Crew, Process, Task
 from crewai_tools import SerperDevTool
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI  # Included per your original notebook
 
+from telemetry import register_crewai_listeners, tracer
+
 # Load environment variables
 load_dotenv()
+register_crewai_listeners()
+
+# Production mode turns off the verbose agent and crew traces on the console
+VERBOSE = os.getenv("CREW_PRODUCTION_MODE", "false").lower() != "true"
 
 # Tool initialization
 search_tool = SerperDevTool()
@@ -27,7 +34,7 @@ knowledge_agent = Agent(
         "reference architectures that specifically address these exact requirements for this use case."
     ),
     allow_delegation=False,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 industry_solutions_agent = Agent(
@@ -45,7 +52,7 @@ industry_solutions_agent = Agent(
         "Your value comes from finding concrete examples that match these exact parameters rather than generic solutions."
     ),
     allow_delegation=True,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 implementation_details_agent = Agent(
@@ -64,7 +71,7 @@ implementation_details_agent = Agent(
         "the client's expertise level while meeting all their technical requirements."
     ),
     allow_delegation=True,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 constraints_agent = Agent(
@@ -82,7 +89,7 @@ constraints_agent = Agent(
         "region-specific constraints that could affect implementation success, along with specific workarounds."
     ),
     allow_delegation=True,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 qa_validation_agent = Agent(
@@ -99,7 +106,7 @@ qa_validation_agent = Agent(
         "architectural decision to ensure it's the optimal choice for these specific requirements."
     ),
     allow_delegation=True,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 architecture_synthesizer = Agent(
@@ -118,7 +125,7 @@ architecture_synthesizer = Agent(
         "than just high-level guidance."
     ),
     allow_delegation=False,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 # Define Tasks
@@ -329,7 +336,7 @@ crew = Crew(
         task_architecture_synthesis
     ],
     process=Process.sequential,
-    verbose=2,
+    verbose=2 if VERBOSE else False,
 )
 
 def kickoff_process(user_requirements: dict) -> str:
@@ -337,7 +344,8 @@ def kickoff_process(user_requirements: dict) -> str:
     Accepts a dictionary of user requirements and triggers the Crew AI process.
     Returns the result as a string.
     """
-    return crew.kickoff(inputs=user_requirements)
+    with tracer.span("crew.run", "run", module="crew_system"):
+        return crew.kickoff(inputs=user_requirements)
 
 if __name__ == "__main__":
     # Example user input for testing
@@ -1,18 +1,179 @@
-from crewai import Agent, Task, Crew, Process, LLM
-from crewai_tools import SerperDevTool
-from crewai.tools import tool
+import contextvars
+import functools
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from crewai import Agent, Task
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+from crewai.utilities.formatter import aggregate_raw_outputs_from_task_outputs
 from dotenv import load_dotenv
-import re
-import json
+
+from context_compaction import compact_output, count_tokens, parse_mode_overrides
+from llm_provider import OllamaPool, PooledLLM
+from pricing_engine import estimate_from_output, format_cost_baseline, load_price_table
+from resilience import (
+    RetryPolicy,
+    degradation_reasons,
+    parse_seconds_overrides,
+    report_degraded,
+    track_degradations,
+)
+from result_cache import create_result_cache
+from run_logging import TranscriptWriter, create_logger
+from search_tools import create_search_tool
+from section_parser import extract_assessment_scores, validate_section
+from telemetry import register_crewai_listeners, tracer
+from well_architected import format_precheck, load_rule_set
 
 # Load environment variables for API keys
 load_dotenv()
+register_crewai_listeners()
+
+# Production mode turns off the console output: no verbose agent traces and no
+# printing of the task outputs. Runs are always logged as JSON lines through an
+# async, rate-limited logger; with CREW_TRANSCRIPT_DIR set, the full transcript
+# of every run is also written there as a compressed file.
+PRODUCTION_MODE = os.getenv("CREW_PRODUCTION_MODE", "false").lower() == "true"
+VERBOSE = not PRODUCTION_MODE
+log = create_logger(
+    "experts_crew_system",
+    level=os.getenv("CREW_LOG_LEVEL", "INFO"),
+    rate=float(os.getenv("CREW_LOG_RATE", "50")),
+    burst=int(os.getenv("CREW_LOG_BURST", "200")),
+)
+transcripts = (
+    TranscriptWriter(os.getenv("CREW_TRANSCRIPT_DIR"))
+    if os.getenv("CREW_TRANSCRIPT_DIR")
+    else None
+)
+
+# "dag" runs every task as soon as its context tasks are done, so the independent
+# experts run concurrently; "sequential" runs the tasks one after another
+EXECUTION_MODE = os.getenv("CREW_EXECUTION_MODE", "dag")
+MAX_PARALLEL_TASKS = int(os.getenv("CREW_MAX_PARALLEL_TASKS", "5"))
+
+# Deadline of each task in seconds (0 for none), with per-task overrides as
+# "task=seconds,task=seconds". An optional expert past its deadline is dropped
+# and the run reported degraded; any other task past its deadline fails the run.
+TASK_TIMEOUT = float(os.getenv("CREW_TASK_TIMEOUT", "600"))
+TASK_TIMEOUTS = parse_seconds_overrides(os.getenv("CREW_TASK_TIMEOUTS", ""))
+
+# How upstream outputs are compacted before being passed as context (see
+# context_compaction.py): "full", "section", "summary" or "digest". Per-task
+# overrides are given as "task=mode,task=mode".
+CONTEXT_COMPACTION = os.getenv("CONTEXT_COMPACTION", "section")
+CONTEXT_COMPACTION_OVERRIDES = parse_mode_overrides(
+    os.getenv("CONTEXT_COMPACTION_OVERRIDES", "")
+)
 
-# Initialize tools
-search_tool = SerperDevTool()
+# Separator crewai puts between the outputs of context tasks
+CONTEXT_DIVIDER = "\n\n----------\n\n"
 
-def get_llm():
-    return LLM(model="ollama/crewai-llama3.3", base_url="http://localhost:11434")
+# Experts whose assessment score (from task_analyze_requirements) is below
+# EXPERT_SKIP_BELOW are skipped; below EXPERT_DOWNGRADE_BELOW they run without
+# the search tool. 0 disables either gate.
+EXPERT_SKIP_BELOW = float(os.getenv("EXPERT_SKIP_BELOW", "2"))
+EXPERT_DOWNGRADE_BELOW = float(os.getenv("EXPERT_DOWNGRADE_BELOW", "0"))
+
+# Local price table the cost baseline given to the cost specialist is computed
+# from (see pricing_engine.py); "none" leaves the cost arithmetic to the LLM
+price_table = load_price_table(os.getenv(
+    "PRICE_TABLE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "aws_prices.json"),
+))
+
+# Declarative Well-Architected rules checked before the validator runs (see
+# well_architected.py); "none" leaves every check to the validator
+rule_set = load_rule_set(os.getenv(
+    "WA_RULES_PATH",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "well_architected_rules.json"
+    ),
+))
+
+# Memoized task outputs, keyed on everything that reaches a task (see task_memo_key),
+# so a task whose prompt, agent, model and upstream outputs are unchanged is not re-run
+task_memo = create_result_cache(
+    backend=os.getenv("TASK_MEMO_BACKEND", "memory"),
+    ttl=float(os.getenv("TASK_MEMO_TTL", str(24 * 3600))),
+    max_entries=int(os.getenv("TASK_MEMO_MAX_ENTRIES", "4096")),
+    path=os.getenv("TASK_MEMO_PATH", "task_memo.sqlite3"),
+)
+
+# Initialize tools. Searches are answered from the local knowledge index when it is
+# confident, otherwise cached, coalesced and rate limited (see search_tools.py)
+search_tool = create_search_tool()
+
+# Ollama hosts the LLM calls are spread over, as "url[=max_concurrency],...";
+# OLLAMA_DISPATCH is "least_loaded" or "round_robin". OLLAMA_KEEP_ALIVE is how long
+# Ollama keeps the model loaded after a call (see OllamaPool.warm_up).
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "ollama/crewai-llama3.3")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+ollama_pool = OllamaPool(
+    hosts=os.getenv("OLLAMA_HOSTS", "http://localhost:11434"),
+    max_concurrency=int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4")),
+    dispatch=os.getenv("OLLAMA_DISPATCH", "least_loaded"),
+    breaker_threshold=int(os.getenv("OLLAMA_BREAKER_THRESHOLD", "3")),
+    breaker_reset=float(os.getenv("OLLAMA_BREAKER_RESET", "30")),
+)
+
+# Each LLM call is bounded by LLM_TIMEOUT seconds; calls failing with a
+# connection error, timeout or overload are retried with exponential backoff
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "300"))
+llm_retry_policy = RetryPolicy(
+    attempts=int(os.getenv("LLM_RETRY_ATTEMPTS", "3")),
+    base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "1")),
+    max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "20")),
+)
+
+# Model tier of each task's agent. The "small" tier (OLLAMA_SMALL_MODEL) does the
+# structured fill-in work; when its output fails validate_section (or the call
+# fails) the task is re-run on the large model. AGENT_MODEL_TIERS overrides the
+# defaults as "task=tier,task=tier". Tiering is off until OLLAMA_SMALL_MODEL names
+# a model pulled on the Ollama hosts (e.g. "ollama/llama3.2:3b"); until then the
+# small tier is the large model.
+OLLAMA_SMALL_MODEL = os.getenv("OLLAMA_SMALL_MODEL", "")
+MODEL_TIERS = {"small": OLLAMA_SMALL_MODEL or OLLAMA_MODEL, "large": OLLAMA_MODEL}
+
+def parse_tier_overrides(value):
+    """Parse "task=tier,task=tier" into a dict, e.g. "devops_implementation=small"."""
+    overrides = {}
+    for entry in (value or "").split(","):
+        if "=" in entry:
+            task, tier = (part.strip() for part in entry.split("=", 1))
+            if tier not in MODEL_TIERS:
+                raise ValueError(
+                    f"Unknown model tier '{tier}' for {task}, expected one of "
+                    f"{list(MODEL_TIERS)}"
+                )
+            overrides[task] = tier
+    return overrides
+
+AGENT_MODEL_TIERS = {
+    "requirements_analysis": "small",
+    "cost_optimization": "small",
+    **parse_tier_overrides(os.getenv("AGENT_MODEL_TIERS", ""))
+}
+
+def get_llm(model=OLLAMA_MODEL):
+    return PooledLLM(
+        model=model,
+        pool=ollama_pool,
+        retry_policy=llm_retry_policy,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        timeout=LLM_TIMEOUT or None,
+    )
+
+def warm_up_llm():
+    """Load every model in use on every Ollama host ahead of the first request."""
+    models = {OLLAMA_MODEL} | {MODEL_TIERS[tier] for tier in AGENT_MODEL_TIERS.values()}
+    return {
+        model: ollama_pool.warm_up(model, keep_alive=OLLAMA_KEEP_ALIVE)
+        for model in sorted(models)
+    }
 
 llm = get_llm()
 
@@ -26,7 +187,7 @@ requirements_analyst = Agent(
         "technical aspects will be crucial for project success and can accurately analyze "
         "the technical implications of business requirements."
     ),
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -42,7 +203,7 @@ software_architect = Agent(
         "effectively implemented on AWS."
     ),
     tools=[search_tool],
-    verbose=True, 
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -57,7 +218,7 @@ aws_expert = Agent(
         "and business constraints, paying particular attention to the specific parameters of {use_case}."
     ),
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -72,7 +233,7 @@ security_expert = Agent(
         "You focus on practical security implementations rather than theoretical guidelines."
     ),
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -88,7 +249,7 @@ cost_specialist = Agent(
         "can forecast costs for different implementation scenarios."
     ),
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -103,7 +264,7 @@ data_architect = Agent(
         "considering aspects like data volume, velocity, and variety for {use_case}."
     ),
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -118,7 +279,7 @@ devops_engineer = Agent(
         "that enable reliable operation of {use_case} solutions."
     ),
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -134,7 +295,7 @@ integration_specialist = Agent(
         "integration architectures that match the {integration_complexity} requirements."
     ),
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -149,7 +310,7 @@ implementation_validator = Agent(
         "architectures while remaining practical for implementation."
     ),
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
@@ -164,24 +325,27 @@ solution_architect = Agent(
         "Your architecture documents are known for their clarity, completeness, practical implementability, "
         "and for faithfully representing the expertise and recommendations from each specialist domain."
     ),
-    verbose=True,
+    verbose=VERBOSE,
     allow_delegation=False,
     llm=llm
 )
 
 # Task 1: Initial Requirements Analysis
+# Every later task builds on this output, so it only reads the requirements that
+# shape the architecture. cost_profile, implementation_time and required_expertise
+# go straight to the specialists that act on them (cost, DevOps, validation), so
+# changing one of them keeps the memoized upstream outputs and only re-runs
+# those specialists and what depends on them.
 task_analyze_requirements = Task(
     description=(
-        "As the first step in this architecture design process, analyze the complete set of project requirements to determine technical needs.\n\n"
+        "As the first step in this architecture design process, analyze the project "
+        "requirements to determine technical needs.\n\n"
         "STEP 1: Format the requirements as follows and analyze them:\n"
         "- use_case: {use_case}\n"
         "- performance: {performance}\n"
         "- availability: {availability}\n"
         "- security_tier: {security_tier}\n"
         "- compliance: {compliance}\n"
-        "- cost_profile: {cost_profile}\n"
-        "- implementation_time: {implementation_time}\n"
-        "- required_expertise: {required_expertise}\n"
         "- scalability: {scalability}\n"
         "- ease_of_implementation: {ease_of_implementation}\n"
         "- integration_complexity: {integration_complexity}\n\n"
@@ -191,7 +355,8 @@ task_analyze_requirements = Task(
         "STEP 3: Explicitly rate the following aspects on a scale of 1-5:\n"
         "1. software_architecture_complexity: How complex is the software architecture needs?\n"
         "2. security_requirements: How important are security and compliance?\n"
-        "3. cost_optimization_needs: How critical is cost optimization?\n"
+        "3. cost_optimization_needs: How critical is cost optimization, given the "
+        "scale and usage of the system?\n"
         "4. data_complexity: How complex are the data handling requirements?\n"
         "5. devops_complexity: How sophisticated are the deployment and operations needs?\n"
         "6. performance_requirements: How demanding are the performance needs?\n"
@@ -399,7 +564,10 @@ task_cost_optimization = Task(
         "3. Design auto-scaling to optimize costs\n"
         "4. Identify serverless opportunities\n"
         "5. Recommend operational practices for cost control\n\n"
-        "Include estimated monthly costs for each service and total architecture.\n\n"
+        "Include estimated monthly costs for each service and total architecture. "
+        "If your context includes a <cost_baseline> computed from AWS list prices, "
+        "use its figures for the services it covers instead of calculating them "
+        "yourself, and only estimate the services it lists as not priced.\n\n"
         "Use the search tool to research AWS pricing and cost optimization best practices.\n\n"
         "YOUR RESPONSE MUST USE THE FOLLOWING FORMAT:\n"
         "<cost_optimization>\n"
@@ -635,8 +803,15 @@ task_architecture_validation = Task(
         "4. Review performance efficiency for {performance} requirements\n"
         "5. Analyze cost optimization for {cost_profile}\n"
         "6. Verify implementation feasibility for {required_expertise} team\n\n"
-        "Use the search tool to research AWS Well-Architected Framework principles and best practices specific to your architecture components.\n\n"
-        "Identify specific improvements with implementation details."
+        "If you have a search tool, use it to research AWS Well-Architected Framework "
+        "principles and best practices specific to your architecture components.\n\n"
+        "Identify specific improvements with implementation details.\n\n"
+        "If your context includes a <well_architected_precheck>, its scores and gaps "
+        "come from deterministic rule checks: take them as given, include its gaps "
+        "and recommendations under their pillar, and start each pillar's score from "
+        "the precheck score. Do not re-check what it covers; spend your analysis on "
+        "the issues rules cannot judge (design trade-offs, fit to the use case, "
+        "implementation feasibility), lowering a score only for those."
         "\n\n"
         "STRUCTURE YOUR OUTPUT IN THE FOLLOWING FORMAT:\n"
         "<architecture_validation>\n"
@@ -753,13 +928,442 @@ task_final_synthesis = Task(
 
 
 
-def create_aws_architecture_recommendation(requirements):
+# Pipeline tasks keyed by the section name they report under, in declaration order.
+# The context= lists above define the dependency graph between them. These agents
+# and tasks are templates: every request runs on its own copies from build_pipeline().
+PIPELINE_TASKS = {
+    "requirements_analysis": task_analyze_requirements,
+    "software_architecture": task_design_software_architecture,
+    "aws_service_selection": task_aws_service_selection,
+    "security_architecture": task_security_architecture,
+    "cost_optimization": task_cost_optimization,
+    "data_architecture": task_data_architecture,
+    "devops_implementation": task_devops_implementation,
+    "integration_architecture": task_integration_architecture,
+    "architecture_validation": task_architecture_validation,
+    "final_synthesis": task_final_synthesis
+}
+
+
+def build_pipeline():
     """
-    Runs the CrewAI process to create an AWS architecture recommendation
-    in a sequential manner without project manager coordination
+    Clones the template agents and tasks into an isolated pipeline for a single
+    request, so concurrent requests never share task state or outputs. Each
+    agent gets the model of its tier in AGENT_MODEL_TIERS; the LLM pool and the
+    search tool are shared between pipelines.
+
+    Returns:
+        Dict mapping section names to the cloned tasks, in pipeline order
+    """
+    agents = {}
+    for task in PIPELINE_TASKS.values():
+        if task.agent.role not in agents:
+            agents[task.agent.role] = task.agent.copy()
+
+    tasks = {}
+    task_mapping = {}
+    for name, task in PIPELINE_TASKS.items():
+        tasks[name] = task.copy(agents=list(agents.values()), task_mapping=task_mapping)
+        task_mapping[task.key] = tasks[name]
+
+    for name, task in tasks.items():
+        model = MODEL_TIERS[AGENT_MODEL_TIERS.get(name, "large")]
+        if task.agent.llm.model != model:
+            task.agent.llm = get_llm(model)
+    return tasks
+
+
+# Tasks the runs of a batch (see app.kickoff_batch) run once between them: they
+# are given the requirements of the whole batch instead of those of the variant
+BATCH_SHARED_TASKS = [
+    name.strip()
+    for name in os.getenv(
+        "CREW_BATCH_SHARED_TASKS", "requirements_analysis,software_architecture"
+    ).split(",")
+    if name.strip()
+]
+
+
+# Optional experts and the assessment score that decides whether they are needed
+EXPERT_SCORE_GATES = {
+    "security_architecture": "security_requirements",
+    "cost_optimization": "cost_optimization_needs",
+    "data_architecture": "data_complexity",
+    "devops_implementation": "devops_complexity",
+    "integration_architecture": "integration_complexity"
+}
+
+def plan_experts(
+    scores, skip_below=EXPERT_SKIP_BELOW, downgrade_below=EXPERT_DOWNGRADE_BELOW
+):
+    """
+    Decides which optional experts to skip or downgrade from the assessment scores.
+    Experts whose score is missing always run in full.
+
+    Returns:
+        Dict of section name to (decision, reason), decision being "skipped" or
+        "downgraded"
+    """
+    plan = {}
+    for section, score_name in EXPERT_SCORE_GATES.items():
+        score = scores.get(score_name)
+        if score is None:
+            continue
+        if score < skip_below:
+            plan[section] = (
+                "skipped",
+                f"{score_name} scored {score:g} (skip threshold {skip_below:g})",
+            )
+        elif score < downgrade_below:
+            plan[section] = (
+                "downgraded",
+                f"{score_name} scored {score:g} (downgrade threshold "
+                f"{downgrade_below:g})",
+            )
+    return plan
+
+
+# Streamed LLM chunks are broadcast on the global crewai event bus, so they are
+# routed to the run that owns the emitting LLM instance (see build_pipeline)
+_token_listeners = {}
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _dispatch_stream_chunk(source, event):
+    listener = _token_listeners.get(id(source))
+    if listener is not None:
+        listener(event.chunk)
+
+
+def task_memo_key(task, context):
+    """
+    Hash of the interpolated task prompt, the agent persona, the model id, the
+    names of the tools the task runs with and the upstream context. Since the
+    context holds the upstream outputs, a change in any ancestor invalidates the
+    task and everything downstream of it.
+    """
+    agent = task.agent
+    tools = ",".join(sorted(tool.name for tool in (task.tools or agent.tools or [])))
+    parts = [
+        task.prompt(),
+        agent.role,
+        agent.goal,
+        agent.backstory,
+        str(agent.llm.model),
+        tools,
+        context or "",
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def _execute_task(task, context, memo=None, validate=None, fallback_llm=None):
+    """
+    Runs the task, or reuses its memoized output. With a fallback_llm, the task is
+    re-run on it when the first attempt raises or its output fails validate.
+    Outputs of a degraded run (e.g. searches refused mid-task) are not memoized.
+
+    Returns:
+        (output, memoized, seconds, fell_back)
+    """
+    started = time.perf_counter()
+    key = task_memo_key(task, context) if memo is not None else None
+    raw = memo.lookup(key) if memo is not None else None
+    if raw is None:
+        fell_back = False
+        try:
+            output = task.execute_sync(context=context)
+        except Exception:
+            if fallback_llm is None:
+                raise
+            output = None
+        if fallback_llm is not None and (
+            output is None or (validate is not None and not validate(output.raw))
+        ):
+            task.agent.llm = fallback_llm
+            output = task.execute_sync(context=context)
+            fell_back = True
+        if memo is not None and not degradation_reasons():
+            memo.store(key, output.raw)
+        return output, False, time.perf_counter() - started, fell_back
+
+    return _restore_output(task, raw), True, time.perf_counter() - started, False
+
+
+def _restore_output(task, raw):
+    """
+    Set a previously produced raw output (memoized or checkpointed) as the task's
+    output.
+    """
+    task.output = TaskOutput(
+        name=task.name,
+        description=task.description,
+        expected_output=task.expected_output,
+        raw=raw,
+        agent=task.agent.role,
+    )
+    return task.output
+
+
+def _execute_traced_task(name, task, *args):
+    """
+    _execute_task inside a task span, so the LLM and tool spans of the task nest under
+    it.
+    """
+    with tracer.span(name, "task", agent=task.agent.role) as span:
+        output, memoized, seconds, fell_back = _execute_task(task, *args)
+        span.attributes.update(
+            memoized=memoized,
+            retries=int(fell_back),
+            model=str(task.agent.llm.model),
+            output_tokens=count_tokens(output.raw),
+        )
+    return output, memoized, seconds, fell_back
+
+
+def _execute_shared_task(shared, name, task, context, *args):
+    """
+    _execute_traced_task, unless another run of the batch has run or is running
+    the task on the same inputs; its output is then waited for and reused.
+    shared is a single_flight.SharedResults keyed by task_memo_key.
+
+    Returns:
+        (output, memoized, seconds, fell_back, shared)
     """
-    # Package input parameters for easier passing
-    use_case_params = {
+    if shared is None:
+        return (*_execute_traced_task(name, task, context, *args), False)
+
+    key = task_memo_key(task, context)
+    future, owner = shared.claim(key)
+    if owner:
+        try:
+            result = _execute_traced_task(name, task, context, *args)
+        except Exception as e:
+            shared.fail(key, future, e)
+            raise
+        future.set_result(result[0].raw)
+        return (*result, False)
+
+    started = time.perf_counter()
+    with tracer.span(name, "task", agent=task.agent.role, shared=True):
+        output = _restore_output(task, future.result())
+    return output, False, time.perf_counter() - started, False, True
+
+
+class TaskTimeoutError(TimeoutError):
+    """A required task did not finish within its deadline."""
+
+
+def run_task_graph(
+    tasks,
+    inputs,
+    execution_mode=EXECUTION_MODE,
+    max_workers=MAX_PARALLEL_TASKS,
+    on_task_complete=None,
+    memo=None,
+    should_skip=None,
+    compaction=None,
+    metrics=None,
+    fallback_llms=None,
+    completed=None,
+    deadlines=None,
+    optional=(),
+    shared=None,
+    task_inputs=None,
+    augment_context=None,
+):
+    """
+    Executes the tasks following the dependency graph of their context= lists
+    and returns the task outputs keyed by section name.
+
+    In "dag" mode a task starts as soon as all of its context tasks have finished,
+    so tasks sharing the same upstream context run in parallel. In "sequential"
+    mode the tasks run one at a time in declaration order. on_task_complete, if
+    given, is called with (section name, task output) as each task finishes.
+    With a memo cache, tasks whose inputs are unchanged reuse their cached output.
+
+    should_skip, if given, is called with (section name, outputs so far) when a
+    task becomes ready; when it returns True the task is not run and is left out
+    of the context of the tasks that depend on it.
+
+    compaction maps a task name to the mode ("full", "section", "summary" or
+    "digest") its upstream outputs are compacted with before being passed as
+    context; tasks not listed get the full outputs. If a metrics dict is given it
+    is filled with per-task timings and prompt token counts.
+
+    fallback_llms maps a task name to the LLM it is re-run on when its output
+    fails validate_section. completed maps task names to raw outputs checkpointed
+    by an earlier attempt of the run; those tasks are not run again.
+
+    deadlines maps a task name to the seconds it may run for. A task in optional
+    that misses its deadline is treated as skipped; any other raises
+    TaskTimeoutError. Python threads cannot be interrupted, so the overdue call
+    is abandoned on its worker thread rather than stopped.
+
+    shared, a SharedResults common to the runs of a batch, lets them share the
+    tasks whose inputs (see task_memo_key) are identical between them.
+    task_inputs maps task names to the inputs they (and their agents) are
+    interpolated with instead of inputs.
+
+    augment_context, if given, is called with (section name, outputs so far) when
+    a task is about to run; text it returns is appended to the task's context.
+    """
+    section_names = {id(task): name for name, task in tasks.items()}
+    dependencies = {
+        name: [section_names[id(context_task)] for context_task in (task.context or [])]
+        for name, task in tasks.items()
+    }
+
+    agents = {}
+    for name, task in tasks.items():
+        agents.setdefault(
+            id(task.agent), (task.agent, (task_inputs or {}).get(name, inputs))
+        )
+    for agent, agent_inputs in agents.values():
+        agent.interpolate_inputs(agent_inputs)
+    for name, task in tasks.items():
+        task.interpolate_inputs_and_add_conversation_history(
+            (task_inputs or {}).get(name, inputs)
+        )
+
+    workers = max_workers if execution_mode == "dag" else 1
+    outputs = {}
+    for name, raw in (completed or {}).items():
+        if name in tasks and raw is not None:
+            outputs[name] = _restore_output(tasks[name], raw)
+            if metrics is not None:
+                metrics[name] = {
+                    "compaction": None,
+                    "context_tokens_full": 0,
+                    "context_tokens": 0,
+                    "prompt_tokens": 0,
+                    "seconds": 0.0,
+                    "memoized": False,
+                    "resumed": True,
+                    "output_tokens": count_tokens(raw),
+                }
+            if on_task_complete is not None:
+                on_task_complete(name, outputs[name])
+
+    skipped = set()
+    pending = [name for name in tasks if name not in outputs]
+    running = {}
+    due = {}
+    # Room for a thread per task on top of the workers, since an abandoned task
+    # keeps its thread busy; the number of tasks running at once is still capped
+    # at workers by the loop below.
+    pool = ThreadPoolExecutor(max_workers=workers + len(tasks))
+    try:
+        while pending or running:
+            for name in list(pending):
+                if len(running) >= workers:
+                    break
+                if all(
+                    dependency in outputs or dependency in skipped
+                    for dependency in dependencies[name]
+                ):
+                    pending.remove(name)
+                    if should_skip is not None and should_skip(name, outputs):
+                        skipped.add(name)
+                        continue
+                    upstream = [
+                        dependency
+                        for dependency in dependencies[name]
+                        if dependency in outputs
+                    ]
+                    full_context = aggregate_raw_outputs_from_task_outputs(
+                        [outputs[d] for d in upstream]
+                    )
+                    mode = (compaction or {}).get(name, "full")
+                    context = (
+                        CONTEXT_DIVIDER.join(
+                            compact_output(dependency, outputs[dependency].raw, mode)
+                            for dependency in upstream
+                        )
+                        if mode != "full"
+                        else full_context
+                    )
+                    extra = (
+                        augment_context(name, outputs)
+                        if augment_context is not None
+                        else None
+                    )
+                    if extra:
+                        context = CONTEXT_DIVIDER.join(
+                            part for part in (context, extra) if part
+                        )
+                    if metrics is not None:
+                        prompt_tokens = count_tokens(tasks[name].prompt())
+                        metrics[name] = {
+                            "compaction": mode,
+                            "context_tokens_full": count_tokens(full_context),
+                            "context_tokens": count_tokens(context),
+                            "prompt_tokens": prompt_tokens + count_tokens(context),
+                        }
+                    future = pool.submit(
+                        contextvars.copy_context().run,
+                        _execute_shared_task,
+                        shared,
+                        name,
+                        tasks[name],
+                        context or None,
+                        memo,
+                        functools.partial(validate_section, name),
+                        (fallback_llms or {}).get(name),
+                    )
+                    running[future] = name
+                    if (deadlines or {}).get(name):
+                        due[future] = time.monotonic() + deadlines[name]
+
+            if not running:
+                raise ValueError(
+                    f"Tasks {pending} depend on tasks that are not part of the pipeline"
+                )
+
+            timeout = max(0.0, min(due.values()) - time.monotonic()) if due else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in [
+                future
+                for future in due
+                if future not in done and due[future] <= time.monotonic()
+            ]:
+                name = running.pop(future)
+                del due[future]
+                if name not in optional:
+                    raise TaskTimeoutError(
+                        f"Task {name} did not finish within {deadlines[name]:g}s"
+                    )
+                skipped.add(name)
+                report_degraded(
+                    f"{name} dropped after its {deadlines[name]:g}s deadline"
+                )
+                if metrics is not None:
+                    metrics[name].update(
+                        {"seconds": round(deadlines[name], 3), "timed_out": True}
+                    )
+            for future in done:
+                due.pop(future, None)
+                name = running.pop(future)
+                outputs[name], memoized, seconds, fell_back, reused = future.result()
+                if metrics is not None:
+                    metrics[name].update({
+                        "seconds": round(seconds, 3),
+                        "memoized": memoized,
+                        "shared": reused,
+                        "model": str(tasks[name].agent.llm.model),
+                        "model_fallback": fell_back,
+                        "output_tokens": count_tokens(outputs[name].raw),
+                    })
+                if on_task_complete is not None:
+                    on_task_complete(name, outputs[name])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return outputs
+
+
+def requirement_params(requirements):
+    """The task and agent template inputs for a requirements payload."""
+    return {
         "use_case": requirements.get("use_case"),
         "performance": requirements.get("performance"),
         "availability": requirements.get("availability"),
@@ -772,90 +1376,271 @@ def create_aws_architecture_recommendation(requirements):
         "ease_of_implementation": requirements.get("ease_of_implementation"),
         "integration_complexity": requirements.get("integration_complexity", "Moderate")
     }
+
+
+def create_aws_architecture_recommendation(
+    requirements,
+    execution_mode=EXECUTION_MODE,
+    on_task_complete=None,
+    on_token=None,
+    resume_outputs=None,
+    shared_tasks=None,
+    batch_requirements=None,
+):
+    """
+    Runs the CrewAI process to create an AWS architecture recommendation
+    without project manager coordination. In "dag" mode the security, cost,
+    data, devops and integration experts run in parallel once the AWS
+    service selection is done.
+
+    on_task_complete is called with (section name, raw output) as soon as each
+    task finishes. on_token, if given, streams the final synthesis LLM response
+    chunk by chunk.
+
+    Optional experts are skipped or run without search when the requirements
+    analysis rates their area below EXPERT_SKIP_BELOW / EXPERT_DOWNGRADE_BELOW;
+    the decisions are reported under "skipped_sections"/"downgraded_sections".
+
+    The run, its tasks and their LLM and tool calls are recorded as spans (see
+    telemetry.py) under the returned "trace_id".
+
+    resume_outputs, the task outputs checkpointed by a failed or interrupted
+    attempt, resumes that run from its first incomplete task.
+
+    When search is unavailable (its circuit breaker is open) the agents carry on
+    without it, and optional experts missing their deadline are dropped; the run
+    then returns "degraded": True with the reasons under "degraded_reasons".
+
+    shared_tasks, a single_flight.SharedResults common to the runs of a batch,
+    makes tasks whose inputs match those of another run in the batch reuse its
+    output. With batch_requirements (the requirements of the whole batch, see
+    app.batch_requirements), the BATCH_SHARED_TASKS are interpolated with those
+    instead of requirements, so they run once for the whole batch.
+
+    With a price table, the selected AWS services are priced by pricing_engine;
+    the estimate is given to the cost specialist as a <cost_baseline> and
+    returned under "cost_estimate" for what-if recomputation. With a rule set, the
+    upstream sections are checked against it before the validator runs; the
+    validator gets the scores and findings (returned under
+    "well_architected_precheck"), a summary of the sections and no search tool.
+    """
+    use_case_params = requirement_params(requirements)
+    # The upstream tasks of a batch run see the batch-wide requirements, so their
+    # prompts (and outputs) are the same in every run of the batch
+    task_inputs = {
+        name: requirement_params(batch_requirements) for name in BATCH_SHARED_TASKS
+    } if batch_requirements is not None else None
     
-    # Create a sequential crew without the project manager
-    crew = Crew(
-        agents=[
-            requirements_analyst,
-            software_architect, 
-            aws_expert, 
-            security_expert, 
-            cost_specialist, 
-            data_architect, 
-            devops_engineer, 
-            integration_specialist, 
-            implementation_validator, 
-            solution_architect
-        ],
-        tasks=[
-            task_analyze_requirements,
-            task_design_software_architecture,
-            task_aws_service_selection,
-            task_security_architecture,
-            task_cost_optimization,
-            task_data_architecture,
-            task_devops_implementation,
-            task_integration_architecture,
-            task_architecture_validation,
-            task_final_synthesis
-        ],
-        process=Process.sequential,  # Change to sequential process
-        verbose=True
-    )
-    
-    print("Running AWS architecture design process in sequential mode...")
-    result = crew.kickoff(inputs=use_case_params)
+    if not PRODUCTION_MODE:
+        print(f"Running AWS architecture design process in {execution_mode} mode...")
+    tasks = build_pipeline()
+    synthesis_llm = tasks["final_synthesis"].agent.llm
+    if on_token is not None:
+        synthesis_llm.stream = True
+        _token_listeners[id(synthesis_llm)] = on_token
+
+    def report_task(name, output):
+        log.info(
+            "task completed", extra={"fields": {"task": name, **metrics.get(name, {})}}
+        )
+        if on_task_complete is not None:
+            on_task_complete(name, output.raw)
+
+    assessment = {}
+
+    def should_skip(name, outputs):
+        if "plan" not in assessment and "requirements_analysis" in outputs:
+            assessment["scores"] = extract_assessment_scores(
+                outputs["requirements_analysis"].raw
+            )
+            assessment["plan"] = plan_experts(assessment["scores"])
+        decision, _ = assessment.get("plan", {}).get(name, (None, None))
+        if decision == "downgraded":
+            tasks[name].tools = []
+            tasks[name].agent.tools = []
+        elif (
+            tasks[name].tools or tasks[name].agent.tools
+        ) and not search_tool.available:
+            report_degraded("search unavailable")
+            tasks[name].tools = []
+            tasks[name].agent.tools = []
+        return decision == "skipped"
+
+    cost = {}
+
+    def cost_estimate(outputs):
+        if "estimate" not in cost:
+            cost["estimate"] = None
+            if price_table is not None and "aws_service_selection" in outputs:
+                cost["estimate"] = estimate_from_output(
+                    price_table, outputs["aws_service_selection"].raw, requirements
+                )
+        return cost["estimate"]
+
+    precheck = {}
+
+    def augment_context(name, outputs):
+        if name == "cost_optimization" and cost_estimate(outputs) is not None:
+            return format_cost_baseline(cost["estimate"])
+        if name == "architecture_validation" and rule_set is not None:
+            precheck["assessment"] = rule_set.evaluate(
+                {section: output.raw for section, output in outputs.items()},
+                requirements,
+            )
+            return format_precheck(precheck["assessment"])
+        return None
+
+    compaction = {
+        name: CONTEXT_COMPACTION_OVERRIDES.get(name, CONTEXT_COMPACTION)
+        for name in tasks
+    }
+    if rule_set is not None:
+        # The mechanical checks run on the full sections, so the validator gets a
+        # summary of them and no search for Well-Architected guidance
+        if (
+            "architecture_validation" not in CONTEXT_COMPACTION_OVERRIDES
+            and CONTEXT_COMPACTION in ("full", "section")
+        ):
+            compaction["architecture_validation"] = "summary"
+        tasks["architecture_validation"].tools = []
+        tasks["architecture_validation"].agent.tools = []
+    fallback_llms = {
+        name: get_llm(OLLAMA_MODEL)
+        for name, task in tasks.items()
+        if task.agent.llm.model != OLLAMA_MODEL
+    }
+    deadlines = {name: TASK_TIMEOUTS.get(name, TASK_TIMEOUT) for name in tasks}
+    degraded_reasons = track_degradations()
+    metrics = {}
+    started = time.perf_counter()
+    try:
+        with tracer.span("crew.run", "run", execution_mode=execution_mode,
+                         resumed_tasks=len(resume_outputs or {})) as run_span:
+            outputs = run_task_graph(
+                tasks,
+                use_case_params,
+                execution_mode=execution_mode,
+                on_task_complete=report_task,
+                memo=task_memo,
+                should_skip=should_skip,
+                compaction=compaction,
+                metrics=metrics,
+                fallback_llms=fallback_llms,
+                completed=resume_outputs,
+                deadlines=deadlines,
+                optional=set(EXPERT_SCORE_GATES),
+                shared=shared_tasks,
+                task_inputs=task_inputs,
+                augment_context=augment_context,
+            )
+            run_span.attributes.update(
+                degraded=bool(degraded_reasons),
+                tasks_run=len(outputs),
+                tasks_memoized=sum(
+                    1 for entry in metrics.values() if entry.get("memoized")
+                ),
+                tasks_shared=sum(
+                    1 for entry in metrics.values() if entry.get("shared")
+                ),
+                prompt_tokens=sum(entry["prompt_tokens"] for entry in metrics.values()),
+            )
+    finally:
+        _token_listeners.pop(id(synthesis_llm), None)
 
     # Collect task outputs
     task_outputs = {
-        "requirements_analysis": task_analyze_requirements.output.raw if hasattr(task_analyze_requirements, 'output') else None,
-        "software_architecture": task_design_software_architecture.output.raw if hasattr(task_design_software_architecture, 'output') else None,
-        "aws_service_selection": task_aws_service_selection.output.raw if hasattr(task_aws_service_selection, 'output') else None,
-        "security_architecture": task_security_architecture.output.raw if hasattr(task_security_architecture, 'output') else None,
-        "cost_optimization": task_cost_optimization.output.raw if hasattr(task_cost_optimization, 'output') else None,
-        "data_architecture": task_data_architecture.output.raw if hasattr(task_data_architecture, 'output') else None,
-        "devops_implementation": task_devops_implementation.output.raw if hasattr(task_devops_implementation, 'output') else None,
-        "integration_architecture": task_integration_architecture.output.raw if hasattr(task_integration_architecture, 'output') else None,
-        "architecture_validation": task_architecture_validation.output.raw if hasattr(task_architecture_validation, 'output') else None,
-        "final_synthesis": task_final_synthesis.output.raw if hasattr(task_final_synthesis, 'output') else None
+        name: outputs[name].raw if name in outputs else None
+        for name in PIPELINE_TASKS
     }
     
-    # Print the output of each task
-    print("\n=== TASK OUTPUTS ===")
-    print("\n--- Requirements Analysis ---")
-    print(task_outputs["requirements_analysis"])
-    
-    print("\n--- Software Architecture Design ---")
-    print(task_outputs["software_architecture"])
-    
-    print("\n--- AWS Service Selection ---")
-    print(task_outputs["aws_service_selection"])
-    
-    print("\n--- Security Architecture ---")
-    print(task_outputs["security_architecture"])
-    
-    print("\n--- Cost Optimization ---")
-    print(task_outputs["cost_optimization"])
-    
-    print("\n--- Data Architecture ---")
-    print(task_outputs["data_architecture"])
-    
-    print("\n--- DevOps Implementation ---")
-    print(task_outputs["devops_implementation"])
-    
-    print("\n--- Integration Architecture ---")
-    print(task_outputs["integration_architecture"])
-    
-    print("\n--- Architecture Validation ---")
-    print(task_outputs["architecture_validation"])
-    
-    print("\n=== FINAL ARCHITECTURE SYNTHESIS ===")
-    print(task_outputs["final_synthesis"])
-    
-    return {
-        "task_outputs": task_outputs
+    # Print the output of each task unless in production mode
+    if not PRODUCTION_MODE:
+        print("\n=== TASK OUTPUTS ===")
+        print("\n--- Requirements Analysis ---")
+        print(task_outputs["requirements_analysis"])
+
+        print("\n--- Software Architecture Design ---")
+        print(task_outputs["software_architecture"])
+
+        print("\n--- AWS Service Selection ---")
+        print(task_outputs["aws_service_selection"])
+
+        print("\n--- Security Architecture ---")
+        print(task_outputs["security_architecture"])
+
+        print("\n--- Cost Optimization ---")
+        print(task_outputs["cost_optimization"])
+
+        print("\n--- Data Architecture ---")
+        print(task_outputs["data_architecture"])
+
+        print("\n--- DevOps Implementation ---")
+        print(task_outputs["devops_implementation"])
+
+        print("\n--- Integration Architecture ---")
+        print(task_outputs["integration_architecture"])
+
+        print("\n--- Architecture Validation ---")
+        print(task_outputs["architecture_validation"])
+
+        print("\n=== FINAL ARCHITECTURE SYNTHESIS ===")
+        print(task_outputs["final_synthesis"])
+
+    elapsed = time.perf_counter() - started
+    context_tokens_full = sum(
+        entry["context_tokens_full"] for entry in metrics.values()
+    )
+    context_tokens = sum(entry["context_tokens"] for entry in metrics.values())
+
+    plan = assessment.get("plan", {})
+    result = {
+        "task_outputs": task_outputs,
+        "assessment_scores": assessment.get("scores", {}),
+        "skipped_sections": {
+            name: reason
+            for name, (decision, reason) in plan.items()
+            if decision == "skipped"
+        },
+        "downgraded_sections": {
+            name: reason
+            for name, (decision, reason) in plan.items()
+            if decision == "downgraded"
+        },
+        "cost_estimate": cost_estimate(outputs),
+        "well_architected_precheck": precheck.get("assessment"),
+        "task_metrics": metrics,
+        "degraded": bool(degraded_reasons),
+        "degraded_reasons": list(degraded_reasons),
+        "trace_id": run_span.trace_id,
+        "run_metrics": {
+            "seconds": round(elapsed, 3),
+            "prompt_tokens": sum(entry["prompt_tokens"] for entry in metrics.values()),
+            "context_tokens": context_tokens,
+            "context_tokens_saved": context_tokens_full - context_tokens,
+            "model_fallbacks": sorted(
+                name for name, entry in metrics.items() if entry.get("model_fallback")
+            ),
+            "shared_tasks": sorted(
+                name for name, entry in metrics.items() if entry.get("shared")
+            ),
+        }
     }
 
+    transcript = None
+    if transcripts is not None:
+        transcript = transcripts.write(
+            run_span.trace_id, {"requirements": requirements, **result}
+        )
+    log.info("run completed", extra={"fields": {
+        "trace_id": run_span.trace_id,
+        "execution_mode": execution_mode,
+        "skipped_sections": sorted(result["skipped_sections"]),
+        "degraded_reasons": result["degraded_reasons"],
+        "transcript": transcript,
+        **result["run_metrics"],
+    }})
+    return result
+
 
 
 
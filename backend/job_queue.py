@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when every worker is busy and the waiting queue is full."""
+
+
+class JobQueue:
+    """
+    Runs blocking crew jobs on a thread or process pool behind a bounded queue.
+
+    At most max_workers jobs run at once and at most max_queued more wait for a
+    worker. Submitting beyond that raises QueueFullError instead of piling up work.
+    Finished jobs are kept (up to max_finished) so their results can be polled.
+    """
+
+    def __init__(
+        self, max_workers=2, max_queued=8, worker_type="thread", max_finished=1000
+    ):
+        if worker_type == "process":
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        elif worker_type == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="crew-worker"
+            )
+        else:
+            raise ValueError(
+                f"Unknown worker type '{worker_type}', expected 'thread' or 'process'"
+            )
+
+        self.worker_type = worker_type
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for execution.
+
+        Returns:
+            The id of the new job
+
+        Raises:
+            QueueFullError: If all workers are busy and the queue is full
+        """
+        job_id, _ = self._submit(fn, *args, **kwargs)
+        return job_id
+
+    def complete(self, result):
+        """
+        Record an already available result as a completed job, without using a worker.
+        """
+        future = Future()
+        future.set_result(result)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "future": future,
+                "submitted_at": time.time(),
+                "finished_at": time.time(),
+            }
+        return job_id
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) and return an asyncio future for its result, so
+        it can be awaited without blocking the event loop.
+
+        Raises:
+            QueueFullError: If all workers are busy and the queue is full
+        """
+        _, future = self._submit(fn, *args, **kwargs)
+        return asyncio.wrap_future(future)
+
+    def future(self, job_id):
+        """
+        The concurrent.futures.Future of a job's result, or None if the job id is
+        unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job["future"] if job is not None else None
+
+    def status(self, job_id):
+        """
+        Report the state of a job.
+
+        Returns:
+            Dict with the job status (queued/running/completed/failed/cancelled)
+            and its result or error, or None if the job id is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        future = job["future"]
+        report = {"job_id": job_id, "status": "queued", "result": None, "error": None}
+        if future.cancelled():
+            # Never started, e.g. dropped from the queue at shutdown
+            report["status"] = "cancelled"
+            report["error"] = "Job cancelled before it ran"
+        elif future.done():
+            error = future.exception()
+            if error is None:
+                report["status"] = "completed"
+                report["result"] = future.result()
+            else:
+                report["status"] = "failed"
+                report["error"] = str(error)
+        elif future.running():
+            report["status"] = "running"
+        return report
+
+    def stats(self):
+        """Current number of running and queued jobs."""
+        with self._lock:
+            futures = [job["future"] for job in self._jobs.values()]
+        running = sum(1 for future in futures if future.running())
+        queued = sum(
+            1 for future in futures if not future.running() and not future.done()
+        )
+        return {
+            "running": running,
+            "queued": queued,
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(
+                f"All {self.max_workers} workers are busy and {self.max_queued} jobs "
+                "are already queued"
+            )
+
+        job_id = uuid.uuid4().hex
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._jobs[job_id] = {
+                "future": future,
+                "submitted_at": time.time(),
+                "finished_at": None,
+            }
+        future.add_done_callback(lambda _: self._finish(job_id))
+        return job_id, future
+
+    def _finish(self, job_id):
+        self._slots.release()
+        with self._lock:
+            self._jobs[job_id]["finished_at"] = time.time()
+            finished = [
+                key for key, job in self._jobs.items() if job["finished_at"] is not None
+            ]
+            for key in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[key]
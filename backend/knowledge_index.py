@@ -0,0 +1,335 @@
+"""
+Offline retrieval over a local corpus of AWS documentation (service quotas,
+Well-Architected guidance, pricing dimensions, ...), so agents can look up
+stable facts without a live web search.
+
+The ingest pipeline splits the corpus into passages and writes a BM25 index to
+a directory of .npy files. KnowledgeIndex memory-maps them, so every worker
+process on a host shares one copy through the page cache.
+
+Build or rebuild an index (from backend/):
+    python knowledge_index.py build path/to/aws-docs knowledge_index [--passage-words
+    180]
+Query it:
+    python knowledge_index.py query knowledge_index "DynamoDB item size limit"
+"""
+import argparse
+import html
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+
+CORPUS_EXTENSIONS = (".md", ".txt", ".html", ".htm")
+MAX_TERM_LENGTH = 32
+
+# Compound AWS terms (t3.medium, us-east-1) are kept whole and also split into their
+# parts
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+_PARTS = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "its", "of", "on", "or", "that", "the",
+    "this", "to", "what", "when", "where", "which", "with", "you", "your",
+})
+_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+(.*)$")
+_TAG = re.compile(r"<(script|style)\b.*?</\1>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+
+
+def tokenize(text):
+    """Lowercased index terms of text, stopwords removed."""
+    terms = []
+    for token in _TOKEN.findall(text.casefold()):
+        parts = _PARTS.findall(token)
+        for term in ([token] + parts if len(parts) > 1 else parts):
+            if term not in _STOPWORDS:
+                terms.append(term[:MAX_TERM_LENGTH])
+    return terms
+
+
+def read_document(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    if path.endswith((".html", ".htm")):
+        # Headings become markdown headings and block-level tags paragraph breaks,
+        # so passages follow the page layout
+        text = re.sub(
+            r"(?i)<h([1-6])\b[^>]*>",
+            lambda m: "\n\n" + "#" * int(m.group(1)) + " ",
+            text,
+        )
+        text = re.sub(r"(?i)</?(p|div|section|h[1-6]|li|tr|br)\b[^>]*>", "\n\n", text)
+        text = html.unescape(_TAG.sub(" ", text))
+    return text
+
+
+def split_passages(text, passage_words=180):
+    """
+    Split a document into (heading, passage) pairs of up to about passage_words
+    words, keeping paragraphs whole and each passage under its nearest heading.
+    """
+    passages = []
+    heading, paragraphs, words = "", [], 0
+
+    def flush():
+        if paragraphs:
+            passages.append((heading, "\n\n".join(paragraphs)))
+        paragraphs.clear()
+
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        match = _HEADING.match(block.splitlines()[0])
+        if match:
+            flush()
+            words = 0
+            heading = match.group(1).strip()
+            block = "\n".join(block.splitlines()[1:]).strip()
+            if not block:
+                continue
+        length = len(block.split())
+        if words and words + length > passage_words:
+            flush()
+            words = 0
+        paragraphs.append(block)
+        words += length
+    flush()
+    return passages
+
+
+def build_index(corpus_dir, index_dir, passage_words=180, k1=1.2, b=0.75):
+    """
+    Index every .md, .txt and .html file under corpus_dir into index_dir. BM25
+    weights are computed at build time, so a query only sums posting weights.
+    The index is written next to index_dir and swapped in when complete;
+    processes with the old index mapped keep reading it until they reload.
+
+    Returns:
+        Summary of the build (documents, passages, terms, seconds)
+    """
+    started = time.perf_counter()
+    records, term_counts = [], []
+    documents = 0
+    for root, _, files in os.walk(corpus_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(CORPUS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            source = os.path.relpath(path, corpus_dir)
+            documents += 1
+            for heading, text in split_passages(read_document(path), passage_words):
+                title = heading or os.path.splitext(name)[0]
+                counts = {}
+                for term in tokenize(f"{title}\n{text}"):
+                    counts[term] = counts.get(term, 0) + 1
+                if counts:
+                    records.append({"source": source, "title": title, "text": text})
+                    term_counts.append(counts)
+    if not records:
+        raise ValueError(f"No passages found under {corpus_dir}")
+
+    terms = sorted({term for counts in term_counts for term in counts})
+    term_ids = {term: i for i, term in enumerate(terms)}
+    lengths = np.array(
+        [sum(counts.values()) for counts in term_counts], dtype=np.float32
+    )
+    average_length = float(lengths.mean())
+
+    # Postings grouped by term (CSR layout): the passages and weights of term i
+    # are passages[offsets[i]:offsets[i + 1]]
+    postings = [[] for _ in terms]
+    for passage, counts in enumerate(term_counts):
+        for term, tf in counts.items():
+            postings[term_ids[term]].append((passage, tf))
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in postings])
+    passages = np.empty(offsets[-1], dtype=np.int32)
+    weights = np.empty(offsets[-1], dtype=np.float32)
+    idf = np.empty(len(terms), dtype=np.float32)
+    for i, term_postings in enumerate(postings):
+        df = len(term_postings)
+        idf[i] = math.log(1 + (len(records) - df + 0.5) / (df + 0.5))
+        ids = np.array([p for p, _ in term_postings], dtype=np.int32)
+        tf = np.array([t for _, t in term_postings], dtype=np.float32)
+        norm = k1 * (1 - b + b * lengths[ids] / average_length)
+        passages[offsets[i]:offsets[i + 1]] = ids
+        weights[offsets[i]:offsets[i + 1]] = idf[i] * tf * (k1 + 1) / (tf + norm)
+
+    encoded = [json.dumps(record).encode() for record in records]
+    record_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    record_offsets[1:] = np.cumsum([len(e) for e in encoded])
+
+    staging = f"{index_dir.rstrip(os.sep)}.building"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    np.save(
+        os.path.join(staging, "terms.npy"),
+        np.array(terms, dtype=f"<U{MAX_TERM_LENGTH}"),
+    )
+    np.save(os.path.join(staging, "idf.npy"), idf)
+    np.save(os.path.join(staging, "offsets.npy"), offsets)
+    np.save(os.path.join(staging, "passages.npy"), passages)
+    np.save(os.path.join(staging, "weights.npy"), weights)
+    np.save(os.path.join(staging, "record_offsets.npy"), record_offsets)
+    with open(os.path.join(staging, "records.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    summary = {
+        "documents": documents,
+        "passages": len(records),
+        "terms": len(terms),
+        "average_passage_terms": round(average_length, 1),
+        "k1": k1,
+        "b": b,
+        "built_at": time.time(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.rename(staging, index_dir)
+    return summary
+
+
+class KnowledgeIndex:
+    """
+    Read-only BM25 index written by build_index; all arrays are memory-mapped.
+
+    Each search reports a confidence in [0, 1]: the best passage's score relative
+    to a passage that matches every query term once at average length. Query
+    terms missing from the corpus count against it at the highest idf, so a
+    query about something the corpus does not cover scores low.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self._terms = load("terms")
+        self._idf = load("idf")
+        self._offsets = load("offsets")
+        self._passages = load("passages")
+        self._weights = load("weights")
+        self._record_offsets = load("record_offsets")
+        self._records = np.memmap(
+            os.path.join(path, "records.bin"), dtype=np.uint8, mode="r"
+        )
+        self._max_idf = math.log(1 + (self.meta["passages"] + 0.5) / 0.5)
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "query_seconds": 0.0}
+
+    def _term_id(self, term):
+        i = int(np.searchsorted(self._terms, term))
+        return i if i < len(self._terms) and self._terms[i] == term else None
+
+    def record(self, passage):
+        start, end = self._record_offsets[passage], self._record_offsets[passage + 1]
+        return json.loads(self._records[start:end].tobytes())
+
+    def search(self, query, top_k=3):
+        """
+        Returns:
+            (confidence, hits), hits being the top_k passages as dicts with source,
+            title, text and score, best first
+        """
+        started = time.perf_counter()
+        terms = set(tokenize(query))
+        scores = np.zeros(self.meta["passages"], dtype=np.float32)
+        full_match = 0.0
+        for term in terms:
+            i = self._term_id(term)
+            if i is None:
+                full_match += self._max_idf
+                continue
+            full_match += float(self._idf[i])
+            start, end = self._offsets[i], self._offsets[i + 1]
+            np.add.at(scores, self._passages[start:end], self._weights[start:end])
+
+        hits = []
+        if full_match:
+            top = np.argpartition(-scores, min(top_k, len(scores)) - 1)[:top_k]
+            for passage in sorted(top, key=lambda p: -scores[p]):
+                if scores[passage] > 0:
+                    hits.append(
+                        dict(
+                            self.record(int(passage)),
+                            score=round(float(scores[passage]), 3),
+                        )
+                    )
+        confidence = min(1.0, hits[0]["score"] / full_match) if hits else 0.0
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["query_seconds"] += time.perf_counter() - started
+        return confidence, hits
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_query_ms"] = (
+            1000 * stats.pop("query_seconds") / stats["queries"]
+            if stats["queries"]
+            else 0.0
+        )
+        return {
+            "path": self.path,
+            "passages": self.meta["passages"],
+            "terms": self.meta["terms"],
+            **stats,
+        }
+
+
+def format_hits(confidence, hits):
+    """Passages as returned to the agents by the search tool."""
+    lines = [
+        f"Results from the local AWS documentation index (confidence {confidence:.2f}):"
+    ]
+    for n, hit in enumerate(hits, 1):
+        lines.append(f"\n[{n}] {hit['title']} ({hit['source']})\n{hit['text']}")
+    return "\n".join(lines)
+
+
+def load_knowledge_index(path):
+    """The index at path, or None when no index has been built there."""
+    if not path or not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    return KnowledgeIndex(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or query the local AWS knowledge index"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index a corpus directory")
+    build.add_argument("corpus_dir")
+    build.add_argument("index_dir")
+    build.add_argument("--passage-words", type=int, default=180)
+    query = commands.add_parser("query", help="Search an index")
+    query.add_argument("index_dir")
+    query.add_argument("query")
+    query.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(
+            json.dumps(
+                build_index(args.corpus_dir, args.index_dir, args.passage_words),
+                indent=2,
+            )
+        )
+    else:
+        confidence, hits = KnowledgeIndex(args.index_dir).search(args.query, args.top_k)
+        print(format_hits(confidence, hits))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from crewai import LLM
+from litellm.exceptions import (
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError,
+    ServiceUnavailableError,
+    Timeout,
+)
+from requests.adapters import HTTPAdapter
+
+from resilience import CircuitBreaker, RetryPolicy
+from telemetry import annotate, metrics
+
+# Errors worth retrying on another host (or the same one, later)
+TRANSIENT_LLM_ERRORS = (
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError,
+    ServiceUnavailableError,
+    Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class OllamaEndpoint:
+    def __init__(self, url, max_concurrency, breaker_threshold=3, breaker_reset=30.0):
+        self.url = url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(
+            f"ollama {self.url}",
+            failure_threshold=breaker_threshold,
+            reset_timeout=breaker_reset,
+        )
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.warm = False
+
+
+class OllamaPool:
+    """
+    Dispatches LLM calls across one or more Ollama hosts.
+
+    Each host accepts at most its own max_concurrency calls at a time; callers
+    block until a host has a free slot. "round_robin" rotates over the hosts with
+    a free slot, "least_loaded" picks the one with the lowest in-flight/limit ratio.
+
+    Hosts whose circuit breaker is open (breaker_threshold transient failures in
+    a row) get no calls for breaker_reset seconds, unless every host is open.
+    """
+
+    def __init__(self, hosts, max_concurrency=4, dispatch="least_loaded", pool_size=16,
+                 breaker_threshold=3, breaker_reset=30.0):
+        if dispatch not in ("round_robin", "least_loaded"):
+            raise ValueError(
+                f"Unknown dispatch '{dispatch}', expected 'round_robin' or "
+                "'least_loaded'"
+            )
+        self.endpoints = [OllamaEndpoint(url, limit, breaker_threshold, breaker_reset)
+                          for url, limit in parse_hosts(hosts, max_concurrency)]
+        if not self.endpoints:
+            raise ValueError("At least one Ollama host is required")
+        self.dispatch = dispatch
+        self._rotation = itertools.cycle(range(len(self.endpoints)))
+        self._available = threading.Condition()
+
+        # Keep-alive connections for the warm-up and health requests made directly to
+        # Ollama
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(self.endpoints), pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _pick(self):
+        healthy = [
+            endpoint for endpoint in self.endpoints if endpoint.breaker.state != "open"
+        ] or self.endpoints
+        free = [
+            endpoint
+            for endpoint in healthy
+            if endpoint.in_flight < endpoint.max_concurrency
+        ]
+        if not free:
+            return None
+        if self.dispatch == "least_loaded":
+            return min(
+                free, key=lambda endpoint: endpoint.in_flight / endpoint.max_concurrency
+            )
+        for _ in range(len(self.endpoints)):
+            endpoint = self.endpoints[next(self._rotation)]
+            if endpoint in free:
+                return endpoint
+
+    @contextmanager
+    def acquire(self):
+        """Reserve a slot on a host for the duration of one LLM call."""
+        waiting = time.perf_counter()
+        with self._available:
+            endpoint = self._pick()
+            while endpoint is None:
+                self._available.wait()
+                endpoint = self._pick()
+            endpoint.in_flight += 1
+
+        started = time.perf_counter()
+        metrics.observe(
+            "crew_llm_pool_wait_seconds",
+            "Time LLM calls waited for a free Ollama slot",
+            started - waiting,
+            endpoint=endpoint.url,
+        )
+        try:
+            yield endpoint
+        except Exception:
+            endpoint.failures += 1
+            raise
+        finally:
+            with self._available:
+                endpoint.in_flight -= 1
+                endpoint.calls += 1
+                endpoint.busy_seconds += time.perf_counter() - started
+                self._available.notify()
+
+    def warm_up(self, model, keep_alive="30m", timeout=600):
+        """
+        Load the model on every host and ask Ollama to keep it resident for
+        keep_alive, so the first real request does not pay for the model load.
+
+        Returns:
+            Dict of host URL to warm-up time in seconds or the error message
+        """
+        name = model.split("/", 1)[1] if model.startswith("ollama/") else model
+        report = {}
+        for endpoint in self.endpoints:
+            started = time.perf_counter()
+            try:
+                response = self.session.post(
+                    f"{endpoint.url}/api/generate",
+                    json={"model": name, "prompt": "", "keep_alive": keep_alive},
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                endpoint.warm = True
+                report[endpoint.url] = round(time.perf_counter() - started, 3)
+            except requests.RequestException as e:
+                report[endpoint.url] = str(e)
+        return report
+
+    def stats(self):
+        with self._available:
+            return {
+                "dispatch": self.dispatch,
+                "endpoints": [
+                    {
+                        "url": endpoint.url,
+                        "warm": endpoint.warm,
+                        "in_flight": endpoint.in_flight,
+                        "max_concurrency": endpoint.max_concurrency,
+                        "calls": endpoint.calls,
+                        "failures": endpoint.failures,
+                        "busy_seconds": round(endpoint.busy_seconds, 3),
+                        "breaker": endpoint.breaker.stats(),
+                    }
+                    for endpoint in self.endpoints
+                ],
+            }
+
+
+def parse_hosts(hosts, default_concurrency):
+    """
+    Parse "url[=limit],url[=limit]" (or a list of such entries) into (url, limit) pairs.
+    """
+    entries = hosts.split(",") if isinstance(hosts, str) else hosts
+    parsed = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        url, _, limit = entry.partition("=")
+        parsed.append((url.strip(), int(limit) if limit else default_concurrency))
+    return parsed
+
+
+class PooledLLM(LLM):
+    """
+    crewai LLM whose calls are dispatched through an OllamaPool. The pool is
+    shared by every copy of the LLM; each agent owns its copy (Agent.copy makes
+    one), so pointing base_url at the chosen host for the call is safe.
+
+    Calls failing with a transient error are retried under retry_policy, each
+    attempt on the host the pool picks then, and count against that host's
+    circuit breaker. Pass timeout= to bound each attempt.
+    """
+
+    def __init__(self, model, pool, retry_policy=None, **kwargs):
+        super().__init__(model=model, base_url=pool.endpoints[0].url, **kwargs)
+        self.pool = pool
+        self.retry_policy = retry_policy or RetryPolicy(attempts=1)
+
+    def call(self, messages, *args, **kwargs):
+        return self.retry_policy.call(
+            self._call_once,
+            messages,
+            *args,
+            retry_on=TRANSIENT_LLM_ERRORS,
+            on_retry=self._count_retry,
+            **kwargs,
+        )
+
+    def _call_once(self, messages, *args, **kwargs):
+        with self.pool.acquire() as endpoint:
+            self.base_url = endpoint.url
+            try:
+                response = super().call(messages, *args, **kwargs)
+            except TRANSIENT_LLM_ERRORS:
+                endpoint.breaker.record_failure()
+                raise
+            endpoint.breaker.record_success()
+            return response
+
+    def _count_retry(self, attempt, error):
+        metrics.inc(
+            "crew_llm_retries_total",
+            "LLM calls retried after a transient error",
+            model=str(self.model),
+            error=type(error).__name__,
+        )
+        annotate(llm_retries=attempt)
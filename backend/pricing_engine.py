@@ -0,0 +1,396 @@
+"""
+Deterministic monthly cost estimates for the selected AWS services, so the cost
+specialist gets exact figures in its context instead of doing the arithmetic
+in the LLM.
+
+Prices come from a local price table (aws_prices.json, PRICE_TABLE_PATH): per
+service a unit price for each pricing dimension (resource-hours, GB-month,
+million requests, ...) or an hourly price per instance type, and how much of
+each dimension the service uses in terms of the usage profile. Services priced
+per vCPU and GB (Fargate) give the vCPU price per type under "hourly" and the
+memory per task, unless the configuration states it, under "memory_gb". The profile
+(users, requests, storage, transfer) is picked by the scalability requirement
+and scaled by a user count in the use case, if one is given.
+
+An estimate holds one row per priced service with its unit price and usage per
+dimension, so the cost is a row-wise dot product; what_if recomputes it for any
+number of scenarios (usage multipliers, pricing model) in one NumPy operation,
+without running the agents again.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from requirement_levels import (
+    HIGH_AVAILABILITY_PERCENT,
+    MULTI_AZ_PERCENT,
+    availability_percent,
+)
+from section_parser import extract_sections, parse_service_selection
+
+HOURS_PER_MONTH = 730
+
+_SPLIT = re.compile(r"\s*(?:\+|,|;|/|\band\b|\bwith\b)\s*")
+_MIN_COUNT = re.compile(r"\bmin(?:imum)?(?:\s+capacity)?\s*(?:of|:|=)?\s*(\d{1,3})\b")
+# A count of instances, optionally as a range ("2-10 tasks", its lower bound) and
+# with a type in between ("3 r6g.large nodes"), but not a size ("4 GB tasks")
+_UNITS = r"(?:[kmgt]i?b|vcpus?|cpus?|cores?)\b"
+_COUNT = re.compile(
+    r"\b(\d{1,3})(?:\s*(?:-|to)\s*\d{1,3})?\s*(?:x\s*)?"
+    r"(?:(?!" + _UNITS + r")[a-z0-9.\-]+\s+)?"
+    r"(?:instances?|nodes?|tasks?|replicas?|shards?|brokers?)\b"
+)
+_MEMORY = re.compile(r"\b(\d+(?:\.\d+)?)\s*(gb|gib|mb|mib)\b")
+_TIMES_TYPE = re.compile(r"\b(\d{1,3})\s*x\s*(?=[a-z])")
+_USERS = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(k|m|thousand|million)?\+?\s*(?:(?:monthly|daily|active|concurrent|registered)\s+)*"
+    r"(?:users|customers|visitors|subscribers)\b"
+)
+
+
+class PriceTable:
+    """
+    A price table file: dimensions, usage profiles, pricing models and per-service
+    prices.
+    """
+
+    def __init__(self, data, source=None):
+        self.source = source
+        self.region = data.get("region")
+        self.currency = data.get("currency", "USD")
+        self.as_of = data.get("as_of")
+        self.dimensions = list(data["dimensions"])
+        self.profiles = data["profiles"]
+        self.pricing_models = data["pricing_models"]
+        self.services = data["services"]
+        # Longest alias first, so "aurora postgresql" wins over "postgresql"
+        aliases = sorted(
+            ((alias.lower(), name) for name, service in self.services.items()
+             for alias in service.get("aliases", []) + [name.lower()]),
+            key=lambda entry: -len(entry[0]),
+        )
+        self._aliases = [
+            (re.compile(rf"(?<![a-z0-9]){re.escape(alias)}(?![a-z0-9])"), name)
+            for alias, name in aliases
+        ]
+
+    def match(self, text):
+        """Name of the table service mentioned in text, or None."""
+        lowered = text.lower()
+        for pattern, name in self._aliases:
+            if pattern.search(lowered):
+                return name
+        return None
+
+    def instance_type(self, name, configuration):
+        """
+        The instance type of the service named in configuration, else the table default.
+        """
+        hourly = self.services[name].get("hourly", {})
+        lowered = (configuration or "").lower()
+        for instance_type in sorted(hourly, key=len, reverse=True):
+            if re.search(
+                rf"(?<![a-z0-9.]){re.escape(instance_type)}(?![a-z0-9])", lowered
+            ):
+                return instance_type
+        return self.services[name].get("default_type") if hourly else None
+
+
+def load_price_table(path):
+    """
+    The price table at path, or None when path is "none" or the file does not exist.
+    """
+    if not path or path == "none" or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return PriceTable(json.load(f), source=path)
+
+
+def _words(value):
+    return set(re.findall(r"[a-z0-9]+", str(value or "").lower()))
+
+
+def _profile_name(scalability):
+    words = _words(scalability)
+    if words & {"high", "highly", "large", "massive", "global"}:
+        return "high"
+    if words & {"low", "small", "minimal"}:
+        return "low"
+    return "medium"
+
+
+def _availability(availability):
+    """
+    (multi_az, zones) for an availability requirement such as "99.99%" or "Fault
+    tolerant", with the thresholds the Well-Architected rules use.
+    """
+    percent = availability_percent(availability)
+    return percent >= MULTI_AZ_PERCENT, 3 if percent >= HIGH_AVAILABILITY_PERCENT else 2
+
+
+def usage_assumptions(table, requirements):
+    """
+    The usage profile of the requirements: the profile for their scalability,
+    with traffic scaled to the user count in the use case if one is given.
+    """
+    profile_name = _profile_name(requirements.get("scalability"))
+    quantities = dict(table.profiles[profile_name])
+    match = _USERS.search(str(requirements.get("use_case") or "").lower())
+    if match:
+        users = float(match.group(1)) * {
+            "k": 1e3,
+            "thousand": 1e3,
+            "m": 1e6,
+            "million": 1e6,
+        }.get(match.group(2), 1)
+        scale = users / quantities["users"]
+        for name in (
+            "users",
+            "requests_millions",
+            "data_transfer_gb",
+            "data_processed_gb",
+        ):
+            quantities[name] = quantities[name] * scale
+    multi_az, zones = _availability(requirements.get("availability"))
+    return {"profile": profile_name, "multi_az": multi_az, "zones": zones, **quantities}
+
+
+def _count(configuration):
+    lowered = (configuration or "").lower()
+    for pattern in (_MIN_COUNT, _COUNT, _TIMES_TYPE):
+        match = pattern.search(lowered)
+        if match and int(match.group(1)) > 0:
+            return int(match.group(1))
+    return None
+
+
+def _memory_gb(configuration):
+    match = _MEMORY.search((configuration or "").lower())
+    if match is None:
+        return None
+    return float(match.group(1)) / (1024 if match.group(2) in ("mb", "mib") else 1)
+
+
+def estimate_costs(table, services, requirements):
+    """
+    Monthly cost of the selected services under the usage assumptions of the
+    requirements. services are section_parser.AwsService entries; services the
+    table has no price for are listed under "unpriced". Each table service is
+    priced once, for its first selection.
+
+    Returns:
+        The estimate: assumptions, one line per priced service (unit prices and
+        usage per dimension, monthly cost), subtotals per category and the total
+    """
+    assumptions = usage_assumptions(table, requirements)
+    lines, unpriced, priced = [], [], set()
+    for selected in services:
+        names = [table.match(part) for part in _SPLIT.split(selected.service) if part]
+        names = [name for name in dict.fromkeys(names) if name is not None]
+        if not names:
+            unpriced.append(selected.service)
+            continue
+        for name in names:
+            if name in priced:
+                continue
+            priced.add(name)
+            lines.append(_line(table, name, selected, assumptions))
+
+    prices = np.array(
+        [line.pop("_prices") for line in lines], dtype=np.float64
+    ).reshape(len(lines), len(table.dimensions))
+    usage = np.array([line.pop("_usage") for line in lines], dtype=np.float64).reshape(
+        prices.shape
+    )
+    costs = (prices * usage).sum(axis=1)
+    for line, prices_row, usage_row, cost in zip(
+        lines, prices, usage, costs, strict=True
+    ):
+        line["unit_prices"] = prices_row.round(10).tolist()
+        line["usage"] = usage_row.round(4).tolist()
+        line["monthly_usd"] = round(float(cost), 2)
+    return {
+        "region": table.region,
+        "currency": table.currency,
+        "prices_as_of": table.as_of,
+        "pricing_model": "on_demand",
+        "dimensions": table.dimensions,
+        "pricing_models": table.pricing_models,
+        "assumptions": assumptions,
+        "lines": lines,
+        "unpriced": unpriced,
+        "by_category": _by_category(lines, costs),
+        "total_monthly_usd": round(float(costs.sum()), 2),
+    }
+
+
+def _line(table, name, selected, assumptions):
+    service = table.services[name]
+    instance_type = table.instance_type(name, selected.configuration)
+    count = _count(selected.configuration)
+    multi_az = service.get("multi_az", False) and (
+        assumptions["multi_az"] or "multi-az" in (selected.configuration or "").lower())
+    quantities = dict(assumptions)
+    quantities.update({
+        "one": 1,
+        "always_on": HOURS_PER_MONTH,
+        "zones": assumptions["zones"],
+        "instances": count or assumptions["instances"],
+        "replicas": (count or 1) * (2 if multi_az else 1),
+    })
+    if "memory_gb" in service:
+        memory = _memory_gb(selected.configuration) or service["memory_gb"].get(
+            instance_type, 0.0
+        )
+        quantities["instance_memory_gb"] = quantities["instances"] * memory
+    unit_prices = dict(service.get("prices", {}))
+    if instance_type is not None:
+        unit_prices["hours"] = service["hourly"][instance_type]
+    usage = {
+        dimension: quantities[quantity] * factor
+        for dimension, (quantity, factor) in service["usage"].items()
+    }
+    counted = {quantity for quantity, _ in service["usage"].values()} & {
+        "replicas",
+        "instances",
+    }
+    return {
+        "service": selected.service,
+        "priced_as": name,
+        "category": service["category"],
+        "instance_type": instance_type,
+        "instances": quantities[counted.pop()] if counted else None,
+        "multi_az": multi_az,
+        "reservable": instance_type is not None,
+        "spot": service.get("spot", False),
+        "_prices": [unit_prices.get(dimension, 0.0) for dimension in table.dimensions],
+        "_usage": [usage.get(dimension, 0.0) for dimension in table.dimensions],
+    }
+
+
+def _by_category(lines, costs):
+    totals = {}
+    for line, cost in zip(lines, costs, strict=True):
+        totals[line["category"]] = totals.get(line["category"], 0.0) + float(cost)
+    return {category: round(total, 2) for category, total in totals.items()}
+
+
+def what_if(estimate, scenarios):
+    """
+    Recompute an estimate under scenarios, each a dict with an optional name,
+    usage_multipliers (dimension -> factor, e.g. {"requests_millions": 3}) and
+    pricing_model (a key of the estimate's pricing_models). The pricing model
+    discounts the resource-hours and memory GB-hours of reservable services;
+    spot only applies to services that support it, the others stay on demand.
+
+    Returns:
+        Per scenario its total, the cost per service and the change from the estimate
+    """
+    dimensions = estimate["dimensions"]
+    lines = estimate["lines"]
+    models = estimate["pricing_models"]
+    for scenario in scenarios:
+        unknown = set(scenario.get("usage_multipliers") or {}) - set(dimensions)
+        if unknown:
+            raise ValueError(
+                f"Unknown usage dimensions {sorted(unknown)}, expected some of "
+                f"{dimensions}"
+            )
+        if scenario.get("pricing_model", "on_demand") not in models:
+            raise ValueError(
+                f"Unknown pricing model '{scenario['pricing_model']}', expected one of "
+                f"{sorted(models)}"
+            )
+
+    # costs[s, l] = sum over d of price[l, d] * usage[l, d] * usage_multiplier[s, d] *
+    # price_multiplier[s, l, d]
+    base = np.array([line["unit_prices"] for line in lines], dtype=np.float64).reshape(
+        len(lines), len(dimensions)
+    )
+    base = base * np.array([line["usage"] for line in lines], dtype=np.float64).reshape(
+        base.shape
+    )
+    usage_multipliers = np.ones((len(scenarios), len(dimensions)))
+    price_multipliers = np.ones((len(scenarios), len(lines), len(dimensions)))
+    hourly = [
+        dimensions.index(dimension)
+        for dimension in ("hours", "memory_gb_hours")
+        if dimension in dimensions
+    ]
+    reservable = np.array([line["reservable"] for line in lines], dtype=bool)
+    spot = np.array([line["spot"] for line in lines], dtype=bool)
+    for s, scenario in enumerate(scenarios):
+        for dimension, factor in (scenario.get("usage_multipliers") or {}).items():
+            usage_multipliers[s, dimensions.index(dimension)] = factor
+        model = scenario.get("pricing_model", "on_demand")
+        applies = reservable & spot if model == "spot" else reservable
+        for dimension in hourly:
+            price_multipliers[s, applies, dimension] = models[model]
+    costs = np.einsum("ld,sd,sld->sl", base, usage_multipliers, price_multipliers)
+
+    results = []
+    for s, scenario in enumerate(scenarios):
+        total = float(costs[s].sum())
+        results.append({
+            "name": scenario.get("name") or f"scenario {s + 1}",
+            "pricing_model": scenario.get("pricing_model", "on_demand"),
+            "usage_multipliers": scenario.get("usage_multipliers") or {},
+            "total_monthly_usd": round(total, 2),
+            "change_usd": round(total - estimate["total_monthly_usd"], 2),
+            "services": {
+                line["priced_as"]: round(float(cost), 2)
+                for line, cost in zip(lines, costs[s], strict=True)
+            },
+        })
+    return results
+
+
+def estimate_from_output(table, aws_services_output, requirements):
+    """
+    The estimate for the services of an <aws_services> task output, or None if none are
+    priced.
+    """
+    body = extract_sections(aws_services_output or "", ["aws_services"]).get(
+        "aws_services"
+    )
+    selection = parse_service_selection(body) if body else None
+    if selection is None or not selection.services:
+        return None
+    estimate = estimate_costs(table, selection.services, requirements)
+    return estimate if estimate["lines"] else None
+
+
+def format_cost_baseline(estimate):
+    """The estimate as the <cost_baseline> block given to the cost specialist."""
+    assumptions = estimate["assumptions"]
+    lines = [
+        "<cost_baseline>",
+        f"Computed from {estimate['region']} on-demand list prices (as of "
+        f"{estimate['prices_as_of']}) for a "
+        f"{assumptions['profile']} usage profile: {assumptions['users']:,.0f} monthly "
+        "users, "
+        f"{assumptions['requests_millions']:,.1f}M requests, "
+        f"{assumptions['storage_gb']:,.0f} GB stored, "
+        f"{assumptions['data_transfer_gb']:,.0f} GB transferred out"
+        f"{', Multi-AZ' if assumptions['multi_az'] else ''}.",
+    ]
+    for line in estimate["lines"]:
+        detail = (
+            f" ({line['instance_type']} x{line['instances']})"
+            if line["instance_type"]
+            else ""
+        )
+        lines.append(
+            f"- {line['priced_as']}{detail}: ${line['monthly_usd']:,.2f}/month"
+        )
+    for category, total in estimate["by_category"].items():
+        lines.append(f"- {category.title()} subtotal: ${total:,.2f}/month")
+    lines.append(f"- Total Monthly: ${estimate['total_monthly_usd']:,.2f}")
+    if estimate["unpriced"]:
+        lines.append(
+            f"Not priced (estimate these yourself): {', '.join(estimate['unpriced'])}"
+        )
+    lines.append("</cost_baseline>")
+    return "\n".join(lines)
@@ -0,0 +1,42 @@
+"""
+Levels of the free-form requirement fields ("High", "Budget", "99.95%", "Fault
+tolerant"), shared by the rule checks (well_architected) and the cost estimate
+(pricing_engine) so both read a requirement the same way.
+"""
+import re
+
+_PERCENT = re.compile(r"(\d{2}(?:\.\d+)?)\s*%")
+_WORD = re.compile(r"[a-z0-9]+")
+_HIGH_WORDS = {
+    "high", "highly", "strict", "critical", "mission", "fault", "premium",
+    "performance", "enterprise",
+}
+_LOW_WORDS = {"low", "basic", "budget", "minimal"}
+
+# Availability target of each level, in percent
+AVAILABILITY_PERCENT = {"high": 99.99, "medium": 99.9, "low": 99.0}
+# From this target on, the architecture spans Availability Zones (Multi-AZ)
+MULTI_AZ_PERCENT = 99.9
+# From this target on, it spans three zones (and the rules expect Multi-Region)
+HIGH_AVAILABILITY_PERCENT = 99.99
+
+
+def requirement_level(value):
+    """
+    The level ("low", "medium" or "high") of a free-form requirement such as
+    "High" or "Budget", matched on whole words ("Default" is not "fault").
+    """
+    words = set(_WORD.findall(str(value or "").lower()))
+    if words & _HIGH_WORDS:
+        return "high"
+    if words & _LOW_WORDS:
+        return "low"
+    return "medium"
+
+
+def availability_percent(value):
+    """The availability target in percent; words map to AVAILABILITY_PERCENT[level]."""
+    match = _PERCENT.search(str(value or ""))
+    if match:
+        return float(match.group(1))
+    return AVAILABILITY_PERCENT[requirement_level(value)]
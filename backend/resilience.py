@@ -0,0 +1,141 @@
+import contextvars
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Up to attempts calls, with exponential backoff and full jitter between them."""
+
+    def __init__(self, attempts=3, base_delay=1.0, max_delay=30.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """Seconds to wait after the given failed attempt (1-based)."""
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+    def call(self, fn, *args, retry_on=(Exception,), on_retry=None, **kwargs):
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return fn(*args, **kwargs)
+            except retry_on as e:
+                if attempt == self.attempts or isinstance(e, CircuitOpenError):
+                    raise
+                if on_retry is not None:
+                    on_retry(attempt, e)
+                time.sleep(self.delay(attempt))
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures; while open, calls are
+    refused for reset_timeout seconds. After that one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """
+        Whether a call may go ahead now; in half-open state only one trial call does.
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"state": self._state(), "consecutive_failures": self._failures}
+
+
+# Reasons the current run is running degraded (search unavailable, an expert
+# dropped after its deadline, ...). Set per run; worker threads started with
+# contextvars.copy_context() share the run's list.
+_degradations = contextvars.ContextVar("degradations", default=None)
+
+
+def track_degradations():
+    """
+    Start collecting degradation reasons for the current run and return the list they go
+    to.
+    """
+    reasons = []
+    _degradations.set(reasons)
+    return reasons
+
+
+def degradation_reasons():
+    """The degradation reasons reported so far in the current run."""
+    return list(_degradations.get() or [])
+
+
+def report_degraded(reason):
+    reasons = _degradations.get()
+    if reasons is not None and reason not in reasons:
+        reasons.append(reason)
+
+
+def parse_seconds_overrides(value):
+    """Parse "task=seconds,task=seconds" into a dict of floats."""
+    overrides = {}
+    for entry in (value or "").split(","):
+        if "=" in entry:
+            task, seconds = (part.strip() for part in entry.split("=", 1))
+            overrides[task] = float(seconds)
+    return overrides
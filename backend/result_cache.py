@@ -0,0 +1,223 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_text(value):
+    """Case-fold a value and collapse its whitespace so equal wordings compare equal."""
+    return " ".join(str(value).split()).casefold()
+
+
+def canonical_requirements(requirements):
+    """
+    Canonicalize a requirements payload for use as a cache key.
+
+    Text fields are case-folded and whitespace-collapsed. Compliance may be a
+    list or a comma-separated string and is turned into a sorted, de-duplicated list.
+    """
+    canonical = {}
+    for key, value in requirements.items():
+        if value is None:
+            continue
+        if key == "compliance":
+            items = value.split(",") if isinstance(value, str) else value
+            canonical[key] = sorted(
+                {normalize_text(item) for item in items if normalize_text(item)}
+            )
+        else:
+            canonical[key] = normalize_text(value)
+    return canonical
+
+
+def requirements_key(requirements):
+    """Content address of a requirements payload: sha256 of its canonical JSON form."""
+    payload = json.dumps(
+        canonical_requirements(requirements), sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU store, bounded to max_entries."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, created_at):
+        """Store an entry and return how many entries were evicted to make room."""
+        with self._lock:
+            self._entries[key] = (value, created_at)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    LRU store in a SQLite file, so cached results survive restarts and are shared
+    between workers.
+    """
+
+    def __init__(self, path="result_cache.sqlite3", max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed_at ON results "
+                "(accessed_at)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, created_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, created_at):
+        """Store an entry and return how many entries were evicted to make room."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), created_at, time.time()),
+            )
+            evicted = conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        return evicted
+
+    def delete(self, key):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """
+    Caches recommendation results under the content address of their requirements.
+    lookup/store work on raw keys, which is how individual task outputs are memoized.
+
+    Entries older than ttl seconds are treated as misses and dropped. Eviction of
+    least recently used entries is left to the backend.
+    """
+
+    def __init__(self, backend=None, ttl=24 * 3600):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def get(self, requirements):
+        """Return the cached result for these requirements, or None."""
+        return self.lookup(requirements_key(requirements))
+
+    def set(self, requirements, result):
+        self.store(requirements_key(requirements), result)
+
+    def lookup(self, key):
+        """Return the value cached under key, or None."""
+        entry = self.backend.get(key)
+        if (
+            entry is not None
+            and self.ttl is not None
+            and time.time() - entry[1] > self.ttl
+        ):
+            self.backend.delete(key)
+            entry = None
+            with self._lock:
+                self.expirations += 1
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry[0] if entry is not None else None
+
+    def store(self, key, value):
+        evicted = self.backend.set(key, value, time.time())
+        with self._lock:
+            self.evictions += evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "entries": len(self.backend),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def create_result_cache(
+    backend="memory", ttl=24 * 3600, max_entries=1024, path="result_cache.sqlite3"
+):
+    """
+    Build a ResultCache for the configured backend name ("memory", "sqlite" or "none").
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return ResultCache(MemoryCacheBackend(max_entries=max_entries), ttl=ttl)
+    if backend == "sqlite":
+        return ResultCache(
+            SQLiteCacheBackend(path=path, max_entries=max_entries), ttl=ttl
+        )
+    raise ValueError(
+        f"Unknown result cache backend '{backend}', expected 'memory', 'sqlite' or "
+        "'none'"
+    )
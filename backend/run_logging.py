@@ -0,0 +1,128 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line; fields passed as extra={"fields": {...}} are merged in.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token-bucket limit on records per second. Records over the limit are dropped
+    (warnings and errors are always kept); the next record let through reports
+    how many were dropped.
+    """
+
+    def __init__(self, rate, burst):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens < 1 and record.levelno < logging.WARNING:
+                self._dropped += 1
+                return False
+            self._tokens = max(0.0, self._tokens - 1)
+            if self._dropped:
+                record.fields = dict(
+                    getattr(record, "fields", None) or {}, dropped_records=self._dropped
+                )
+                self._dropped = 0
+        return True
+
+
+def create_logger(name="crew", level="INFO", rate=50.0, burst=200, stream=None):
+    """
+    Logger whose records are only put on a queue by the calling thread; a listener
+    thread applies the rate limit, formats them as JSON and writes them to stream
+    (stderr by default), so logging never blocks a crew run on I/O.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    if logger.handlers:
+        return logger
+
+    records = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    if rate > 0:
+        output.addFilter(RateLimitFilter(rate, burst))
+    listener = logging.handlers.QueueListener(
+        records, output, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return logger
+
+
+class TranscriptWriter:
+    """
+    Writes the full transcript of a run (requirements, task outputs and metrics)
+    to <directory>/<run id>.json.gz on a background thread.
+    """
+
+    def __init__(self, directory, compresslevel=6):
+        self.directory = directory
+        self.compresslevel = compresslevel
+        os.makedirs(directory, exist_ok=True)
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="transcripts"
+        )
+
+    def path(self, run_id):
+        return os.path.join(self.directory, f"{run_id}.json.gz")
+
+    def write(self, run_id, transcript):
+        """
+        Queue the transcript for writing and return the path it will be written to.
+        """
+        path = self.path(run_id)
+        self._writer.submit(self._write, path, transcript)
+        return path
+
+    def _write(self, path, transcript):
+        temporary = f"{path}.tmp"
+        with gzip.open(
+            temporary, "wt", encoding="utf-8", compresslevel=self.compresslevel
+        ) as f:
+            json.dump(transcript, f, default=str)
+        os.replace(temporary, path)
+
+    def close(self):
+        self._writer.shutdown(wait=True)
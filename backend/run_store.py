@@ -0,0 +1,315 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class RunStore:
+    """
+    Persistent record of every crew run in a SQLite file (WAL mode, so API
+    readers never block the workers writing). A run holds its requirements,
+    status, per-task outputs as they complete, timings and final result. The
+    per-task outputs are the checkpoint a failed run is resumed from; a batch
+    variant also keeps the batch requirements it ran with, so it resumes with them.
+
+    Unfinished runs are leased by the process that queued them (owner): it
+    renews their heartbeat (see heartbeat), and only runs whose heartbeat is
+    older than the lease are taken for dead and marked interrupted, so several
+    API processes can share the file.
+    """
+
+    def __init__(self, path="runs.sqlite3", owner=None):
+        self.path = path
+        self.owner = owner or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "run_id TEXT PRIMARY KEY, user_id TEXT, status TEXT NOT NULL, cached "
+                "INTEGER NOT NULL DEFAULT 0, "
+                "requirements TEXT NOT NULL, result TEXT, error TEXT, trace_id TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, owner "
+                "TEXT, heartbeat_at REAL, "
+                "batch_requirements TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+            for column, kind in (
+                ("owner", "TEXT"),
+                ("heartbeat_at", "REAL"),
+                ("batch_requirements", "TEXT"),
+            ):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {kind}")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS runs_user_created ON runs (user_id, "
+                "created_at DESC, run_id)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS run_tasks ("
+                "run_id TEXT NOT NULL, task TEXT NOT NULL, output TEXT, metrics TEXT, "
+                "finished_at REAL NOT NULL, "
+                "PRIMARY KEY (run_id, task))"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def create(self, requirements, user_id=None, batch_requirements=None):
+        """Record a new queued run, leased by this store's owner, and return its id."""
+        run_id = uuid.uuid4().hex
+        now = time.time()
+        batch = (
+            json.dumps(batch_requirements) if batch_requirements is not None else None
+        )
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, user_id, status, requirements, created_at, "
+                "owner, heartbeat_at, "
+                "batch_requirements) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    user_id,
+                    json.dumps(requirements),
+                    now,
+                    self.owner,
+                    now,
+                    batch,
+                ),
+            )
+        return run_id
+
+    def start(self, run_id):
+        """Mark the run running; a resumed run keeps its original start time."""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE runs SET status = 'running', error = NULL, finished_at = NULL, "
+                "started_at = COALESCE(started_at, ?) WHERE run_id = ?",
+                (time.time(), run_id),
+            )
+
+    def heartbeat(self):
+        """Renew the lease on the unfinished runs of this store's owner."""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE runs SET heartbeat_at = ? WHERE owner = ? AND status IN "
+                "('queued', 'running')",
+                (time.time(), self.owner),
+            )
+
+    def interrupt_unfinished(self, lease=120):
+        """
+        Mark the runs left queued or running by another process whose heartbeat is
+        more than lease seconds old (the process is gone) as interrupted, so they
+        can be resumed. Returns how many there were.
+        """
+        now = time.time()
+        with self._connection() as conn:
+            return conn.execute(
+                "UPDATE runs SET status = 'interrupted', finished_at = ? WHERE status "
+                "IN ('queued', 'running') "
+                "AND owner IS NOT ? AND COALESCE(heartbeat_at, started_at, created_at) "
+                "< ?",
+                (now, self.owner, now - lease),
+            ).rowcount
+
+    def requeue(self, run_id):
+        """
+        Move a failed or interrupted run back to queued. Returns False if the run
+        is in any other state, so only one resume of a run can be started.
+        """
+        with self._connection() as conn:
+            return conn.execute(
+                "UPDATE runs SET status = 'queued', owner = ?, heartbeat_at = ? "
+                "WHERE run_id = ? AND status IN ('failed', 'interrupted')",
+                (self.owner, time.time(), run_id),
+            ).rowcount == 1
+
+    def checkpoint(self, run_id):
+        """Outputs of the tasks of the run that completed, keyed by task name."""
+        rows = self._connection().execute(
+            "SELECT task, output FROM run_tasks "
+            "WHERE run_id = ? AND output IS NOT NULL",
+            (run_id,),
+        ).fetchall()
+        return {row["task"]: row["output"] for row in rows}
+
+    def record_task(self, run_id, task, output, metrics=None):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO run_tasks (run_id, task, output, metrics, "
+                "finished_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    task,
+                    output,
+                    json.dumps(metrics) if metrics is not None else None,
+                    time.time(),
+                ),
+            )
+
+    def complete(self, run_id, result, cached=False):
+        """
+        Mark the run completed with its result. Task outputs and metrics go to
+        run_tasks; the rest of the result is stored on the run.
+        """
+        now = time.time()
+        task_metrics = result.get("task_metrics", {})
+        summary = {
+            key: value
+            for key, value in result.items()
+            if key not in ("task_outputs", "task_metrics")
+        }
+        summary["sections"] = list(result.get("task_outputs", {}))
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO run_tasks (run_id, task, output, metrics, "
+                "finished_at) VALUES (?, ?, ?, ?, "
+                "COALESCE((SELECT finished_at FROM run_tasks WHERE run_id = ? AND task "
+                "= ?), ?))",
+                [
+                    (
+                        run_id,
+                        task,
+                        output,
+                        json.dumps(task_metrics[task])
+                        if task in task_metrics
+                        else None,
+                        run_id,
+                        task,
+                        now,
+                    )
+                    for task, output in result.get("task_outputs", {}).items()
+                    if output is not None
+                ],
+            )
+            conn.execute(
+                "UPDATE runs SET status = 'completed', cached = ?, result = ?, "
+                "trace_id = ?, "
+                "started_at = COALESCE(started_at, ?), finished_at = ? WHERE run_id = "
+                "?",
+                (
+                    int(cached),
+                    json.dumps(summary),
+                    result.get("trace_id"),
+                    now,
+                    now,
+                    run_id,
+                ),
+            )
+
+    def fail(self, run_id, error):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE runs SET status = 'failed', error = ?, finished_at = ? WHERE "
+                "run_id = ?",
+                (error, time.time(), run_id),
+            )
+
+    def delete(self, run_id):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM run_tasks WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def get(self, run_id):
+        """
+        The full run record, or None. Until the run completes, task_outputs holds
+        the outputs of the tasks finished so far.
+        """
+        conn = self._connection()
+        row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        tasks = conn.execute(
+            "SELECT task, output, metrics FROM run_tasks "
+            "WHERE run_id = ? ORDER BY finished_at",
+            (run_id,),
+        ).fetchall()
+        task_outputs = {task["task"]: task["output"] for task in tasks}
+        task_metrics = {
+            task["task"]: json.loads(task["metrics"])
+            for task in tasks
+            if task["metrics"]
+        }
+
+        result = None
+        if row["result"]:
+            result = json.loads(row["result"])
+            sections = result.pop("sections", list(task_outputs))
+            result["task_outputs"] = {
+                section: task_outputs.get(section) for section in sections
+            }
+            result["task_metrics"] = task_metrics
+
+        batch_requirements = row["batch_requirements"]
+        run = self._summary(row)
+        run.update({
+            "requirements": json.loads(row["requirements"]),
+            "batch_requirements": (
+                json.loads(batch_requirements) if batch_requirements else None
+            ),
+            "task_outputs": task_outputs,
+            "task_metrics": task_metrics,
+            "result": result,
+        })
+        return run
+
+    def list(self, user_id, limit=20, cursor=None):
+        """
+        Runs of a user, newest first. cursor is the next_cursor of the previous page.
+
+        Returns:
+            {"runs": [run summaries], "next_cursor": cursor of the next page or None}
+        """
+        query = "SELECT * FROM runs WHERE user_id IS ?"
+        params = [user_id]
+        if cursor:
+            created_at, _, run_id = cursor.partition(":")
+            query += " AND (created_at < ? OR (created_at = ? AND run_id < ?))"
+            params += [float(created_at), float(created_at), run_id]
+        query += " ORDER BY created_at DESC, run_id DESC LIMIT ?"
+        rows = self._connection().execute(query, params + [limit + 1]).fetchall()
+        runs = [self._summary(row) for row in rows[:limit]]
+        next_cursor = (
+            f"{rows[limit - 1]['created_at']!r}:{rows[limit - 1]['run_id']}"
+            if len(rows) > limit
+            else None
+        )
+        return {"runs": runs, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _summary(row):
+        requirements = json.loads(row["requirements"])
+        return {
+            "run_id": row["run_id"],
+            "user_id": row["user_id"],
+            "status": row["status"],
+            "cached": bool(row["cached"]),
+            "use_case": requirements.get("use_case"),
+            "error": row["error"],
+            "trace_id": row["trace_id"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "seconds": round(row["finished_at"] - row["started_at"], 3)
+            if row["finished_at"] is not None and row["started_at"] is not None
+            else None,
+        }
+
+
+def create_run_store(backend="sqlite", path="runs.sqlite3"):
+    """Build a RunStore for the configured backend name ("sqlite" or "none")."""
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return RunStore(path=path)
+    raise ValueError(
+        f"Unknown run store backend '{backend}', expected 'sqlite' or 'none'"
+    )
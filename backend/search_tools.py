@@ -0,0 +1,321 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from knowledge_index import format_hits, load_knowledge_index
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, report_degraded
+from result_cache import create_result_cache, normalize_text
+from telemetry import annotate, metrics
+
+# What the agents get back instead of results while search is unavailable
+SEARCH_UNAVAILABLE = (
+    "Web search is temporarily unavailable. Do not retry the search; "
+    "continue the task using your own knowledge of AWS services and best practices."
+)
+
+# What the agents get back for a call without a query
+MISSING_QUERY = (
+    "Error: the search tool needs a non-empty search_query. "
+    "Call it again with a search_query."
+)
+
+
+class SearchToolSchema(BaseModel):
+    """Input for CachedSearchTool."""
+
+    search_query: str = Field(
+        ..., description="Mandatory search query you want to use to search the internet"
+    )
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: rate tokens per second, bursts of up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and return the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class SearchLayer:
+    """
+    Sits between the agents and a search tool. Results are cached per normalized
+    query, concurrent identical queries share one upstream call, and upstream
+    calls go through a token-bucket rate limiter.
+
+    Each upstream call is bounded by timeout seconds and failures are retried
+    under retry_policy. The breaker, if given, stops calling upstream after
+    repeated failures; searches then raise CircuitOpenError straight away.
+    """
+
+    def __init__(
+        self,
+        search_tool,
+        cache=None,
+        rate_limiter=None,
+        retry_policy=None,
+        breaker=None,
+        timeout=None,
+    ):
+        self.search_tool = search_tool
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy(attempts=1)
+        self.breaker = breaker
+        self.timeout = timeout
+        # A hung upstream call is left behind on this pool when it times out
+        self._calls = (
+            ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+            if timeout
+            else None
+        )
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "upstream_errors": 0,
+            "upstream_retries": 0,
+            "breaker_rejections": 0,
+            "upstream_seconds": 0.0,
+            "rate_limited_seconds": 0.0,
+        }
+
+    def search(self, search_query, **kwargs):
+        key = "|".join(
+            [normalize_text(search_query)]
+            + [f"{k}={kwargs[k]}" for k in sorted(kwargs)]
+        )
+        with self._lock:
+            self._stats["requests"] += 1
+
+        if self.cache is not None:
+            cached = self.cache.lookup(key)
+            if cached is not None:
+                self._count("cache_hits")
+                annotate(cache_hit=True)
+                return cached
+
+        with self._lock:
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = Future()
+                owner = True
+            else:
+                owner = False
+                self._stats["coalesced"] += 1
+        if not owner:
+            annotate(cache_hit=False, coalesced=True)
+            return pending.result()
+
+        try:
+            result = self.retry_policy.call(
+                self._call_guarded, search_query, on_retry=self._count_retry, **kwargs
+            )
+            if self.cache is not None:
+                self.cache.store(key, result)
+            pending.set_result(result)
+            return result
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _call_guarded(self, search_query, **kwargs):
+        if self.breaker is None:
+            return self._call_upstream(search_query, **kwargs)
+        try:
+            return self.breaker.call(self._call_upstream, search_query, **kwargs)
+        except CircuitOpenError:
+            self._count("breaker_rejections")
+            raise
+
+    def _count_retry(self, attempt, error):
+        self._count("upstream_retries")
+        metrics.inc(
+            "crew_search_retries_total",
+            "Search calls retried after an upstream error",
+            error=type(error).__name__,
+        )
+        annotate(search_retries=attempt)
+
+    def _call_upstream(self, search_query, **kwargs):
+        if self.rate_limiter is not None:
+            waited = self.rate_limiter.acquire()
+            self._count("rate_limited_seconds", waited)
+            annotate(rate_limited_seconds=round(waited, 3))
+        annotate(cache_hit=False, coalesced=False)
+        started = time.perf_counter()
+        try:
+            if self._calls is None:
+                return self.search_tool.run(search_query=search_query, **kwargs)
+            call = self._calls.submit(
+                self.search_tool.run, search_query=search_query, **kwargs
+            )
+            return call.result(timeout=self.timeout)
+        except Exception:
+            self._count("upstream_errors")
+            raise
+        finally:
+            self._count("upstream_calls")
+            self._count("upstream_seconds", time.perf_counter() - started)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hit_rate"] = (
+            stats["cache_hits"] / stats["requests"] if stats["requests"] else 0.0
+        )
+        stats["avg_upstream_latency"] = (
+            stats["upstream_seconds"] / stats["upstream_calls"]
+            if stats["upstream_calls"]
+            else 0.0
+        )
+        stats["breaker"] = self.breaker.stats() if self.breaker is not None else None
+        return stats
+
+    @property
+    def available(self):
+        """False while the breaker is open, i.e. searches would be refused."""
+        return self.breaker is None or self.breaker.state != "open"
+
+
+class CachedSearchTool(BaseTool):
+    """
+    The agents' search tool. With a local knowledge index, queries are answered
+    from it first; only low-confidence matches (below min_confidence) go to the
+    web search layer. While web search is unavailable, even low-confidence local
+    passages are returned rather than nothing.
+    """
+
+    name: str = "Search the internet with Serper"
+    description: str = (
+        "A tool that can be used to search the internet with a search_query. "
+        "Supports different search types: 'search' (default), 'news'"
+    )
+    args_schema: Type[BaseModel] = SearchToolSchema
+    layer: Any = None
+    knowledge: Any = None
+    min_confidence: float = 0.5
+    top_k: int = 3
+
+    def _run(self, **kwargs: Any) -> Any:
+        search_query = kwargs.pop("search_query", None) or kwargs.pop("query", None)
+        if not isinstance(search_query, str) or not search_query.strip():
+            return MISSING_QUERY
+        local = None
+        if self.knowledge is not None:
+            local = self.knowledge.search(search_query, top_k=self.top_k)
+            confident = local[0] >= self.min_confidence
+            metrics.inc(
+                "crew_knowledge_lookups_total",
+                "Search queries looked up in the local knowledge index",
+                outcome="hit" if confident else "fallback",
+            )
+            annotate(knowledge_confidence=round(local[0], 3), knowledge_hit=confident)
+            if confident:
+                return format_hits(*local)
+        try:
+            return self.layer.search(search_query, **kwargs)
+        except CircuitOpenError:
+            report_degraded("search unavailable")
+            annotate(search_unavailable=True)
+            if local is not None and local[1]:
+                return format_hits(*local)
+            return SEARCH_UNAVAILABLE
+
+    @property
+    def available(self):
+        """
+        False when searches would return nothing: web search refused and no local index.
+        """
+        return self.knowledge is not None or self.layer.available
+
+    def stats(self):
+        stats = self.layer.stats()
+        stats["knowledge"] = (
+            self.knowledge.stats() if self.knowledge is not None else None
+        )
+        return stats
+
+
+def create_search_tool():
+    """
+    Build the shared Serper search tool behind the search cache and rate limiter,
+    answering from the local knowledge index at KNOWLEDGE_INDEX_PATH when one has
+    been built there (see knowledge_index.py).
+    """
+    # crewai_tools is slow to import and only needed for this one tool
+    from crewai_tools import SerperDevTool
+
+    cache = create_result_cache(
+        backend=os.getenv("SEARCH_CACHE_BACKEND", "sqlite"),
+        ttl=float(os.getenv("SEARCH_CACHE_TTL", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "20000")),
+        path=os.getenv("SEARCH_CACHE_PATH", "search_cache.sqlite3"),
+    )
+    rate = float(os.getenv("SEARCH_RATE_LIMIT", "5"))
+    rate_limiter = (
+        TokenBucket(rate=rate, capacity=float(os.getenv("SEARCH_BURST", "5")))
+        if rate > 0
+        else None
+    )
+    retry_policy = RetryPolicy(
+        attempts=int(os.getenv("SEARCH_RETRY_ATTEMPTS", "3")),
+        base_delay=float(os.getenv("SEARCH_RETRY_BASE_DELAY", "0.5")),
+        max_delay=float(os.getenv("SEARCH_RETRY_MAX_DELAY", "8")),
+    )
+    threshold = int(os.getenv("SEARCH_BREAKER_THRESHOLD", "5"))
+    breaker = CircuitBreaker(
+        "search",
+        failure_threshold=threshold,
+        reset_timeout=float(os.getenv("SEARCH_BREAKER_RESET", "60")),
+    ) if threshold > 0 else None
+    timeout = float(os.getenv("SEARCH_TIMEOUT", "20"))
+    return CachedSearchTool(
+        layer=SearchLayer(
+            SerperDevTool(),
+            cache=cache,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            breaker=breaker,
+            timeout=timeout if timeout > 0 else None,
+        ),
+        knowledge=load_knowledge_index(
+            os.getenv("KNOWLEDGE_INDEX_PATH", "knowledge_index")
+        ),
+        min_confidence=float(os.getenv("KNOWLEDGE_MIN_CONFIDENCE", "0.5")),
+        top_k=int(os.getenv("KNOWLEDGE_TOP_K", "3")),
+    )
@@ -0,0 +1,408 @@
+import json
+import re
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Output tag each task is asked to wrap its answer in
+SECTION_TAGS = {
+    "requirements_analysis": "assessment_scores",
+    "software_architecture": "software_architecture",
+    "aws_service_selection": "aws_services",
+    "security_architecture": "security_architecture",
+    "cost_optimization": "cost_optimization",
+    "data_architecture": "data_architecture",
+    "devops_implementation": "devops_implementation",
+    "integration_architecture": "integration_architecture",
+    "architecture_validation": "architecture_validation",
+}
+
+_TAG = re.compile(r"<(/?)([a-z_]+)>")
+_HEADING = re.compile(r"^\s*#+\s*(.+?)\s*#*\s*$")
+_BULLET = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+(.*)$")
+_AMOUNT = re.compile(r"\$\s*(\d[\d,]*(?:\.\d+)?)\s*([kKmM](?![a-zA-Z]))?")
+_RANGE_SEPARATOR = re.compile(r"^\s*(?:-|–|—|to)\s*$")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_PERIOD = re.compile(
+    r"(?P<month>per\s+month|/\s*mo(?:nth)?\b|monthly|a\s+month)"
+    r"|(?P<year>per\s+year|/\s*y(?:ea)?r\b|annual(?:ly)?|yearly|a\s+year)"
+    r"|(?P<hour>per\s+hour|/\s*h(?:ou)?r\b|hourly|an\s+hour)"
+)
+_PER_MONTH = {"month": 1, "year": 1 / 12, "hour": 730}
+
+
+class SectionParser:
+    """
+    Incremental, single-pass extractor of <tag>...</tag> sections.
+
+    feed() accepts text in arbitrary chunks (e.g. streamed LLM tokens) and returns
+    the sections completed by that chunk as (tag, body) pairs; close() flushes a
+    section whose closing tag never arrived. Only the text of the open section and
+    a possible partial tag at the end of a chunk are buffered.
+    """
+
+    def __init__(self, tags=None):
+        self.tags = set(tags) if tags else None
+        self._open_tag = None
+        self._body = []
+        self._tail = ""
+
+    def feed(self, chunk):
+        data = self._tail + chunk
+        self._tail = ""
+        completed = []
+        position = 0
+        for match in _TAG.finditer(data):
+            closing, name = match.group(1) == "/", match.group(2)
+            if self._open_tag is None:
+                if not closing and (self.tags is None or name in self.tags):
+                    self._open_tag = name
+                    self._body = []
+                position = match.end()
+            elif closing and name == self._open_tag:
+                self._body.append(data[position:match.start()])
+                completed.append((self._open_tag, "".join(self._body)))
+                self._open_tag = None
+                self._body = []
+                position = match.end()
+
+        rest = data[position:]
+        partial = rest.rfind("<")
+        if partial != -1 and ">" not in rest[partial:] and len(rest) - partial < 64:
+            self._tail = rest[partial:]
+            rest = rest[:partial]
+        if self._open_tag is not None:
+            self._body.append(rest)
+        return completed
+
+    def close(self):
+        if self._open_tag is None:
+            return []
+        self._body.append(self._tail)
+        completed = [(self._open_tag, "".join(self._body))]
+        self._open_tag = None
+        self._body = []
+        self._tail = ""
+        return completed
+
+
+def extract_sections(text, tags=None):
+    """
+    Return the body of every tagged section in text; the last occurrence of a tag wins.
+    """
+    parser = SectionParser(tags)
+    sections = dict(parser.feed(text or ""))
+    sections.update(parser.close())
+    return sections
+
+
+class SectionItem(BaseModel):
+    key: Optional[str] = Field(
+        None, description="Label before the first colon of a bullet, if any"
+    )
+    value: str = Field(..., description="Text of the bullet after the label")
+
+
+class TaggedSection(BaseModel):
+    headings: Dict[str, List[SectionItem]] = Field(
+        default_factory=dict, description="Bullets grouped by '#' heading"
+    )
+
+
+class AwsService(BaseModel):
+    category: str
+    service: str
+    configuration: Optional[str] = None
+    purpose: Optional[str] = None
+    alternatives_rejected: Optional[str] = None
+
+
+class ServiceSelection(BaseModel):
+    services: List[AwsService] = Field(default_factory=list)
+
+
+class CostLine(BaseModel):
+    item: str
+    text: str
+    monthly_usd: Optional[float] = Field(
+        None, description="Monthly estimate in USD (midpoint of a range)"
+    )
+    monthly_usd_low: Optional[float] = None
+    monthly_usd_high: Optional[float] = None
+
+
+class CostOptimization(TaggedSection):
+    estimates: List[CostLine] = Field(default_factory=list)
+    total_monthly_usd: Optional[float] = Field(
+        None, description="Stated total, or the sum of the estimates"
+    )
+
+
+class PillarAssessment(BaseModel):
+    pillar: str
+    score: Optional[float] = None
+    strengths: List[str] = Field(default_factory=list)
+    gaps: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+    risks: List[str] = Field(default_factory=list)
+    mitigations: List[str] = Field(default_factory=list)
+
+
+class ArchitectureValidation(BaseModel):
+    pillars: List[PillarAssessment] = Field(default_factory=list)
+
+
+class StructuredOutputs(BaseModel):
+    assessment_scores: Dict[str, float] = Field(default_factory=dict)
+    software_architecture: Optional[TaggedSection] = None
+    aws_services: Optional[ServiceSelection] = None
+    security_architecture: Optional[TaggedSection] = None
+    cost_optimization: Optional[CostOptimization] = None
+    data_architecture: Optional[TaggedSection] = None
+    devops_implementation: Optional[TaggedSection] = None
+    integration_architecture: Optional[TaggedSection] = None
+    architecture_validation: Optional[ArchitectureValidation] = None
+
+
+def _clean(text):
+    return text.replace("**", "").replace("__", "").strip()
+
+
+def parse_bullets(body):
+    """
+    Group the bullets of a section body by heading, in a single pass over its lines.
+    """
+    headings = {}
+    current = headings.setdefault("", [])
+    for line in body.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            current = headings.setdefault(_clean(heading.group(1)), [])
+            continue
+        bullet = _BULLET.match(line)
+        if bullet:
+            text = _clean(bullet.group(1))
+            key, colon, value = text.partition(":")
+            if colon and 0 < len(key) <= 60:
+                current.append(SectionItem(key=key.strip(), value=value.strip()))
+            else:
+                current.append(SectionItem(value=text))
+        elif line.strip() and current:
+            current[-1].value = f"{current[-1].value}\n{line.strip()}".strip()
+    if not headings[""]:
+        del headings[""]
+    return headings
+
+
+def parse_monthly_amount(text):
+    """
+    Parse a dollar estimate such as "$1,200/month", "~$1.5k", "$300 - $450" or
+    "$2,400 per year" into (low, high) monthly USD, or (None, None).
+
+    The period is the first one stated right after the amount (or range), before
+    any further amount, so "$300/month ($0.41 per hour)" stays monthly. Without
+    one there, a period before the amount ("Annual: $14,400") applies; the default
+    is monthly.
+    """
+    matches = list(_AMOUNT.finditer(text))
+    if not matches:
+        return None, None
+
+    def value(match):
+        amount = float(match.group(1).replace(",", ""))
+        suffix = (match.group(2) or "").lower()
+        return amount * {"k": 1e3, "m": 1e6}.get(suffix, 1)
+
+    low = high = value(matches[0])
+    last = 0
+    if len(matches) > 1 and _RANGE_SEPARATOR.match(
+        text[matches[0].end() : matches[1].start()]
+    ):
+        high = value(matches[1])
+        last = 1
+
+    lowered = text.lower()
+    end = matches[last + 1].start() if last + 1 < len(matches) else len(text)
+    after = lowered[matches[last].end():end]
+    period = _PERIOD.search(after) or _PERIOD.search(lowered[:matches[0].start()])
+    factor = _PER_MONTH[period.lastgroup] if period is not None else 1
+    return low * factor, high * factor
+
+
+def parse_service_selection(body):
+    services = []
+    for category, items in parse_bullets(body).items():
+        current = None
+        for item in items:
+            field = (item.key or "").lower().replace(" ", "_")
+            if field == "service":
+                current = AwsService(category=category, service=item.value)
+                services.append(current)
+            elif current is not None and field in (
+                "configuration",
+                "purpose",
+                "alternatives_rejected",
+            ):
+                setattr(current, field, item.value)
+    return ServiceSelection(services=services)
+
+
+def parse_cost_optimization(body):
+    headings = parse_bullets(body)
+    estimates = []
+    total = None
+    for heading, items in headings.items():
+        if "estimate" not in heading.lower():
+            continue
+        for item in items:
+            low, high = parse_monthly_amount(item.value)
+            monthly = (low + high) / 2 if low is not None else None
+            if item.key and "total" in item.key.lower():
+                total = monthly
+                continue
+            estimates.append(CostLine(
+                item=item.key or item.value, text=item.value,
+                monthly_usd=monthly, monthly_usd_low=low, monthly_usd_high=high,
+            ))
+    if total is None and any(line.monthly_usd is not None for line in estimates):
+        total = sum(
+            line.monthly_usd for line in estimates if line.monthly_usd is not None
+        )
+    return CostOptimization(
+        headings=headings, estimates=estimates, total_monthly_usd=total
+    )
+
+
+def parse_architecture_validation(body):
+    pillars = []
+    for heading, items in parse_bullets(body).items():
+        if not heading:
+            continue
+        pillar = PillarAssessment(pillar=heading)
+        for item in items:
+            field = (item.key or "").lower()
+            if field == "score":
+                number = _NUMBER.search(item.value)
+                pillar.score = (
+                    min(5.0, max(1.0, float(number.group(0)))) if number else None
+                )
+            elif field in (
+                "strengths",
+                "gaps",
+                "recommendations",
+                "risks",
+                "mitigations",
+            ):
+                entries = [
+                    entry.strip()
+                    for entry in re.split(r"\n|;", item.value)
+                    if entry.strip()
+                ]
+                getattr(pillar, field).extend(entries)
+        pillars.append(pillar)
+    return ArchitectureValidation(pillars=pillars)
+
+
+ASSESSMENT_SCORE_NAMES = [
+    "software_architecture_complexity",
+    "security_requirements",
+    "cost_optimization_needs",
+    "data_complexity",
+    "devops_complexity",
+    "performance_requirements",
+    "availability_requirements",
+    "integration_complexity"
+]
+
+
+def extract_assessment_scores(text):
+    """
+    Extracts the 1-5 ratings of the <assessment_scores> block from the
+    requirements analysis. Falls back to scanning for "name: score" pairs when
+    the block is missing or is not valid JSON, and clamps scores to 1-5.
+
+    Returns:
+        Dict of score name to score, containing only the scores that were found
+    """
+    if not text:
+        return {}
+    blocks = re.findall(
+        r"<assessment_scores>(.*?)</assessment_scores>", text, re.DOTALL | re.IGNORECASE
+    )
+    candidates = [blocks[-1]] if blocks else []
+    candidates.append(text)
+
+    for candidate in candidates:
+        body = re.sub(r"```(?:json)?", "", candidate)
+        json_match = re.search(r"\{.*\}", body, re.DOTALL)
+        scores = {}
+        if json_match:
+            try:
+                parsed = json.loads(json_match.group(0))
+                if isinstance(parsed, dict):
+                    scores = {
+                        key: parsed[key]
+                        for key in ASSESSMENT_SCORE_NAMES
+                        if key in parsed
+                    }
+            except ValueError:
+                pass
+        if not scores:
+            for key in ASSESSMENT_SCORE_NAMES:
+                match = re.search(
+                    rf"{key}\W{{0,3}}\s*[:=]\s*(\d+(?:\.\d+)?)", body, re.IGNORECASE
+                )
+                if match:
+                    scores[key] = match.group(1)
+
+        cleaned = {}
+        for key, value in scores.items():
+            try:
+                cleaned[key] = min(5.0, max(1.0, float(value)))
+            except (TypeError, ValueError):
+                continue
+        if cleaned:
+            return cleaned
+    return {}
+
+
+def validate_section(section, raw):
+    """
+    Check that a task output has the shape later stages rely on: the assessment
+    scores for the requirements analysis, the closed output tag for the other
+    tagged sections. Sections without a tag are always valid.
+    """
+    tag = SECTION_TAGS.get(section)
+    if tag is None:
+        return bool(raw and raw.strip())
+    if tag == "assessment_scores":
+        return bool(extract_assessment_scores(raw))
+    body = extract_sections(raw or "", [tag]).get(tag)
+    return bool(body and body.strip()) and f"</{tag}>" in raw
+
+
+def parse_task_outputs(task_outputs):
+    """
+    Turn the raw task outputs of a run into typed models, one per tagged section.
+    Sections that are missing or were skipped are left as None.
+    """
+    structured = StructuredOutputs()
+    structured.assessment_scores = extract_assessment_scores(
+        task_outputs.get("requirements_analysis")
+    )
+    for section, tag in SECTION_TAGS.items():
+        raw = task_outputs.get(section)
+        if not raw or tag == "assessment_scores":
+            continue
+        body = extract_sections(raw, [tag]).get(tag)
+        if body is None:
+            continue
+        if tag == "aws_services":
+            structured.aws_services = parse_service_selection(body)
+        elif tag == "cost_optimization":
+            structured.cost_optimization = parse_cost_optimization(body)
+        elif tag == "architecture_validation":
+            structured.architecture_validation = parse_architecture_validation(body)
+        else:
+            setattr(structured, tag, TaggedSection(headings=parse_bullets(body)))
+    return structured
@@ -0,0 +1,390 @@
+import importlib.util
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from itertools import pairwise
+
+import numpy as np
+
+from result_cache import canonical_requirements, requirements_key
+
+_WORD = re.compile(r"[a-z0-9]+")
+# A number with its scale ("10k", "2.5 million") and unit ("users", "rps"), or a
+# scale on its own ("millions of users")
+_QUANTITY = re.compile(
+    r"(?<![\w.])(\d[\d,]*(?:\.\d+)?)\s*(k|m|b|thousand|million|billion)?\b"
+    r"(?:\s*(users?|rps|qps|tps|requests?|transactions?|orders?|[kmgtp]b)\b)?"
+    r"|\b(thousand|million|billion)s?\b"
+)
+_SCALE = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6, "b": 1e9, "billion": 1e9}
+
+
+class TfidfEmbedder:
+    """
+    Hashed TF-IDF over the words, word bigrams and character trigrams of a text.
+    Document frequencies come from the texts currently in the cache, so the
+    vectors of the cached texts are recomputed when the corpus changes.
+    """
+
+    name = "tfidf"
+    default_threshold = 0.75
+
+    def __init__(self, dimensions=4096):
+        self.dimensions = dimensions
+        self._document_frequency = np.zeros(dimensions, dtype=np.float32)
+        self._documents = 0
+
+    def prepare(self, text):
+        """Feature counts of text, as (indices, counts) arrays."""
+        words = _WORD.findall(text.casefold())
+        features = words + [f"{a} {b}" for a, b in pairwise(words)]
+        for word in words:
+            padded = f" {word} "
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        counts = {}
+        for feature in features:
+            index = zlib.crc32(feature.encode()) % self.dimensions
+            counts[index] = counts.get(index, 0) + 1
+        indices = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        return indices, np.fromiter(
+            counts.values(), dtype=np.float32, count=len(counts)
+        )
+
+    def add(self, features):
+        self._document_frequency[features[0]] += 1
+        self._documents += 1
+
+    def remove(self, features):
+        self._document_frequency[features[0]] -= 1
+        self._documents -= 1
+
+    def vector(self, features):
+        indices, counts = features
+        idf = (
+            np.log((1 + self._documents) / (1 + self._document_frequency[indices])) + 1
+        )
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        vector[indices] = (1 + np.log(counts)) * idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """
+    Dense embeddings from a local sentence-transformers model, e.g. all-MiniLM-L6-v2
+    (runs on CPU). The model is loaded on first use, not at startup; if it cannot be
+    loaded, the SemanticCache using it turns itself off.
+    """
+
+    name = "model"
+    default_threshold = 0.85
+
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def prepare(self, text):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+
+                self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+    def add(self, features):
+        pass
+
+    def remove(self, features):
+        pass
+
+    def vector(self, features):
+        return features
+
+
+def create_embedder(kind="auto", model_name="all-MiniLM-L6-v2"):
+    """
+    "model" loads the sentence-transformers model and "tfidf" uses TfidfEmbedder.
+    "auto" uses the model when sentence-transformers is installed, else returns
+    None: TF-IDF scores texts differing only in their numbers as near-identical
+    ("1000 users" and "10000000 users" score 0.84), so it is only used on request.
+    """
+    if kind not in ("auto", "model", "tfidf"):
+        raise ValueError(
+            f"Unknown embedder '{kind}', expected 'auto', 'model' or 'tfidf'"
+        )
+    if kind == "tfidf":
+        return TfidfEmbedder()
+    if kind == "model" or importlib.util.find_spec("sentence_transformers") is not None:
+        return SentenceTransformerEmbedder(model_name)
+    return None
+
+
+def use_case_quantities(use_case):
+    """
+    The numbers, scales and units stated in a use_case, normalized so "10k users"
+    and "10,000 users" agree, e.g. ["10000 user", "million"].
+    """
+    quantities = []
+    for match in _QUANTITY.finditer(use_case.casefold()):
+        number, scale, unit, scale_word = match.groups()
+        if scale_word is not None:
+            quantities.append(scale_word)
+            continue
+        value = float(number.replace(",", "")) * _SCALE.get(scale, 1)
+        if unit not in ("rps", "qps", "tps"):
+            unit = (unit or "").removesuffix("s")
+        quantities.append(f"{value:g} {unit}".strip())
+    return sorted(quantities)
+
+
+def _scenario(requirements):
+    """
+    Content address of what must match exactly for a semantic hit: every field of
+    the requirements but use_case, and the quantities stated in the use_case.
+    """
+    scenario = {key: value for key, value in requirements.items() if key != "use_case"}
+    quantities = use_case_quantities(str(requirements.get("use_case") or ""))
+    scenario["use_case_quantities"] = ", ".join(quantities)
+    return requirements_key(scenario)
+
+
+class SemanticCache:
+    """
+    Serves the result of an earlier run whose use_case is worded differently but
+    means the same. A lookup only considers entries whose other requirement
+    fields and use_case quantities (user counts, request rates, scales) are
+    identical (after canonicalization), embeds the use_case and returns the
+    nearest entry if its cosine similarity reaches threshold. If the embedder
+    fails to load, the cache is off: lookups miss and nothing is added.
+
+    The index is a brute-force NumPy matrix of the entry vectors, rebuilt when
+    entries change. Entries expire after ttl seconds; beyond max_entries the least
+    recently served ones are evicted.
+
+    A sample of hits (audit_rate) is flagged for auditing: the caller re-runs the
+    requirements and passes both results to record_audit, and an entry found to
+    have served a false hit is evicted.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        threshold=None,
+        max_entries=2000,
+        ttl=7 * 24 * 3600,
+        audit_rate=0.05,
+        max_audits=200,
+        rng=None,
+    ):
+        self.embedder = embedder
+        self.threshold = (
+            threshold if threshold is not None else embedder.default_threshold
+        )
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.audit_rate = audit_rate
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._keys = []
+        self._rng = rng or np.random.default_rng()
+        self._lock = threading.Lock()
+        self.audits = deque(maxlen=max_audits)
+        self.counts = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "audits": 0,
+            "false_hits": 0,
+        }
+        self.error = None
+
+    def _prepare(self, use_case):
+        """The embedder's features for use_case; None once it failed to load."""
+        if self.error is not None:
+            return None
+        try:
+            return self.embedder.prepare(use_case)
+        except (ImportError, OSError) as e:
+            self.error = f"{self.embedder.name} embedder unavailable: {e}"
+            return None
+
+    def lookup(self, requirements):
+        """
+        Returns:
+            (result, match) for the nearest entry, match holding its key,
+            use_case, the similarity and whether this hit should be audited;
+            None on a miss
+        """
+        use_case = canonical_requirements(requirements).get("use_case", "")
+        features = self._prepare(use_case)
+        if features is None:
+            return None
+        scenario = _scenario(requirements)
+        with self._lock:
+            self._expire()
+            candidates = [
+                i
+                for i, key in enumerate(self._index())
+                if self._entries[key]["scenario"] == scenario
+            ]
+            if not candidates:
+                self.counts["misses"] += 1
+                return None
+            similarities = self._matrix[candidates] @ self.embedder.vector(features)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.counts["misses"] += 1
+                return None
+            key = self._keys[candidates[best]]
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            self.counts["hits"] += 1
+            match = {
+                "key": key,
+                "use_case": entry["use_case"],
+                "similarity": round(similarity, 4),
+                "audit": bool(self._rng.random() < self.audit_rate),
+            }
+            return entry["result"], match
+
+    def add(self, requirements, result):
+        key = requirements_key(requirements)
+        use_case = canonical_requirements(requirements).get("use_case", "")
+        features = self._prepare(use_case)
+        if features is None:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self.embedder.add(features)
+            self._entries[key] = {
+                "scenario": _scenario(requirements),
+                "use_case": use_case,
+                "features": features,
+                "result": result,
+                "created_at": time.time(),
+            }
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.counts["evictions"] += 1
+            self._matrix = None
+
+    def remove(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self._matrix = None
+
+    def _remove(self, key):
+        self.embedder.remove(self._entries.pop(key)["features"])
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        cutoff = time.time() - self.ttl
+        expired = [
+            key for key, entry in self._entries.items() if entry["created_at"] < cutoff
+        ]
+        for key in expired:
+            self._remove(key)
+        if expired:
+            self.counts["expirations"] += len(expired)
+            self._matrix = None
+
+    def _index(self):
+        """
+        Keys of the entries in matrix row order, rebuilding the matrix if entries
+        changed.
+        """
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            vectors = [
+                self.embedder.vector(self._entries[key]["features"])
+                for key in self._keys
+            ]
+            self._matrix = (
+                np.vstack(vectors) if vectors else np.zeros((0, 1), dtype=np.float32)
+            )
+        return self._keys
+
+    def record_audit(self, requirements, match, served, fresh, score_tolerance=1.0):
+        """
+        Compare a served result with a fresh run of the same requirements. The hit
+        is false if an assessment score differs by more than score_tolerance or
+        a different set of experts was skipped; the entry that served it is evicted.
+
+        Returns:
+            The audit record
+        """
+        served_scores = served.get("assessment_scores", {})
+        fresh_scores = fresh.get("assessment_scores", {})
+        score_differences = {
+            name: round(fresh_scores[name] - served_scores[name], 3)
+            for name in served_scores.keys() & fresh_scores.keys()
+            if abs(fresh_scores[name] - served_scores[name]) > score_tolerance
+        }
+        skipped_differ = set(served.get("skipped_sections", {})) != set(
+            fresh.get("skipped_sections", {})
+        )
+        audit = {
+            "use_case": canonical_requirements(requirements).get("use_case", ""),
+            "matched_use_case": match["use_case"],
+            "similarity": match["similarity"],
+            "false_hit": bool(score_differences) or skipped_differ,
+            "score_differences": score_differences,
+            "skipped_sections_differ": skipped_differ,
+            "audited_at": time.time(),
+        }
+        with self._lock:
+            self.audits.append(audit)
+            self.counts["audits"] += 1
+            if audit["false_hit"]:
+                self.counts["false_hits"] += 1
+        if audit["false_hit"]:
+            self.remove(match["key"])
+        return audit
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            entries = len(self._entries)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            "embedder": self.embedder.name,
+            "error": self.error,
+            "threshold": self.threshold,
+            "entries": entries,
+            **counts,
+            "hit_rate": counts["hits"] / lookups if lookups else 0.0,
+            "false_hit_rate": (
+                counts["false_hits"] / counts["audits"] if counts["audits"] else 0.0
+            ),
+        }
+
+
+def create_semantic_cache(
+    embedder="auto",
+    threshold=None,
+    max_entries=2000,
+    ttl=7 * 24 * 3600,
+    audit_rate=0.05,
+    model_name="all-MiniLM-L6-v2",
+):
+    """
+    Build a SemanticCache for the configured embedder ("auto", "model", "tfidf" or
+    "none"). Returns None for "none", and for "auto" without sentence-transformers.
+    """
+    if embedder == "none":
+        return None
+    embedder = create_embedder(embedder, model_name=model_name)
+    if embedder is None:
+        return None
+    return SemanticCache(
+        embedder, threshold=threshold, max_entries=max_entries, ttl=ttl,
+        audit_rate=audit_rate,
+    )
@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import Future
+
+
+class Flight:
+    """
+    One run in progress. Events published on it (task outputs, tokens, and the
+    final result or error) are kept, so a subscriber joining late gets the
+    events it missed replayed before the live ones.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.run_id = None
+        self.job_id = None
+        self.future = None
+        self._events = []
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def publish(self, event, data):
+        with self._lock:
+            self._events.append((event, data))
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(event, data)
+
+    def subscribe(self, listener):
+        """Call listener(event, data) for every event so far and every event to come."""
+        with self._lock:
+            for event, data in self._events:
+                listener(event, data)
+            self._listeners.append(listener)
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent runs: while a run for a key is in progress, requests
+    for the same key attach to it instead of starting another one.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.joined = 0
+
+    def join(self, key, start):
+        """
+        Attach to the run in progress for key, or start one. start(flight) is only
+        called when there is none; it must set up the run and return the
+        concurrent.futures.Future of its result. Exceptions from start propagate
+        and leave no run registered.
+
+        Returns:
+            (flight, joined), joined being True when an existing run was attached to
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.joined += 1
+                return flight, True
+            flight = Flight(key)
+            flight.future = start(flight)
+            self._flights[key] = flight
+            self.started += 1
+        flight.future.add_done_callback(lambda future: self._finish(flight, future))
+        return flight, False
+
+    def _finish(self, flight, future):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        if future.cancelled():
+            # Dropped before it ran; subscribers still need a terminal event
+            flight.publish(
+                "error",
+                {"detail": "Run cancelled before it started", "run_id": flight.run_id},
+            )
+            return
+        error = future.exception()
+        if error is None:
+            flight.publish("result", future.result())
+        else:
+            flight.publish("error", {"detail": str(error), "run_id": flight.run_id})
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "started": self.started,
+                "joined": self.joined,
+            }
+
+
+class SharedResults:
+    """
+    Results shared for the lifetime of this object, e.g. the task outputs of the
+    runs of one batch. The first caller for a key computes the result; callers
+    for the same key wait for it and reuse it instead of computing it again.
+    """
+
+    def __init__(self):
+        self._results = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+
+    def claim(self, key):
+        """
+        Returns:
+            (future of the result, owner); the owner must compute the result and
+            set it on the future, or call fail
+        """
+        with self._lock:
+            future = self._results.get(key)
+            if future is not None:
+                self.reused += 1
+                return future, False
+            future = self._results[key] = Future()
+            return future, True
+
+    def fail(self, key, future, error):
+        """Fail the callers waiting on the result; a later caller computes it again."""
+        with self._lock:
+            if self._results.get(key) is future:
+                del self._results[key]
+        future.set_exception(error)
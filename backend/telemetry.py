@@ -0,0 +1,511 @@
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, suppress
+
+from context_compaction import count_tokens
+
+# Span of the run/task/LLM call/tool call the current thread is working in. Worker
+# threads inherit it when they are started with contextvars.copy_context().run.
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+DURATION_BUCKETS = (0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Span:
+    def __init__(self, name, kind, trace_id, parent=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.end_time = None
+        self.status = "ok"
+        self.error = None
+        self._started = time.perf_counter()
+        self._token = None
+
+    @property
+    def duration(self):
+        return (
+            (self.end_time - self.start_time)
+            if self.end_time is not None
+            else time.time() - self.start_time
+        )
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Metrics:
+    """
+    Counters, histograms and gauges rendered in the Prometheus text exposition
+    format. Label values are passed as keyword arguments.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+
+    def inc(self, name, description, amount=1, /, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, ("counter", description))
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, description, value, /, buckets=DURATION_BUCKETS, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, ("histogram", description))
+            series = self._histograms.setdefault(name, {})
+            histogram = series.setdefault(
+                key,
+                {
+                    "buckets": buckets,
+                    "counts": [0] * len(buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                },
+            )
+            for i, bound in enumerate(histogram["buckets"]):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def gauge(self, name, description, collect):
+        """
+        Register a gauge whose value(s) are read at scrape time: collect() returns a
+        number or {labels: value}.
+        """
+        with self._lock:
+            self._help[name] = ("gauge", description)
+            self._gauges[name] = collect
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, description) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for key, value in self._counters.get(name, {}).items():
+                        lines.append(f"{name}{_labels(key)} {value:g}")
+                elif kind == "histogram":
+                    for key, histogram in self._histograms.get(name, {}).items():
+                        for bound, count in zip(
+                            histogram["buckets"], histogram["counts"], strict=True
+                        ):
+                            labels = _labels(key + (("le", f"{bound:g}"),))
+                            lines.append(f"{name}_bucket{labels} {count}")
+                        lines.append(
+                            f"{name}_bucket{_labels(key + (('le', '+Inf'),))} "
+                            f"{histogram['count']}"
+                        )
+                        lines.append(f"{name}_sum{_labels(key)} {histogram['sum']:g}")
+                        lines.append(f"{name}_count{_labels(key)} {histogram['count']}")
+                else:
+                    values = self._gauges[name]()
+                    if not isinstance(values, dict):
+                        values = {(): values}
+                    for key, value in values.items():
+                        lines.append(
+                            f"{name}{_labels(tuple(sorted(dict(key).items())))} "
+                            f"{value:g}"
+                        )
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key):
+    if not key:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for _, value in key
+    )
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{value}"' for (name, _), value in zip(key, escaped, strict=True)
+        )
+        + "}"
+    )
+
+
+class Tracer:
+    """
+    Records spans per trace (one trace per run) and turns finished spans into
+    metrics. Keeps the spans of the last max_traces traces for the timeline API;
+    exporter, if given, is called with the OTLP JSON of each trace once its root
+    span ends.
+    """
+
+    def __init__(self, metrics, max_traces=200, exporter=None):
+        self.metrics = metrics
+        self.max_traces = max_traces
+        self.exporter = exporter
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_span(self, name, kind, **attributes):
+        """
+        Start a span as a child of the current one (or as the root of a new trace) and
+        make it current.
+        """
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        span = Span(name, kind, trace_id, parent, attributes)
+        with self._lock:
+            if trace_id not in self._traces:
+                self._traces[trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            self._traces[trace_id].append(span)
+        span._token = _current_span.set(span)
+        return span
+
+    def end_span(self, span, error=None, **attributes):
+        if span.end_time is not None:
+            return
+        span.attributes.update(attributes)
+        span.end_time = span.start_time + (time.perf_counter() - span._started)
+        if error is not None:
+            span.status = "error"
+            span.error = str(error)
+        # Ended from another context than the one it was started in
+        with suppress(ValueError):
+            _current_span.reset(span._token)
+        self._record(span)
+        if span.parent_id is None and self.exporter is not None:
+            threading.Thread(
+                target=self._export, args=(span.trace_id,), daemon=True
+            ).start()
+
+    @contextmanager
+    def span(self, name, kind, **attributes):
+        span = self.start_span(name, kind, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, error=e)
+            raise
+        self.end_span(span)
+
+    def _record(self, span):
+        labels = {"kind": span.kind, "name": span.name}
+        self.metrics.observe(
+            "crew_span_duration_seconds",
+            "Duration of runs, tasks, LLM calls and tool calls",
+            span.duration,
+            **labels,
+        )
+        self.metrics.inc(
+            "crew_spans_total", "Finished spans by status", status=span.status, **labels
+        )
+        attributes = span.attributes
+        if span.kind == "llm":
+            model = attributes.get("model", "")
+            self.metrics.inc(
+                "crew_llm_tokens_total",
+                "Approximate LLM tokens",
+                attributes.get("prompt_tokens", 0),
+                model=model,
+                direction="prompt",
+            )
+            self.metrics.inc(
+                "crew_llm_tokens_total",
+                "Approximate LLM tokens",
+                attributes.get("completion_tokens", 0),
+                model=model,
+                direction="completion",
+            )
+        elif span.kind == "tool":
+            self.metrics.inc(
+                "crew_tool_calls_total",
+                "Tool calls by cache outcome",
+                tool=span.name,
+                cache_hit=str(
+                    bool(attributes.get("cache_hit") or attributes.get("from_cache"))
+                ).lower(),
+            )
+        elif span.kind == "task":
+            if attributes.get("memoized"):
+                self.metrics.inc(
+                    "crew_task_memo_hits_total",
+                    "Tasks answered from the task memo",
+                    task=span.name,
+                )
+            if attributes.get("retries"):
+                self.metrics.inc(
+                    "crew_task_retries_total",
+                    "Task re-runs",
+                    attributes["retries"],
+                    task=span.name,
+                )
+
+    def spans(self, trace_id):
+        with self._lock:
+            return list(self._traces.get(trace_id, []))
+
+    def timeline(self, trace_id):
+        """
+        The spans of a trace ordered by start time, with offsets from the start of the
+        trace.
+        """
+        spans = sorted(self.spans(trace_id), key=lambda span: span.start_time)
+        if not spans:
+            return None
+        origin = spans[0].start_time
+        return [
+            dict(span.to_dict(), offset=round(span.start_time - origin, 6))
+            for span in spans
+        ]
+
+    def otlp(self, trace_id):
+        """The trace in the OTLP/JSON trace format."""
+        spans = self.spans(trace_id)
+        if not spans:
+            return None
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", "aws-architecture-crew")
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "experts_crew_system"},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(
+                                        int(span.start_time * 1e9)
+                                    ),
+                                    "endTimeUnixNano": str(
+                                        int((span.end_time or time.time()) * 1e9)
+                                    ),
+                                    "attributes": [
+                                        _otlp_attribute("crew.kind", span.kind)
+                                    ]
+                                    + [
+                                        _otlp_attribute(key, value)
+                                        for key, value in span.attributes.items()
+                                    ],
+                                    "status": {"code": 2, "message": span.error}
+                                    if span.status == "error"
+                                    else {"code": 1},
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def _export(self, trace_id):
+        try:
+            self.exporter(self.otlp(trace_id))
+        except Exception as e:
+            self.metrics.inc(
+                "crew_trace_export_errors_total",
+                "Traces that failed to export",
+                error=type(e).__name__,
+            )
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {
+            "stringValue": value
+            if isinstance(value, str)
+            else json.dumps(value, default=str)
+        }
+    return {"key": key, "value": typed}
+
+
+def otlp_http_exporter(endpoint, timeout=10):
+    """Exporter posting OTLP/JSON traces to an OTLP HTTP collector, e.g. http://localhost:4318/v1/traces."""
+    import requests
+
+    session = requests.Session()
+
+    def export(payload):
+        session.post(endpoint, json=payload, timeout=timeout).raise_for_status()
+    return export
+
+
+def annotate(**attributes):
+    """
+    Add attributes to the current span, if any (e.g. cache outcomes from the search
+    layer).
+    """
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+def current_span():
+    return _current_span.get()
+
+
+metrics = Metrics()
+tracer = Tracer(
+    metrics,
+    max_traces=int(os.getenv("TRACE_MAX_RUNS", "200")),
+    exporter=otlp_http_exporter(os.environ["OTEL_EXPORTER_OTLP_TRACES_ENDPOINT"])
+    if os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT") else None,
+)
+
+
+# crewai reports task, LLM and tool activity on its event bus, synchronously in the
+# thread doing the work. Each start event opens a span under the current one and
+# the matching end event closes it, so spans nest by thread like the calls do.
+# The handlers are registered by register_crewai_listeners(), called by the crew
+# modules, so importing this module does not import crewai.
+
+def _end_current(kind, error=None, **attributes):
+    """End the innermost event span of kind, and any event span left open inside it."""
+    unfinished = []
+    span = _current_span.get()
+    while span is not None and span.attributes.get("source") == "event":
+        if span.kind == kind:
+            for inner in unfinished:
+                tracer.end_span(inner, error="no end event")
+            tracer.end_span(span, error=error, **attributes)
+            return
+        unfinished.append(span)
+        span = span.parent
+
+
+def _on_task_started(source, _event):
+    span = _current_span.get()
+    if span is None or span.kind != "task":
+        tracer.start_span(
+            getattr(source, "name", None) or source.description[:60],
+            "task",
+            source="event",
+            agent=getattr(source.agent, "role", ""),
+        )
+
+
+def _on_task_completed(_source, event):
+    _end_current("task", output_tokens=count_tokens(event.output.raw))
+
+
+def _on_task_failed(_source, event):
+    _end_current("task", error=event.error)
+
+
+def _on_llm_started(source, event):
+    messages = event.messages
+    prompt = (
+        messages
+        if isinstance(messages, str)
+        else "".join(str(message.get("content", "")) for message in messages)
+    )
+    tracer.start_span(
+        "llm.call",
+        "llm",
+        source="event",
+        model=str(getattr(source, "model", "")),
+        endpoint=str(getattr(source, "base_url", "") or ""),
+        prompt_tokens=count_tokens(prompt),
+    )
+
+
+def _on_llm_completed(_source, event):
+    _end_current("llm", completion_tokens=count_tokens(str(event.response)))
+
+
+def _on_llm_failed(_source, event):
+    _end_current("llm", error=event.error)
+
+
+def _on_tool_started(_source, event):
+    tracer.start_span(
+        event.tool_name, "tool", source="event", agent=event.agent_role or ""
+    )
+
+
+def _on_tool_finished(_source, event):
+    _end_current("tool", from_cache=event.from_cache)
+
+
+def _on_tool_error(_source, event):
+    _end_current("tool", error=event.error)
+
+
+_listeners_registered = False
+
+
+def register_crewai_listeners():
+    """Subscribe the span handlers above to the crewai event bus (once per process)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    from crewai.utilities.events import crewai_event_bus
+    from crewai.utilities.events.llm_events import (
+        LLMCallCompletedEvent,
+        LLMCallFailedEvent,
+        LLMCallStartedEvent,
+    )
+    from crewai.utilities.events.task_events import (
+        TaskCompletedEvent,
+        TaskFailedEvent,
+        TaskStartedEvent,
+    )
+    from crewai.utilities.events.tool_usage_events import (
+        ToolUsageErrorEvent,
+        ToolUsageFinishedEvent,
+        ToolUsageStartedEvent,
+    )
+
+    for event_type, handler in [
+        (TaskStartedEvent, _on_task_started),
+        (TaskCompletedEvent, _on_task_completed),
+        (TaskFailedEvent, _on_task_failed),
+        (LLMCallStartedEvent, _on_llm_started),
+        (LLMCallCompletedEvent, _on_llm_completed),
+        (LLMCallFailedEvent, _on_llm_failed),
+        (ToolUsageStartedEvent, _on_tool_started),
+        (ToolUsageFinishedEvent, _on_tool_finished),
+        (ToolUsageErrorEvent, _on_tool_error),
+    ]:
+        crewai_event_bus.on(event_type)(handler)
+    _listeners_registered = True
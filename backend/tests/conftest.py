@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The backend modules are imported flat, as app.py does, and the benchmark stubs
+# from benchmarks/
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, "benchmarks"))
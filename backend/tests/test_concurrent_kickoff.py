@@ -0,0 +1,91 @@
+"""
+Overlapping runs must not see each other's outputs: N recommendations run
+concurrently against a stub LLM whose every answer is stamped with the request
+it was prompted with, and each result must hold only its own request's stamp.
+
+Needs the crew stack (crewai, crewai_tools); skipped without it.
+
+Run from backend/:
+    python -m pytest tests
+"""
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Offline and stateless: no warm-up, no on-disk caches or knowledge index
+os.environ.setdefault("CREW_PRODUCTION_MODE", "true")
+os.environ.setdefault("OLLAMA_WARM_UP", "false")
+os.environ.setdefault("SERPER_API_KEY", "offline-test")
+os.environ.setdefault("SEARCH_CACHE_BACKEND", "none")
+os.environ.setdefault("KNOWLEDGE_INDEX_PATH", "none")
+os.environ.setdefault("TASK_MEMO_BACKEND", "memory")
+
+pytest.importorskip("crewai")
+pytest.importorskip("crewai_tools")
+
+from stubs import StubSearchTool, canned_response  # noqa: E402
+
+import experts_crew_system  # noqa: E402
+from llm_provider import PooledLLM  # noqa: E402
+
+CONCURRENT_RUNS = 6
+LLM_LATENCY = 0.01
+
+_REQUEST = re.compile(r"tenant-\d+")
+_FIRST_HEADING = re.compile(r"# [^\n]*")
+
+REQUIREMENTS = {
+    "performance": "Standard",
+    "availability": "Fault tolerant",
+    "security_tier": "Basic",
+    "compliance": ["Standard"],
+    "cost_profile": "High-Budget",
+    "implementation_time": "Long (months)",
+    "required_expertise": "Intermediate",
+    "scalability": "High",
+    "ease_of_implementation": "Moderate",
+    "integration_complexity": "Moderate",
+}
+
+
+def stamped_call(_llm, messages, *_args, **_kwargs):
+    """The canned answer for the prompt, stamped with the request named in it."""
+    prompt = messages if isinstance(messages, str) else "\n".join(
+        str(message.get("content", "")) for message in messages)
+    request = _REQUEST.search(prompt).group(0)
+    time.sleep(LLM_LATENCY)
+    return _FIRST_HEADING.sub(lambda match: f"{match.group(0)}\n- Request: {request}",
+                              canned_response(prompt), count=1)
+
+
+@pytest.fixture
+def stub_backends(monkeypatch):
+    monkeypatch.setattr(PooledLLM, "_call_once", stamped_call)
+    monkeypatch.setattr(experts_crew_system.search_tool.layer, "search_tool",
+                        StubSearchTool(latency=LLM_LATENCY))
+
+
+@pytest.mark.usefixtures("stub_backends")
+def test_concurrent_runs_keep_their_own_outputs():
+    requests = [f"tenant-{i}" for i in range(CONCURRENT_RUNS)]
+
+    def run(request):
+        use_case = f"Order processing platform for {request}"
+        requirements = dict(REQUIREMENTS, use_case=use_case)
+        return experts_crew_system.create_aws_architecture_recommendation(requirements)
+
+    with ThreadPoolExecutor(max_workers=CONCURRENT_RUNS) as pool:
+        results = list(pool.map(run, requests))
+
+    for request, result in zip(requests, results, strict=True):
+        outputs = {
+            name: raw for name, raw in result["task_outputs"].items() if raw is not None
+        }
+        skipped = set(result["skipped_sections"])
+        assert outputs.keys() == set(experts_crew_system.PIPELINE_TASKS) - skipped
+        for name, raw in outputs.items():
+            assert set(_REQUEST.findall(raw)) == {request}, (
+                f"{name} of {request} holds another run's output")
@@ -0,0 +1,149 @@
+import os
+
+import pytest
+
+import pricing_engine
+from pricing_engine import (
+    HOURS_PER_MONTH,
+    _availability,
+    _count,
+    _memory_gb,
+    _profile_name,
+    estimate_costs,
+    estimate_from_output,
+    load_price_table,
+    usage_assumptions,
+    what_if,
+)
+from section_parser import AwsService
+
+
+@pytest.fixture(scope="module")
+def table():
+    directory = os.path.dirname(os.path.abspath(pricing_engine.__file__))
+    return load_price_table(os.path.join(directory, "aws_prices.json"))
+
+
+def service(name, configuration=None, category="Compute"):
+    return AwsService(category=category, service=name, configuration=configuration)
+
+
+def line_for(estimate, name):
+    return next(line for line in estimate["lines"] if line["priced_as"] == name)
+
+
+@pytest.mark.parametrize(("scalability", "profile"), [
+    ("Highly scalable", "high"),
+    ("Global", "high"),
+    ("Small", "low"),
+    ("Moderate", "medium"),
+    (None, "medium"),
+])
+def test_profile_name(scalability, profile):
+    assert _profile_name(scalability) == profile
+
+
+@pytest.mark.parametrize(("availability", "expected"), [
+    ("99.99%", (True, 3)),
+    ("99.95%", (True, 2)),
+    ("99.9%", (True, 2)),
+    ("99.5%", (False, 2)),
+    ("Standard", (True, 2)),
+    ("Fault tolerant", (True, 3)),
+    ("Low", (False, 2)),
+])
+def test_availability(availability, expected):
+    assert _availability(availability) == expected
+
+
+def test_usage_scales_with_the_user_count(table):
+    base = usage_assumptions(table, {"scalability": "Moderate"})
+    use_case = "Booking site for 250k monthly active users"
+    scaled = usage_assumptions(table, {"scalability": "Moderate", "use_case": use_case})
+    assert scaled["users"] == 250_000
+    for name in ("requests_millions", "data_transfer_gb", "data_processed_gb"):
+        assert scaled[name] == pytest.approx(base[name] * 2.5)
+    assert scaled["storage_gb"] == base["storage_gb"]
+    millions = usage_assumptions(table, {"use_case": "2 million customers"})
+    assert millions["users"] == 2_000_000
+
+
+@pytest.mark.parametrize(("configuration", "count"), [
+    ("Auto Scaling group, min 3, max 10", 3),
+    ("2-10 tasks behind an ALB", 2),
+    ("3 r6g.large nodes", 3),
+    ("4 GB tasks", None),
+    ("2x m5.large", 2),
+    ("", None),
+])
+def test_count(configuration, count):
+    assert _count(configuration) == count
+
+
+def test_memory_gb():
+    assert _memory_gb("1 vCPU, 2048 MB") == 2
+    assert _memory_gb("0.5 vCPU / 4 GB") == 4
+    assert _memory_gb("1 vCPU") is None
+
+
+def test_fargate_is_priced_per_task_vcpu_and_memory(table):
+    fargate = service("AWS Fargate", "2 tasks, 2 vCPU, 8 GB")
+    estimate = estimate_costs(table, [fargate], {})
+    line = line_for(estimate, "AWS Fargate")
+    dimensions = estimate["dimensions"]
+    usage = dict(zip(dimensions, line["usage"], strict=True))
+    assert (line["instance_type"], line["instances"]) == ("2 vcpu", 2)
+    assert usage["hours"] == 2 * HOURS_PER_MONTH
+    assert usage["memory_gb_hours"] == 2 * 8 * HOURS_PER_MONTH
+    ecs = service("ECS on Fargate", "4 tasks")
+    default = line_for(estimate_costs(table, [ecs], {}), "AWS Fargate")
+    default_usage = dict(zip(dimensions, default["usage"], strict=True))
+    assert default["instance_type"] == "1 vcpu"
+    assert default_usage["memory_gb_hours"] == 4 * 2 * HOURS_PER_MONTH
+
+
+def test_multi_az_databases_get_a_standby(table):
+    rds = [service("Amazon RDS for PostgreSQL", "db.r6g.large", category="Database")]
+    multi_az, single_az = (
+        line_for(estimate_costs(table, rds, {"availability": percent}), "Amazon RDS")
+        for percent in ("99.9%", "99.5%")
+    )
+    assert (multi_az["multi_az"], multi_az["instances"]) == (True, 2)
+    assert (single_az["multi_az"], single_az["instances"]) == (False, 1)
+    assert multi_az["monthly_usd"] > single_az["monthly_usd"]
+
+
+def test_unknown_services_are_listed_unpriced(table):
+    services = [service("Acme Queue"), service("EC2 + Lambda")]
+    estimate = estimate_costs(table, services, {})
+    assert estimate["unpriced"] == ["Acme Queue"]
+    priced = [line["priced_as"] for line in estimate["lines"]]
+    assert priced == ["Amazon EC2", "AWS Lambda"]
+    assert estimate["total_monthly_usd"] == pytest.approx(
+        sum(line["monthly_usd"] for line in estimate["lines"]), abs=0.02)
+
+
+def test_what_if_scenarios(table):
+    services = [service("EC2", "2x m5.large"), service("Lambda")]
+    estimate = estimate_costs(table, services, {})
+    same, reserved, traffic = what_if(estimate, [
+        {},
+        {"name": "reserved", "pricing_model": "reserved_1yr"},
+        {"usage_multipliers": {"requests_millions": 2}},
+    ])
+    assert same["change_usd"] == 0
+    ec2 = line_for(estimate, "Amazon EC2")["monthly_usd"]
+    assert reserved["services"]["Amazon EC2"] < ec2
+    assert reserved["services"]["AWS Lambda"] == same["services"]["AWS Lambda"]
+    assert traffic["services"]["Amazon EC2"] == same["services"]["Amazon EC2"]
+    assert traffic["services"]["AWS Lambda"] > same["services"]["AWS Lambda"]
+    with pytest.raises(ValueError):
+        what_if(estimate, [{"usage_multipliers": {"bananas": 2}}])
+    with pytest.raises(ValueError):
+        what_if(estimate, [{"pricing_model": "free"}])
+
+
+def test_estimate_from_output(table):
+    output = "<aws_services># Compute\n- Service: AWS Lambda\n</aws_services>"
+    assert line_for(estimate_from_output(table, output, {}), "AWS Lambda")
+    assert estimate_from_output(table, "no services", {}) is None
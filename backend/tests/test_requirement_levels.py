@@ -0,0 +1,31 @@
+import pytest
+
+from requirement_levels import availability_percent, requirement_level
+
+
+@pytest.mark.parametrize(("value", "level"), [
+    ("High", "high"),
+    ("Highly scalable", "high"),
+    ("Mission critical", "high"),
+    ("Budget", "low"),
+    ("Basic", "low"),
+    ("Standard", "medium"),
+    ("Default", "medium"),
+    (None, "medium"),
+])
+def test_requirement_level(value, level):
+    assert requirement_level(value) == level
+
+
+@pytest.mark.parametrize(("value", "percent"), [
+    ("99.95%", 99.95),
+    ("Basic, 99.5 %", 99.5),
+    ("Fault tolerant", 99.99),
+    ("Highly available", 99.99),
+    ("Standard", 99.9),
+    ("Medium", 99.9),
+    (None, 99.9),
+    ("Low", 99.0),
+])
+def test_availability_percent(value, percent):
+    assert availability_percent(value) == percent
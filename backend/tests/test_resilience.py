@@ -0,0 +1,141 @@
+import contextvars
+from types import SimpleNamespace
+
+import pytest
+
+import resilience
+from resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    degradation_reasons,
+    parse_seconds_overrides,
+    report_degraded,
+    track_degradations,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock in place of time.monotonic() and time.sleep() in resilience."""
+    now = SimpleNamespace(value=100.0, slept=[])
+
+    def sleep(seconds):
+        now.slept.append(seconds)
+        now.value += seconds
+
+    fake_time = SimpleNamespace(monotonic=lambda: now.value, sleep=sleep)
+    monkeypatch.setattr(resilience, "time", fake_time)
+    return now
+
+
+def fail():
+    raise ConnectionError("down")
+
+
+@pytest.mark.usefixtures("clock")
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("search", failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+    assert breaker.stats() == {"state": "open", "consecutive_failures": 2}
+
+
+@pytest.mark.usefixtures("clock")
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("search", failure_threshold=2)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker("search", failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    clock.value += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_opens_the_breaker_again(clock):
+    breaker = CircuitBreaker("search", failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    clock.value += 31
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == "open"
+    clock.value += 29
+    assert breaker.state == "open"
+    clock.value += 1
+    assert breaker.state == "half_open"
+
+
+def test_retry_policy_retries_until_success(clock):
+    calls, retries = [], []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TimeoutError
+        return "ok"
+
+    policy = RetryPolicy(attempts=3, base_delay=1, max_delay=4)
+    result = policy.call(flaky, on_retry=lambda attempt, _: retries.append(attempt))
+    assert result == "ok"
+    assert retries == [1, 2]
+    assert len(clock.slept) == 2 and all(0 <= delay <= 4 for delay in clock.slept)
+
+
+@pytest.mark.usefixtures("clock")
+def test_retry_policy_gives_up_and_skips_other_errors():
+    policy = RetryPolicy(attempts=2, base_delay=0)
+    with pytest.raises(ConnectionError):
+        policy.call(fail)
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        policy.call(bad_request, retry_on=(ConnectionError,))
+    assert len(calls) == 1
+
+
+def test_open_circuit_is_not_retried(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=1)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    with pytest.raises(CircuitOpenError):
+        RetryPolicy(attempts=5).call(breaker.call, fail)
+    assert clock.slept == []
+
+
+def test_degradations_are_collected_per_run():
+    def run():
+        reasons = track_degradations()
+        report_degraded("search unavailable")
+        report_degraded("search unavailable")
+        return reasons, degradation_reasons()
+
+    reasons, seen = contextvars.copy_context().run(run)
+    assert reasons == seen == ["search unavailable"]
+    assert contextvars.copy_context().run(degradation_reasons) == []
+
+
+def test_parse_seconds_overrides():
+    parsed = parse_seconds_overrides("cost_optimization=30, final_synthesis = 90.5,bad")
+    assert parsed == {"cost_optimization": 30.0, "final_synthesis": 90.5}
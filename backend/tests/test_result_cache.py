@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+import result_cache
+from result_cache import (
+    MemoryCacheBackend,
+    ResultCache,
+    SQLiteCacheBackend,
+    canonical_requirements,
+    create_result_cache,
+    requirements_key,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock in place of time.time() in result_cache."""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_requirements_key_ignores_case_whitespace_and_compliance_order():
+    a = {"use_case": "  Online   Store ", "compliance": ["PCI", "gdpr"], "notes": None}
+    b = {"use_case": "online store", "compliance": "GDPR, pci"}
+    canonical = canonical_requirements(b)
+    assert canonical == {"use_case": "online store", "compliance": ["gdpr", "pci"]}
+    assert requirements_key(a) == requirements_key(b)
+    assert requirements_key(a) != requirements_key(dict(b, use_case="online shop"))
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, 0)
+    backend.set("b", 2, 0)
+    backend.get("a")
+    assert backend.set("c", 3, 0) == 1
+    assert backend.get("b") is None
+    assert backend.get("a") == (1, 0)
+    assert len(backend) == 2
+
+
+def test_sqlite_backend_evicts_least_recently_used(tmp_path, clock):
+    backend = SQLiteCacheBackend(path=str(tmp_path / "cache.sqlite3"), max_entries=2)
+    backend.set("a", {"v": 1}, clock.value)
+    clock.value += 1
+    backend.set("b", {"v": 2}, clock.value)
+    clock.value += 1
+    backend.get("a")
+    clock.value += 1
+    assert backend.set("c", {"v": 3}, clock.value) == 1
+    assert backend.get("b") is None
+    assert backend.get("a")[0] == {"v": 1}
+
+
+def test_sqlite_backend_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    create_result_cache("sqlite", path=path).set({"use_case": "Store"}, {"answer": 42})
+    reopened = create_result_cache("sqlite", path=path)
+    assert reopened.get({"use_case": "store "}) == {"answer": 42}
+    assert reopened.stats()["entries"] == 1
+
+
+def test_expired_entries_are_misses_and_dropped(clock):
+    cache = ResultCache(MemoryCacheBackend(), ttl=60)
+    cache.store("key", "value")
+    clock.value += 59
+    assert cache.lookup("key") == "value"
+    clock.value += 2
+    assert cache.lookup("key") is None
+    assert len(cache.backend) == 0
+    assert cache.stats() | {"backend": None} == {
+        "backend": None, "entries": 0, "hits": 1, "misses": 1, "hit_rate": 0.5,
+        "evictions": 0, "expirations": 1,
+    }
+
+
+def test_evictions_are_counted():
+    cache = create_result_cache("memory", max_entries=1)
+    cache.store("a", 1)
+    cache.store("b", 2)
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("a") is None
+
+
+def test_create_result_cache_backends(tmp_path):
+    assert create_result_cache("none") is None
+    assert isinstance(create_result_cache("memory").backend, MemoryCacheBackend)
+    sqlite = create_result_cache("sqlite", path=str(tmp_path / "c.sqlite3"))
+    assert isinstance(sqlite.backend, SQLiteCacheBackend)
+    with pytest.raises(ValueError):
+        create_result_cache("redis")
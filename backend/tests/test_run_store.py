@@ -0,0 +1,33 @@
+import sqlite3
+
+from run_store import RunStore
+
+
+def test_batch_requirements_are_kept_with_the_run(tmp_path):
+    store = RunStore(path=str(tmp_path / "runs.sqlite3"))
+    batch = {"use_case": "store", "cost_profile": "Budget or High-Budget"}
+    batch_run = store.create({"use_case": "store"}, batch_requirements=batch)
+    single_run = store.create({"use_case": "store"})
+    assert store.get(batch_run)["batch_requirements"] == batch
+    assert store.get(single_run)["batch_requirements"] is None
+
+
+def test_older_run_files_are_migrated(tmp_path):
+    path = str(tmp_path / "runs.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE runs (run_id TEXT PRIMARY KEY, user_id TEXT, status TEXT NOT "
+            "NULL, "
+            "cached INTEGER NOT NULL DEFAULT 0, requirements TEXT NOT NULL, result "
+            "TEXT, "
+            "error TEXT, trace_id TEXT, created_at REAL NOT NULL, started_at REAL, "
+            "finished_at REAL)"
+        )
+        conn.execute(
+            "INSERT INTO runs (run_id, status, requirements, created_at) "
+            "VALUES ('old', 'running', '{}', 0)"
+        )
+    store = RunStore(path=path)
+    assert store.get("old")["batch_requirements"] is None
+    assert store.interrupt_unfinished(lease=60) == 1
+    assert store.requeue("old")
@@ -0,0 +1,122 @@
+import contextvars
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("crewai")
+
+import search_tools  # noqa: E402
+from resilience import CircuitBreaker, CircuitOpenError, track_degradations  # noqa: E402
+from result_cache import create_result_cache  # noqa: E402
+from search_tools import (  # noqa: E402
+    MISSING_QUERY,
+    SEARCH_UNAVAILABLE,
+    CachedSearchTool,
+    SearchLayer,
+    TokenBucket,
+)
+
+
+class Upstream:
+    """A search tool counting its calls; it blocks on release when one is given."""
+
+    def __init__(self, release=None, error=None):
+        self.calls = []
+        self.release = release
+        self.error = error
+
+    def run(self, search_query, **kwargs):
+        self.calls.append((search_query, kwargs))
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return {"organic": [{"title": f"Result for {search_query}"}]}
+
+
+def test_token_bucket_allows_a_burst_then_paces(monkeypatch):
+    now = SimpleNamespace(value=0.0)
+
+    def sleep(seconds):
+        now.value += seconds
+
+    monkeypatch.setattr(search_tools, "time", SimpleNamespace(
+        monotonic=lambda: now.value, sleep=sleep, perf_counter=time.perf_counter))
+    bucket = TokenBucket(rate=2, capacity=2)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+    now.value += 10
+    assert bucket.acquire() == 0.0
+
+
+def test_results_are_cached_per_normalized_query():
+    upstream = Upstream()
+    layer = SearchLayer(upstream, cache=create_result_cache("memory"))
+    first = layer.search("AWS  Fargate pricing")
+    assert layer.search("aws fargate PRICING") == first
+    layer.search("aws fargate pricing", search_type="news")
+    assert len(upstream.calls) == 2
+    stats = layer.stats()
+    counts = (stats["requests"], stats["cache_hits"], stats["upstream_calls"])
+    assert counts == (3, 1, 2)
+
+
+def test_concurrent_identical_queries_share_one_upstream_call():
+    release = threading.Event()
+    upstream = Upstream(release=release)
+    layer = SearchLayer(upstream)
+    results = []
+
+    def search():
+        results.append(layer.search("aws lambda limits"))
+
+    threads = [threading.Thread(target=search) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while layer.stats()["coalesced"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(upstream.calls) == 1
+    assert len(results) == 3 and all(result == results[0] for result in results)
+
+
+def test_open_breaker_refuses_searches_without_calling_upstream():
+    upstream = Upstream(error=ConnectionError("serper down"))
+    breaker = CircuitBreaker("search", failure_threshold=1, reset_timeout=60)
+    layer = SearchLayer(upstream, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        layer.search("aws waf")
+    assert not layer.available
+    with pytest.raises(CircuitOpenError):
+        layer.search("aws shield")
+    assert len(upstream.calls) == 1
+    assert layer.stats()["breaker_rejections"] == 1
+
+
+def test_tool_rejects_a_missing_query():
+    upstream = Upstream()
+    tool = CachedSearchTool(layer=SearchLayer(upstream))
+    assert tool._run() == MISSING_QUERY
+    assert tool._run(search_query="   ") == MISSING_QUERY
+    assert upstream.calls == []
+
+
+def test_tool_reports_search_unavailable_while_the_breaker_is_open():
+    breaker = CircuitBreaker("search", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    tool = CachedSearchTool(layer=SearchLayer(Upstream(), breaker=breaker))
+
+    def run():
+        reasons = track_degradations()
+        return tool._run(search_query="aws kms"), reasons
+
+    answer, reasons = contextvars.copy_context().run(run)
+    assert answer == SEARCH_UNAVAILABLE
+    assert reasons == ["search unavailable"]
+    assert not tool.available
@@ -0,0 +1,106 @@
+import pytest
+
+from section_parser import (
+    SectionParser,
+    extract_assessment_scores,
+    extract_sections,
+    parse_bullets,
+    parse_monthly_amount,
+    parse_task_outputs,
+    validate_section,
+)
+
+
+@pytest.mark.parametrize(("text", "expected"), [
+    ("$1,200/month", (1200, 1200)),
+    ("~$1.5k", (1500, 1500)),
+    ("$300 - $450", (300, 450)),
+    ("$300 to $450 per year", (25, 37.5)),
+    ("$2,400 per year", (200, 200)),
+    ("Annual: $14,400", (1200, 1200)),
+    ("$0.10/hr", (73, 73)),
+    ("$300/month ($0.41 per hour)", (300, 300)),
+    ("$1,200/month (annual $14,400)", (1200, 1200)),
+    ("$0.10 per hour, about $73/month", (73, 73)),
+    ("free tier", (None, None)),
+])
+def test_parse_monthly_amount(text, expected):
+    assert parse_monthly_amount(text) == pytest.approx(expected)
+
+
+def test_section_parser_handles_tags_split_across_chunks():
+    parser = SectionParser(["aws_services"])
+    completed = []
+    chunks = ["<aws_", "services>- Service: ECS</aws", "_services> <other>x</other>"]
+    for chunk in chunks:
+        completed += parser.feed(chunk)
+    assert completed == [("aws_services", "- Service: ECS")]
+    assert parser.close() == []
+
+
+def test_unclosed_section_is_flushed_on_close():
+    assert extract_sections("<cost_optimization>- Total: $10") == {
+        "cost_optimization": "- Total: $10"}
+
+
+def test_parse_bullets_groups_by_heading():
+    body = (
+        "# Compute\n- **Service**: ECS\n  on Fargate\n- plain bullet\n"
+        "## Data\n1. Store: S3"
+    )
+    headings = parse_bullets(body)
+    assert list(headings) == ["Compute", "Data"]
+    service, plain = headings["Compute"]
+    assert (service.key, service.value) == ("Service", "ECS\non Fargate")
+    assert (plain.key, plain.value) == (None, "plain bullet")
+    assert headings["Data"][0].key == "Store"
+
+
+def test_extract_assessment_scores_clamps_and_falls_back():
+    block = (
+        '<assessment_scores>{"security_requirements": 7, "data_complexity": "2"}'
+        "</assessment_scores>"
+    )
+    assert extract_assessment_scores(block) == {
+        "security_requirements": 5.0, "data_complexity": 2.0}
+    fallback = extract_assessment_scores("devops_complexity: 0.5")
+    assert fallback == {"devops_complexity": 1.0}
+    assert extract_assessment_scores("no scores") == {}
+
+
+def test_validate_section_requires_the_closed_tag():
+    assert validate_section("aws_service_selection", "<aws_services>- x</aws_services>")
+    assert not validate_section("aws_service_selection", "<aws_services>- x")
+    assert validate_section("final_synthesis", "anything")
+
+
+def test_parse_task_outputs_builds_the_typed_models():
+    outputs = {
+        "requirements_analysis": (
+            '<assessment_scores>{"data_complexity": 3}</assessment_scores>'),
+        "aws_service_selection": (
+            "<aws_services># Compute\n- Service: ECS\n"
+            "- Configuration: Fargate 2 tasks\n"
+            "- Purpose: API\n</aws_services>"),
+        "cost_optimization": (
+            "<cost_optimization># Cost estimates\n"
+            "- Compute: $300/month ($0.41 per hour)\n"
+            "- Storage: $100 - $200\n</cost_optimization>"),
+        "architecture_validation": (
+            "<architecture_validation># Reliability\n- Score: 4\n"
+            "- Gaps: no DR; single region\n</architecture_validation>"),
+        "security_architecture": "no tags here",
+    }
+    structured = parse_task_outputs(outputs)
+    assert structured.assessment_scores == {"data_complexity": 3.0}
+    service = structured.aws_services.services[0]
+    fields = (service.category, service.service, service.configuration, service.purpose)
+    assert fields == ("Compute", "ECS", "Fargate 2 tasks", "API")
+    cost = structured.cost_optimization
+    assert [line.monthly_usd for line in cost.estimates] == [300, 150]
+    assert cost.total_monthly_usd == 450
+    pillar = structured.architecture_validation.pillars[0]
+    assert (pillar.pillar, pillar.score, pillar.gaps) == (
+        "Reliability", 4.0, ["no DR", "single region"])
+    assert structured.security_architecture is None
+    assert structured.software_architecture is None
@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import semantic_cache
+from semantic_cache import (
+    SemanticCache,
+    TfidfEmbedder,
+    create_semantic_cache,
+    use_case_quantities,
+)
+
+REQUIREMENTS = {"use_case": "online store for 1000 users", "cost_profile": "Budget"}
+RESULT = {"assessment_scores": {"data_complexity": 3.0}, "skipped_sections": []}
+
+
+def tfidf_cache(threshold=0.5, **kwargs):
+    kwargs.setdefault("rng", np.random.default_rng(0))
+    return SemanticCache(TfidfEmbedder(), threshold=threshold, **kwargs)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock in place of time.time() in semantic_cache."""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(semantic_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_quantities_are_normalized():
+    assert use_case_quantities("10k users") == use_case_quantities("10,000 Users")
+    assert use_case_quantities("1.5M RPS at peak") == ["1.5e+06 rps"]
+    assert use_case_quantities("serving millions of users") == ["million"]
+    assert use_case_quantities("a t3.medium web shop") == []
+
+
+def test_reworded_use_case_is_a_hit():
+    cache = tfidf_cache()
+    cache.add(REQUIREMENTS, RESULT)
+    found = cache.lookup(dict(REQUIREMENTS, use_case="an online store for 1,000 users"))
+    assert found is not None
+    result, match = found
+    assert result == RESULT
+    assert match["use_case"] == "online store for 1000 users"
+
+
+def test_different_numbers_never_match():
+    cache = tfidf_cache()
+    cache.add(REQUIREMENTS, RESULT)
+    for use_case in ["online store for 10000000 users", "online store for 1000 rps",
+                     "online store for millions of users"]:
+        assert cache.lookup(dict(REQUIREMENTS, use_case=use_case)) is None
+
+
+def test_other_fields_must_match_exactly():
+    cache = tfidf_cache()
+    cache.add(REQUIREMENTS, RESULT)
+    assert cache.lookup(dict(REQUIREMENTS, cost_profile="High-Budget")) is None
+    assert cache.lookup(dict(REQUIREMENTS, compliance=["PCI"])) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_served_entry_is_evicted():
+    cache = tfidf_cache(threshold=0.99, max_entries=2)
+    stores = [f"{kind} store for 1000 users" for kind in ("book", "shoe", "toy")]
+    cache.add(dict(REQUIREMENTS, use_case=stores[0]), {"n": 0})
+    cache.add(dict(REQUIREMENTS, use_case=stores[1]), {"n": 1})
+    cache.lookup(dict(REQUIREMENTS, use_case=stores[0]))
+    cache.add(dict(REQUIREMENTS, use_case=stores[2]), {"n": 2})
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup(dict(REQUIREMENTS, use_case=stores[0]))[0] == {"n": 0}
+    assert cache.lookup(dict(REQUIREMENTS, use_case=stores[1])) is None
+
+
+def test_entries_expire(clock):
+    cache = tfidf_cache(ttl=60)
+    cache.add(REQUIREMENTS, RESULT)
+    clock.value += 61
+    assert cache.lookup(REQUIREMENTS) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_false_hit_audit_evicts_the_entry():
+    cache = tfidf_cache(audit_rate=1.0)
+    cache.add(REQUIREMENTS, RESULT)
+    result, match = cache.lookup(REQUIREMENTS)
+    assert match["audit"]
+    fresh = {"assessment_scores": {"data_complexity": 5.0}, "skipped_sections": []}
+    assert cache.record_audit(REQUIREMENTS, match, result, fresh)["false_hit"]
+    assert cache.lookup(REQUIREMENTS) is None
+    assert cache.stats()["false_hit_rate"] == 1.0
+
+
+def test_auto_is_off_without_sentence_transformers(monkeypatch):
+    monkeypatch.setattr(semantic_cache.importlib.util, "find_spec", lambda _name: None)
+    assert create_semantic_cache("auto") is None
+    assert create_semantic_cache("none") is None
+    assert isinstance(create_semantic_cache("tfidf").embedder, TfidfEmbedder)
+
+
+def test_cache_turns_off_when_the_model_fails_to_load():
+    class Broken:
+        name = "model"
+        default_threshold = 0.85
+
+        def prepare(self, _text):
+            raise OSError("model not found")
+
+    cache = SemanticCache(Broken())
+    cache.add(REQUIREMENTS, RESULT)
+    assert cache.lookup(REQUIREMENTS) is None
+    assert cache.stats()["entries"] == 0
+    assert "model not found" in cache.stats()["error"]
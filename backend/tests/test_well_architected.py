@@ -0,0 +1,156 @@
+import json
+import os
+
+import pytest
+
+import well_architected
+from well_architected import RuleSet, format_precheck, load_rule_set
+
+DIRECTORY = os.path.dirname(os.path.abspath(well_architected.__file__))
+RULES_PATH = os.path.join(DIRECTORY, "well_architected_rules.json")
+with open(RULES_PATH) as f:
+    RULES = json.load(f)
+
+# Per rule: the requirements it applies under, the text of its section that passes
+# and the text that fails it, and optionally requirements and text under which it
+# does not apply at all
+CASES = {
+    "REL-MULTI-AZ": (
+        {"availability": "99.9%"}, "RDS Multi-AZ", "RDS single instance",
+        ({"availability": "99.5%"}, "RDS single instance"),
+    ),
+    "REL-MULTI-REGION": (
+        {"availability": "99.99%"}, "warm standby in a secondary region", "one region",
+        ({"availability": "99.9%"}, "one region"),
+    ),
+    "REL-BACKUP": ({}, "daily snapshots", "no copies", None),
+    "REL-DLQ": ({}, "SQS queue with a DLQ", "SQS queue", ({}, "REST calls")),
+    "REL-RETRIES": ({}, "retries with backoff", "direct calls", None),
+    "REL-HEALTH-CHECKS": ({}, "ALB with health checks", "ALB in front", ({}, "Lambda")),
+    "SEC-KMS": (
+        {"security_tier": "High"}, "KMS keys", "encrypted volumes",
+        ({"security_tier": "Standard"}, "encrypted volumes"),
+    ),
+    "SEC-ENCRYPTION-TRANSIT": ({}, "TLS 1.2 everywhere", "firewalls", None),
+    "SEC-LEAST-PRIVILEGE": ({}, "least privilege IAM policies", "admin users", None),
+    "SEC-AUDIT-LOGGING": ({}, "CloudTrail in all regions", "application logs", None),
+    "SEC-THREAT-DETECTION": (
+        {"security_tier": "High"}, "GuardDuty", "firewalls",
+        ({"security_tier": "Standard"}, "firewalls"),
+    ),
+    "SEC-WAF": (
+        {}, "CloudFront with AWS WAF", "CloudFront",
+        ({"security_tier": "Basic"}, "CloudFront"),
+    ),
+    "SEC-SECRETS": (
+        {}, "RDS with credentials in Secrets Manager", "RDS", ({}, "S3 bucket"),
+    ),
+    "SEC-PCI-SCOPE": (
+        {"compliance": ["PCI"]}, "tokenization of card numbers", "encryption",
+        ({}, "encryption"),
+    ),
+    "SEC-HIPAA-PHI": (
+        {"compliance": ["HIPAA"]}, "PHI stays in HIPAA eligible services", "encryption",
+        ({}, "encryption"),
+    ),
+    "OPS-IAC": ({}, "Terraform modules", "console changes", None),
+    "OPS-CICD": ({}, "CodePipeline", "manual deploys", None),
+    "OPS-SAFE-DEPLOYMENTS": ({}, "blue/green deployments", "deploys", None),
+    "OPS-OBSERVABILITY": ({}, "CloudWatch metrics", "nothing", None),
+    "OPS-ALARMS": ({}, "alarms on errors", "dashboards", None),
+    "PERF-CACHING": ({"performance": "High"}, "ElastiCache Redis", "RDS", ({}, "RDS")),
+    "PERF-AUTOSCALING": (
+        {}, "Fargate service", "EC2 instances",
+        ({"scalability": "Low"}, "EC2 instances"),
+    ),
+    "PERF-LOAD-TESTING": (
+        {"performance": "High"}, "load tests before release", "unit tests",
+        ({}, "unit tests"),
+    ),
+    "COST-PRICING-MODELS": ({}, "Compute Savings Plans", "on-demand", None),
+    "COST-BUDGETS": ({}, "AWS Budgets", "monthly reviews", None),
+    "COST-ALLOCATION-TAGS": ({}, "cost allocation tags", "monthly reviews", None),
+    "COST-STORAGE-LIFECYCLE": (
+        {}, "S3 lifecycle rules to Glacier", "S3 bucket", ({}, "EBS volumes"),
+    ),
+    "COST-BUDGET-PROFILE": (
+        {"cost_profile": "Budget"}, "single region", "active-active regions",
+        ({"cost_profile": "High-Budget"}, "active-active regions"),
+    ),
+}
+
+
+def single_rule(rule_id):
+    rule = next(rule for rule in RULES["rules"] if rule["id"] == rule_id)
+    data = {"version": RULES["version"], "pillars": RULES["pillars"], "rules": [rule]}
+    return rule, RuleSet(data)
+
+
+def outputs(rule, text):
+    return {(rule.get("in") or ["aws_service_selection"])[0]: text}
+
+
+def test_every_rule_has_a_case():
+    assert set(CASES) == {rule["id"] for rule in RULES["rules"]}
+
+
+@pytest.mark.parametrize("rule_id", sorted(CASES))
+def test_rule_passes_and_fails(rule_id):
+    requirements, passing, failing, _ = CASES[rule_id]
+    rule, rules = single_rule(rule_id)
+    assessment = rules.evaluate(outputs(rule, passing), requirements)
+    assert (assessment["passed"], assessment["findings"]) == ([rule_id], [])
+    assessment = rules.evaluate(outputs(rule, failing), requirements)
+    assert assessment["passed"] == []
+    assert [finding["rule"] for finding in assessment["findings"]] == [rule_id]
+    pillar = assessment["pillars"][rule["pillar"]]
+    assert pillar["score"] == 5.0 - rule["severity"]
+
+
+GATED = sorted(rule_id for rule_id, case in CASES.items() if case[3] is not None)
+
+
+@pytest.mark.parametrize("rule_id", GATED)
+def test_rule_does_not_apply(rule_id):
+    requirements, text = CASES[rule_id][3]
+    rule, rules = single_rule(rule_id)
+    assessment = rules.evaluate(outputs(rule, text), requirements)
+    assert (assessment["passed"], assessment["findings"]) == ([], [])
+    assert assessment["pillars"][rule["pillar"]]["score"] is None
+
+
+def test_compliance_also_requires_kms():
+    rule, rules = single_rule("SEC-KMS")
+    requirements = {"compliance": "PCI DSS"}
+    assessment = rules.evaluate(outputs(rule, "encrypted volumes"), requirements)
+    assert [finding["rule"] for finding in assessment["findings"]] == ["SEC-KMS"]
+
+
+def test_rules_on_missing_sections_are_unchecked():
+    rules = load_rule_set(RULES_PATH)
+    assessment = rules.evaluate({"cost_optimization": "Savings Plans"}, {})
+    assert "OPS-IAC" in assessment["unchecked"]
+    assert "COST-PRICING-MODELS" in assessment["passed"]
+
+
+def test_pillar_score_floor_and_precheck_block():
+    rules = RuleSet({"version": "t", "pillars": ["Security", "Reliability"], "rules": [
+        {"id": f"SEC-{n}", "pillar": "Security", "severity": 3, "require_any": [term],
+         "title": f"No {term}", "recommendation": f"Add {term}"}
+        for n, term in enumerate(["kms", "waf"])
+    ]})
+    task_outputs = {"security_architecture": "<security_architecture>IAM"}
+    assessment = rules.evaluate(task_outputs, {})
+    security = assessment["pillars"]["Security"]
+    assert security == {"score": 1.0, "checked": 2, "failed": 2}
+    assert assessment["pillars"]["Reliability"]["score"] is None
+    block = format_precheck(assessment)
+    assert "- Score: 1/5 (0 of 2 checks passed)" in block
+    assert "- Gap (SEC-0): No kms. Recommendation: Add kms" in block
+
+
+def test_rule_set_validation_and_loading(tmp_path):
+    with pytest.raises(ValueError):
+        RuleSet({"pillars": ["Security"], "rules": [{"id": "X", "pillar": "Cost"}]})
+    assert load_rule_set("none") is None
+    assert load_rule_set(str(tmp_path / "missing.json")) is None
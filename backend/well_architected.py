@@ -0,0 +1,217 @@
+"""
+Deterministic Well-Architected checks of a run's upstream sections, so the
+architecture validator does not spend its LLM pass on mechanical findings
+(single-AZ under a 99.99% target, no KMS under a strict security tier, no DLQs
+on asynchronous integrations, ...).
+
+The rules are declarative (well_architected_rules.json, WA_RULES_PATH). Each
+rule is gated by conditions on the requirements and on what the architecture
+mentions ("when"). It fails when none of its required terms appears, or one of
+its forbidden terms does, in the sections it looks at ("in", default all).
+Terms are matched as whole words, or as word prefixes when they end in "*".
+Every pillar starts at 5 and loses the severity of each failed rule, down to 1;
+a pillar none of whose rules could be checked gets no score.
+Rules whose sections are all missing (skipped experts) are reported unchecked.
+"""
+import json
+import os
+import re
+import time
+
+from requirement_levels import availability_percent, requirement_level
+from section_parser import SECTION_TAGS, extract_sections
+
+
+def _terms_pattern(terms):
+    alternatives = [
+        re.escape(term[:-1].lower())
+        if term.endswith("*")
+        else re.escape(term.lower()) + r"(?![a-z0-9])"
+        for term in terms
+    ]
+    return (
+        re.compile(r"(?<![a-z0-9])(?:" + "|".join(alternatives) + ")")
+        if alternatives
+        else None
+    )
+
+
+class RuleSet:
+    """A compiled rule set file: the pillars and their rules."""
+
+    def __init__(self, data, source=None):
+        self.source = source
+        self.version = data.get("version")
+        self.pillars = data["pillars"]
+        self.rules = []
+        for rule in data["rules"]:
+            if rule["pillar"] not in self.pillars:
+                raise ValueError(
+                    f"Rule {rule['id']} is for unknown pillar '{rule['pillar']}'"
+                )
+            self.rules.append(dict(
+                rule,
+                when=self._compile_conditions(rule.get("when", {})),
+                require=_terms_pattern(rule.get("require_any", [])),
+                forbid=_terms_pattern(rule.get("forbid_any", [])),
+            ))
+
+    def _compile_conditions(self, when):
+        compiled = dict(when)
+        if "mentions_any" in when:
+            compiled["mentions_any"] = _terms_pattern(when["mentions_any"])
+        if "any" in when:
+            compiled["any"] = [
+                self._compile_conditions(alternative) for alternative in when["any"]
+            ]
+        return compiled
+
+    def _applies(self, when, facts, everything):
+        for condition, expected in when.items():
+            if condition == "any":
+                holds = any(
+                    self._applies(alternative, facts, everything)
+                    for alternative in expected
+                )
+            elif condition == "availability_at_least":
+                holds = facts["availability"] >= expected
+            elif condition == "compliance_any":
+                holds = any(
+                    term in item for term in expected for item in facts["compliance"]
+                )
+            elif condition == "mentions_any":
+                holds = expected.search(everything) is not None
+            elif condition.endswith("_in"):
+                holds = facts[condition[:-3]] in expected
+            else:
+                raise ValueError(f"Unknown rule condition '{condition}'")
+            if not holds:
+                return False
+        return True
+
+    def evaluate(self, task_outputs, requirements):
+        """
+        Check the raw task outputs of a run (section name -> output) against the rules.
+
+        Returns:
+            Per pillar its score and counts, the findings of the failed rules, and
+            the ids of the rules that passed or could not be checked
+        """
+        started = time.perf_counter()
+        texts = {}
+        for section, raw in task_outputs.items():
+            if raw:
+                tag = SECTION_TAGS.get(section)
+                body = (
+                    extract_sections(raw, [tag]).get(tag)
+                    if tag and tag != "assessment_scores"
+                    else None
+                )
+                texts[section] = (body if body is not None else raw).lower()
+        everything = "\n".join(texts.values())
+        compliance = requirements.get("compliance") or []
+        if not isinstance(compliance, list):
+            compliance = [compliance]
+        facts = {
+            "availability": availability_percent(requirements.get("availability")),
+            "compliance": [str(item).lower() for item in compliance],
+            "security_tier": requirement_level(requirements.get("security_tier")),
+            "performance": requirement_level(requirements.get("performance")),
+            "scalability": requirement_level(requirements.get("scalability")),
+            "cost_profile": requirement_level(requirements.get("cost_profile")),
+        }
+
+        findings, passed, unchecked = [], [], []
+        penalties = dict.fromkeys(self.pillars, 0.0)
+        checked = dict.fromkeys(self.pillars, 0)
+        for rule in self.rules:
+            if not self._applies(rule["when"], facts, everything):
+                continue
+            sections = rule.get("in")
+            if sections is not None and not any(
+                section in texts for section in sections
+            ):
+                unchecked.append(rule["id"])
+                continue
+            scope = (
+                "\n".join(texts.get(section, "") for section in sections)
+                if sections
+                else everything
+            )
+            missing = (
+                rule["require"] is not None and rule["require"].search(scope) is None
+            )
+            forbidden = (
+                rule["forbid"].search(scope) if rule["forbid"] is not None else None
+            )
+            checked[rule["pillar"]] += 1
+            if not missing and forbidden is None:
+                passed.append(rule["id"])
+                continue
+            penalties[rule["pillar"]] += rule["severity"]
+            finding = rule["title"]
+            if forbidden is not None:
+                finding += f" (mentions '{forbidden.group(0)}')"
+            findings.append({
+                "rule": rule["id"],
+                "pillar": rule["pillar"],
+                "severity": rule["severity"],
+                "finding": finding,
+                "recommendation": rule["recommendation"],
+            })
+
+        return {
+            "rules_version": self.version,
+            "pillars": {
+                pillar: {
+                    "score": (
+                        max(1.0, 5.0 - penalties[pillar]) if checked[pillar] else None
+                    ),
+                    "checked": checked[pillar],
+                    "failed": sum(
+                        1 for finding in findings if finding["pillar"] == pillar
+                    ),
+                }
+                for pillar in self.pillars
+            },
+            "findings": findings,
+            "passed": passed,
+            "unchecked": unchecked,
+            "seconds": round(time.perf_counter() - started, 6),
+        }
+
+
+def load_rule_set(path):
+    """The rule set at path, or None when path is "none" or the file does not exist."""
+    if not path or path == "none" or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return RuleSet(json.load(f), source=path)
+
+
+def format_precheck(assessment):
+    """
+    The assessment as the <well_architected_precheck> block given to the validator.
+    """
+    lines = ["<well_architected_precheck>"]
+    for pillar, result in assessment["pillars"].items():
+        lines.append(f"# {pillar}")
+        if result["score"] is None:
+            lines.append("- Score: not checked by the rules")
+            continue
+        lines.append(
+            f"- Score: {result['score']:g}/5 ({result['checked'] - result['failed']} "
+            f"of {result['checked']} checks passed)"
+        )
+        for finding in assessment["findings"]:
+            if finding["pillar"] == pillar:
+                lines.append(
+                    f"- Gap ({finding['rule']}): {finding['finding']}. Recommendation: "
+                    f"{finding['recommendation']}"
+                )
+    if assessment["unchecked"]:
+        lines.append(
+            f"Not checked (sections missing): {', '.join(assessment['unchecked'])}"
+        )
+    lines.append("</well_architected_precheck>")
+    return "\n".join(lines)
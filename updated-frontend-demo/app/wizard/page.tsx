@@ -120,10 +120,31 @@ export default function WizardForm() {
     setLoading(true);
     const data: any = {...values};
     data.compliance = [values.compliance_choice!=='Other'?values.compliance_choice:values.compliance_text];
+    // Sections are streamed as server-sent events as soon as each expert finishes
+    const outputs: Record<string,string> = {};
+    setResult(null);
     try{
-      const res = await fetch('http://localhost:8000/api/kickoff',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(data)});
-      const json = await res.json();
-      if(json.success) setResult({ task_outputs: json.result.task_outputs });
+      const res = await fetch('http://localhost:8000/api/kickoff/stream',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(data)});
+      if(!res.ok || !res.body) throw new Error(`Request failed with status ${res.status}`);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while(true){
+        const { done, value } = await reader.read();
+        if(done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() ?? '';
+        for(const raw of events){
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const payload = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] ?? 'null');
+          if(event === 'task') outputs[payload.section] = payload.output;
+          else if(event === 'token') outputs[payload.section] = (outputs[payload.section] ?? '') + payload.token;
+          else if(event === 'result') Object.assign(outputs, payload.task_outputs);
+          else if(event === 'error') throw new Error(payload.detail);
+          setResult({ task_outputs: { ...outputs } as TaskOutputs });
+        }
+      }
     }catch(e){ console.error(e); }
     setLoading(false);
     setSubmitting(false);
@@ -138,7 +159,7 @@ export default function WizardForm() {
       boxShadow: '0 4px 6px rgba(0, 0, 0, 0.1)',
     }}>
       <Typography variant='h5' sx={{ mb: 2, fontWeight: 600 }}>Results</Typography>
-      {Object.entries(result.task_outputs).map(([k,v])=> (
+      {Object.entries(result.task_outputs).filter(([,v])=> v).map(([k,v])=> (
         <Accordion key={k} sx={{ 
           mb: 1, 
           '&:before': { display: 'none' },